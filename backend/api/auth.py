@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request, Response, HTTPException, status, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import hashlib
 from models.user import User
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.session import SessionManager, get_session
 import re
 
@@ -33,7 +34,7 @@ def validate_cnpj(cnpj):
 @router.post("/register")
 async def register(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """用户注册"""
     try:
@@ -71,7 +72,7 @@ async def register(
             )
 
         # 检查邮箱是否已存在
-        existing_user = db.query(User).filter(User.email == user_data.get('email')).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_data.get('email')))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -79,7 +80,7 @@ async def register(
             )
 
         # 检查企业名称是否已存在
-        existing_name = db.query(User).filter(User.name == user_data.get('name')).first()
+        existing_name = await db.scalar(select(User).where(User.name == user_data.get('name')).limit(1))
         if existing_name:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -87,7 +88,7 @@ async def register(
             )
 
         # 检查CNPJ是否已存在
-        existing_cnpj = db.query(User).filter(User.cnpj == user_data.get('cnpj')).first()
+        existing_cnpj = await db.scalar(select(User).where(User.cnpj == user_data.get('cnpj')))
         if existing_cnpj:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -107,8 +108,8 @@ async def register(
         )
         
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         return {
             "success": True,
@@ -129,7 +130,7 @@ async def register(
 async def login(
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     session: SessionManager = Depends(get_session)
     ):
     """邮箱密码登录"""
@@ -149,7 +150,7 @@ async def login(
             )
         
         # 查找用户
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
         
         # 验证用户是否存在
         if not user:
@@ -2,13 +2,21 @@
 购物车相关API接口
 """
 from fastapi import APIRouter, HTTPException, Depends, Body
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from pydantic import BaseModel
-from models.cart import Cart
 from models.cart_item import CartItem
 from models.product import Product
-from utils.database import get_db
+from utils.database import get_async_db
+from utils.cart_query import (
+    read_cart, add_cart_item, apply_cart_operations,
+    CartNotFoundError, CartItemNotFoundError, ProductNotFoundError, BelowMoqError
+)
+from utils.config import settings
+from utils.migrations import MissingIndexError
+from utils.cart_store import cart_store, redis_cart_enabled
+from utils.cart_cache import user_cart_cache
 
 router = APIRouter()
 
@@ -25,8 +33,22 @@ class AddToCartRequest(BaseModel):
     quantity: int
 
 
+class CartOperation(BaseModel):
+    """购物车批量修改中的单个操作"""
+    op: str  # add / update / remove
+    product_id: Optional[str] = None  # add 操作的商品ID
+    item_id: Optional[int] = None  # update / remove 操作的购物车商品项ID
+    quantity: Optional[int] = None  # add / update 操作的数量
+
+
+class CartBatchRequest(BaseModel):
+    """购物车批量修改请求模型"""
+    cart_id: int
+    operations: List[CartOperation]
+
+
 @router.post("/getCartId")
-async def get_cart_id(request_data: dict, db: Session = Depends(get_db)):
+async def get_cart_id(request_data: dict, db: AsyncSession = Depends(get_async_db)):
     """
     获取用户的购物车ID
     
@@ -54,23 +76,18 @@ async def get_cart_id(request_data: dict, db: Session = Depends(get_db)):
                 detail="user_id 参数不能为空"
             )
         
-        # 查找用户的购物车
-        cart = db.query(Cart).filter(Cart.user_id == user_id).first()
-        
-        # 如果用户没有购物车，创建一个新的
-        if not cart:
-            new_cart = Cart(user_id=user_id)
-            db.add(new_cart)
-            db.commit()
-            db.refresh(new_cart)
-            cart_id = new_cart.id
-            print(f"✅ 为用户 {user_id} 创建新购物车，ID: {cart_id}")
-        else:
-            cart_id = cart.id
-            print(f"✅ 找到用户 {user_id} 的购物车，ID: {cart_id}")
+        # 优先读取缓存；未命中时一条 insert-or-get 语句获取或创建购物车
+        try:
+            cart_id = await user_cart_cache.get(db, user_id)
+        except MissingIndexError as e:
+            print(f"❌ 获取购物车ID已停用: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
+        print(f"✅ 用户 {user_id} 的购物车ID: {cart_id}")
         
         return {"cartId": cart_id}
         
+    except HTTPException as he:
+        raise he
     except Exception as e:
         print(f"❌ 获取购物车ID失败: {str(e)}")
         import traceback
@@ -82,7 +99,7 @@ async def get_cart_id(request_data: dict, db: Session = Depends(get_db)):
 
 
 @router.get("/get_cart_data/{cart_id}")
-async def get_cart_data(cart_id: int, db: Session = Depends(get_db)):
+async def get_cart_data(cart_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     获取购物车的详细数据
     
@@ -117,54 +134,19 @@ async def get_cart_data(cart_id: int, db: Session = Depends(get_db)):
         }
     """
     try:
-        # 查询购物车
-        cart = db.query(Cart).filter(Cart.id == cart_id).first()
-        
-        if not cart:
-            raise HTTPException(
-                status_code=404,
-                detail=f"购物车 {cart_id} 不存在"
-            )
-        
-        # 查询购物车中的商品
-        cart_items = db.query(CartItem).filter(CartItem.cart_id == cart_id).all()
-        
-        items = []
-        total_amount = 0
+        # 查询购物车是否存在，再通过一次 JOIN 查询读取所有商品行并计算总金额
+        # 启用 Redis 购物车时商品行从 Redis 读取
+        try:
+            if redis_cart_enabled():
+                cart_data = await cart_store.read_cart(db, cart_id)
+            else:
+                cart_data = await read_cart(db, cart_id)
+        except CartNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
         
-        for item in cart_items:
-            # 查询商品信息
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            
-            if not product:
-                continue  # 如果商品不存在，跳过
-            
-            # 计算总价
-            unit_price = float(item.price)
-            total_price = unit_price * item.quantity
-            total_amount += total_price
-            
-            items.append({
-                "id": item.id,
-                "product_id": item.product_id,  # 添加商品ID
-                "name": product.title,
-                "description": product.description,
-                "specification": "标准版本",  # 可以根据实际情况添加规格字段
-                "image": product.img or "https://via.placeholder.com/120x120/10b981/ffffff?text=Product",
-                "unitPrice": unit_price,
-                "totalPrice": total_price,
-                "quantity": item.quantity,
-                "moq": product.moq
-            })
-        
-        print(f"✅ 成功获取购物车 {cart_id} 的数据，共 {len(items)} 件商品")
+        print(f"✅ 成功获取购物车 {cart_id} 的数据，共 {len(cart_data['items'])} 件商品")
         
-        return {
-            "items": items,
-            "summary": {
-                "totalAmount": round(total_amount, 2)
-            }
-        }
+        return cart_data
         
     except HTTPException as he:
         raise he
@@ -183,7 +165,7 @@ async def update_cart_item(
     cart_id: int,
     item_id: int,
     request_body: UpdateQuantityRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     更新购物车商品数量
@@ -201,11 +183,28 @@ async def update_cart_item(
     try:
         quantity = request_body.quantity
         
+        # 启用 Redis 购物车时只修改 Redis 中的数量，由后台任务写回数据库
+        if redis_cart_enabled():
+            try:
+                item = await cart_store.update_item(db, cart_id, item_id, quantity)
+            except (CartNotFoundError, CartItemNotFoundError) as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            except BelowMoqError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            print(f"✅ 成功更新购物车商品 {item_id} 的数量为 {quantity}")
+            
+            return {
+                "success": True,
+                "message": "数量更新成功",
+                "item": item
+            }
+        
         # 查找购物车商品
-        cart_item = db.query(CartItem).filter(
+        cart_item = await db.scalar(select(CartItem).where(
             CartItem.id == item_id,
             CartItem.cart_id == cart_id
-        ).first()
+        ))
         
         if not cart_item:
             raise HTTPException(
@@ -214,7 +213,7 @@ async def update_cart_item(
             )
         
         # 获取商品信息以验证 MOQ
-        product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+        product = await db.get(Product, cart_item.product_id)
         
         if product and quantity < product.moq:
             raise HTTPException(
@@ -224,7 +223,7 @@ async def update_cart_item(
         
         # 更新数量
         cart_item.quantity = quantity
-        db.commit()
+        await db.commit()
         
         print(f"✅ 成功更新购物车商品 {item_id} 的数量为 {quantity}")
         
@@ -252,7 +251,7 @@ async def update_cart_item(
 @router.delete("/item")
 async def remove_cart_item(
     request_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     删除购物车商品项目
@@ -282,8 +281,22 @@ async def remove_cart_item(
                 detail="item_id 参数不能为空"
             )
         
+        # 启用 Redis 购物车时只从 Redis 中删除，由后台任务写回数据库
+        if redis_cart_enabled():
+            try:
+                await cart_store.remove_item(db, item_id)
+            except CartItemNotFoundError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+            
+            print(f"✅ 成功删除购物车商品项 {item_id}")
+            
+            return {
+                "success": True,
+                "message": "商品删除成功"
+            }
+        
         # 查找购物车商品项
-        cart_item = db.query(CartItem).filter(CartItem.id == item_id).first()
+        cart_item = await db.get(CartItem, item_id)
         
         if not cart_item:
             raise HTTPException(
@@ -292,8 +305,8 @@ async def remove_cart_item(
             )
         
         # 删除商品项
-        db.delete(cart_item)
-        db.commit()
+        await db.delete(cart_item)
+        await db.commit()
         
         print(f"✅ 成功删除购物车商品项 {item_id}")
         
@@ -317,7 +330,7 @@ async def remove_cart_item(
 @router.post("/add_item")
 async def add_to_cart(
     request_body: AddToCartRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     将商品加入购物车
@@ -354,87 +367,140 @@ async def add_to_cart(
         product_id = str(request_body.product_id)  # 确保 product_id 是字符串
         quantity = request_body.quantity
         
-        # 验证购物车是否存在
-        cart = db.query(Cart).filter(Cart.id == cart_id).first()
-        if not cart:
+        if quantity < 1:
             raise HTTPException(
-                status_code=404,
-                detail=f"购物车 {cart_id} 不存在"
+                status_code=400,
+                detail="数量必须大于 0"
             )
         
-        # 验证商品是否存在
-        product = db.query(Product).filter(Product.id == product_id).first()
-        if not product:
+        # 一条 upsert 语句完成购物车/商品校验、MOQ 校验和数量累加（启用 Redis 购物车时为一次 HINCRBY）
+        try:
+            if redis_cart_enabled():
+                item, created = await cart_store.add_item(db, cart_id, product_id, quantity)
+            else:
+                item, created = await add_cart_item(db, cart_id, product_id, quantity)
+        except (CartNotFoundError, ProductNotFoundError) as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except BelowMoqError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except MissingIndexError as e:
+            print(f"❌ 加入购物车已停用: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        if created:
+            print(f"✅ 成功将商品 {product_id} 加入购物车 {cart_id}，数量: {quantity}")
+        else:
+            print(f"✅ 购物车中商品已存在，更新数量: {item.quantity}")
+        
+        return {
+            "success": True,
+            "message": "商品已加入购物车" if created else "商品数量已更新",
+            "item": {
+                "id": item.id,
+                "product_id": product_id,
+                "quantity": item.quantity
+            }
+        }
+        
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        print(f"❌ 加入购物车失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"加入购物车失败: {str(e)}"
+        )
+
+
+
+@router.post("/batch")
+async def batch_update_cart(
+    request_body: CartBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+    ):
+    """
+    批量修改购物车（加入、修改数量、删除），所有操作在一个事务中执行
+    
+    所有涉及的商品通过一次查询校验；任一操作不合法时整个批次都不会写入，
+    错误信息中包含出错操作的序号（从 1 开始）
+    
+    请求体参数:
+        cart_id (int): 购物车ID（必填）
+        operations (list): 操作列表（必填，最多 CART_BATCH_MAX 个），按顺序执行
+            - {"op": "add", "product_id": "MLB123", "quantity": 50}
+            - {"op": "update", "item_id": 1, "quantity": 80}
+            - {"op": "remove", "item_id": 2}
+    
+    Returns:
+        dict: 包含成功状态、修改后的购物车商品列表和摘要信息（与 get_cart_data 相同）
+    
+    Example:
+        POST /api/cart/batch
+        Body: {
+            "cart_id": 1,
+            "operations": [
+                {"op": "add", "product_id": "MLB123", "quantity": 50},
+                {"op": "remove", "item_id": 2}
+            ]
+        }
+        
+        Response:
+        {
+            "success": true,
+            "message": "购物车已更新",
+            "applied": 2,
+            "items": [...],
+            "summary": {
+                "totalAmount": 6480.50
+            }
+        }
+    """
+    try:
+        operations = [operation.model_dump() for operation in request_body.operations]
+        
+        if not operations:
             raise HTTPException(
-                status_code=404,
-                detail=f"商品 {product_id} 不存在"
+                status_code=400,
+                detail="operations 参数不能为空"
             )
         
-        # 验证数量是否满足MOQ
-        if quantity < product.moq:
+        if len(operations) > settings.CART_BATCH_MAX:
             raise HTTPException(
                 status_code=400,
-                detail=f"数量不能小于最小订购量 {product.moq}"
+                detail=f"一次最多提交 {settings.CART_BATCH_MAX} 个操作"
             )
         
-        # 检查购物车中是否已存在该商品
-        existing_item = db.query(CartItem).filter(
-            CartItem.cart_id == cart_id,
-            CartItem.product_id == product_id
-        ).first()
-        
-        if existing_item:
-            # 如果已存在，增加数量
-            existing_item.quantity += quantity
-            db.commit()
-            db.refresh(existing_item)
-            
-            print(f"✅ 购物车中商品已存在，更新数量: {existing_item.quantity}")
-            
-            return {
-                "success": True,
-                "message": "商品数量已更新",
-                "item": {
-                    "id": existing_item.id,
-                    "product_id": product_id,
-                    "quantity": existing_item.quantity
-                }
-            }
-        else:
-            # 如果不存在，添加新商品到购物车
-            # 使用商品的销售价格
-            price = float(product.selling_price) if product.selling_price else 0.0
-            
-            new_item = CartItem(
-                cart_id=cart_id,
-                product_id=product_id,
-                quantity=quantity,
-                price=price
-            )
-            db.add(new_item)
-            db.commit()
-            db.refresh(new_item)
-            
-            print(f"✅ 成功将商品 {product_id} 加入购物车 {cart_id}，数量: {quantity}")
-            
-            return {
-                "success": True,
-                "message": "商品已加入购物车",
-                "item": {
-                    "id": new_item.id,
-                    "product_id": product_id,
-                    "quantity": new_item.quantity
-                }
-            }
+        try:
+            if redis_cart_enabled():
+                cart_data = await cart_store.apply_operations(db, request_body.cart_id, operations)
+            else:
+                cart_data = await apply_cart_operations(db, request_body.cart_id, operations)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except MissingIndexError as e:
+            print(f"❌ 批量修改购物车已停用: {str(e)}")
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        print(f"✅ 成功批量修改购物车 {request_body.cart_id}，共 {len(operations)} 个操作")
+        
+        return {
+            "success": True,
+            "message": "购物车已更新",
+            "applied": len(operations),
+            **cart_data
+        }
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ 加入购物车失败: {str(e)}")
+        print(f"❌ 批量修改购物车失败: {str(e)}")
         import traceback
         traceback.print_exc()
         raise HTTPException(
             status_code=500,
-            detail=f"加入购物车失败: {str(e)}"
+            detail=f"批量修改购物车失败: {str(e)}"
         )
-
@@ -2,20 +2,24 @@
 订单相关的 API 接口
 """
 from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from utils.database import get_db
+from utils.database import get_async_db
 from models.order import Order, OrderItem
 from models.sample_purchase import SamplePurchase
 from models.product import Product
 from models.user import User
+from utils.order_query import query_orders
+from utils.cart_store import cart_store, redis_cart_enabled
 from datetime import datetime
 
 router = APIRouter()
 
 
 @router.post("/create")
-async def create_order(request: Request, db: Session = Depends(get_db)):
+async def create_order(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     创建订单
     
@@ -28,6 +32,7 @@ async def create_order(request: Request, db: Session = Depends(get_db)):
         payment_method (str): 支付方式（可选）
         notes (str): 备注（可选）
         items (list): 订单商品列表（必填）
+        cart_id (int): 来源购物车ID（可选，启用 Redis 购物车时下单前同步写回该购物车）
     
     Returns:
         dict: 包含成功状态和订单ID
@@ -44,6 +49,10 @@ async def create_order(request: Request, db: Session = Depends(get_db)):
         if not request_data.get('items') or len(request_data.get('items')) == 0:
             raise HTTPException(status_code=400, detail="items 参数不能为空")
         
+        # 结账时同步写回 Redis 中的购物车，使数据库中的购物车与订单一致
+        if request_data.get('cart_id') and redis_cart_enabled():
+            await run_in_threadpool(cart_store.flush_cart, int(request_data.get('cart_id')))
+        
         # 生成订单ID
         import uuid
         order_id = f"ORD-{uuid.uuid4().hex[:8].upper()}"
@@ -69,7 +78,7 @@ async def create_order(request: Request, db: Session = Depends(get_db)):
             order_date=datetime.now()
         )
         db.add(order)
-        db.flush()  # 获取订单ID
+        await db.flush()  # 获取订单ID
         
         # 创建订单商品
         for item in request_data.get('items', []):
@@ -83,7 +92,7 @@ async def create_order(request: Request, db: Session = Depends(get_db)):
             )
             db.add(order_item)
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -94,23 +103,15 @@ async def create_order(request: Request, db: Session = Depends(get_db)):
     except HTTPException as he:
         raise he
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"创建订单失败: {str(e)}")
 
 
-@router.post("/list")
-async def get_order_list(
-    request: Request,
-    db: Session = Depends(get_db)
-    ):
+async def _list_orders(request, db, status_filter, error_message, by_user=False):
     """
-    获取用户的订单列表
+    订单列表接口的公共实现
     
-    请求体参数:
-        user_id (int): 用户ID（必填）
-    
-    Returns:
-        dict: 包含订单列表
+    从请求体读取 user_id、cursor、page_size，通过订单查询服务返回一页订单
     """
     try:
         # 从请求中获取JSON数据
@@ -120,138 +121,70 @@ async def get_order_list(
         if not request_data.get('user_id'):
             raise HTTPException(status_code=400, detail="user_id 参数不能为空")
         
-        user_id = request_data.get('user_id')
-        
-        orders = db.query(Order).filter(Order.user_id == user_id).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
+        page = await query_orders(
+            db,
+            status_filter=status_filter,
+            user_id=request_data.get('user_id') if by_user else None,
+            cursor=request_data.get('cursor'),
+            page_size=request_data.get('page_size')
+        )
         
         return {
             "success": True,
-            "orders": result
+            **page
         }
         
+    except HTTPException as he:
+        raise he
+    except ValueError as e:
+        # 游标或分页参数无效
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取订单列表失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"{error_message}: {str(e)}")
+
+
+@router.post("/list")
+async def get_order_list(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+    ):
+    """
+    获取用户的订单列表
+    
+    请求体参数:
+        user_id (int): 用户ID（必填）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
+    
+    Returns:
+        dict: 包含订单列表，以及 next_cursor、has_more 分页信息
+    """
+    return await _list_orders(request, db, None, "获取订单列表失败", by_user=True)
 
 
 @router.post("/admin/pending")
 async def get_pending_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取待审核的订单列表（管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含待审核订单列表
+        dict: 包含待审核订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Pending" 且状态步骤为 1 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Pending",
-            Order.status_step == 1
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取待审核订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "pending", "获取待审核订单列表失败")
 
 
 @router.post("/admin/processed")
 async def get_processed_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取已处理的订单列表（管理员使用）
@@ -260,77 +193,19 @@ async def get_processed_orders(
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含已处理订单列表
+        dict: 包含已处理订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询所有不是"待审核"状态的订单
-        # 排除: status == "Pending" AND status_step == 1
-        from sqlalchemy import or_, and_, not_
-        orders = db.query(Order).filter(
-            not_(and_(Order.status == "Pending", Order.status_step == 1))
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取已处理订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "processed", "获取已处理订单列表失败")
 
 
 @router.post("/admin/approve")
 async def approve_order(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     批准订单（管理员使用）
@@ -355,7 +230,7 @@ async def approve_order(
         order_id = request_data.get('order_id')
         
         # 查询订单
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         
         if not order:
             raise HTTPException(status_code=404, detail="订单不存在")
@@ -366,7 +241,7 @@ async def approve_order(
         order.status_text = "生产和准备发货"
         order.status_detail_text = "订单已批准，正在生产"
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -376,14 +251,14 @@ async def approve_order(
     except HTTPException as he:
         raise he
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"批准订单失败: {str(e)}")
 
 
 @router.post("/admin/reject")
 async def reject_order(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     拒绝订单（管理员使用）
@@ -410,7 +285,7 @@ async def reject_order(
         reason = request_data.get('reason', '未提供拒绝原因')
         
         # 查询订单
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         
         if not order:
             raise HTTPException(status_code=404, detail="订单不存在")
@@ -421,7 +296,7 @@ async def reject_order(
         order.status_text = "订单已拒绝"
         order.status_detail_text = f"拒绝原因: {reason}"
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -431,465 +306,128 @@ async def reject_order(
     except HTTPException as he:
         raise he
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"拒绝订单失败: {str(e)}")
 
 
 @router.post("/logistics/processing")
 async def get_processing_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Processing的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Processing状态订单列表
+        dict: 包含Processing状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Processing" 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Processing"
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Processing状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "processing", "获取Processing状态订单列表失败")
 
 
 @router.post("/logistics/shipped")
 async def get_shipped_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Shipped的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Shipped状态订单列表
+        dict: 包含Shipped状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Shipped" 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Shipped"
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Shipped状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "shipped", "获取Shipped状态订单列表失败")
 
 
 @router.post("/logistics/sample_processed_orders")
 async def get_sample_processed_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Customs和Delivered的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Customs和Delivered状态订单列表
+        dict: 包含Customs和Delivered状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Customs" 或 "Delivered" 的订单
-        from sqlalchemy import or_
-        orders = db.query(Order).filter(
-            or_(Order.status == "Customs", Order.status == "Delivered")
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品 
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Customs和Delivered状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "customs_delivered", "获取Customs和Delivered状态订单列表失败")
 
 
 @router.post("/logistics/customs")
 async def get_customs_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Customs的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Customs状态订单列表
+        dict: 包含Customs状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Customs" 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Customs"
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Customs状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "customs", "获取Customs状态订单列表失败")
 
 
 @router.post("/logistics/cleared")
 async def get_cleared_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Cleared的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Cleared状态订单列表
+        dict: 包含Cleared状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Cleared" 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Cleared"
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Cleared状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "cleared", "获取Cleared状态订单列表失败")
 
 
 @router.post("/logistics/delivered")
 async def get_delivered_orders(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     获取状态为Delivered的订单列表（物流管理员使用）
     
     请求体参数:
         user_id (int): 用户ID（必填，用于验证物流管理员权限）
+        cursor (str): 分页游标，传入上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，最大 200；与 cursor 都未传入时返回全部订单，只传入 cursor 时默认 50）
     
     Returns:
-        dict: 包含Delivered状态订单列表
+        dict: 包含Delivered状态订单列表，以及 next_cursor、has_more 分页信息
     """
-    try:
-        # 从请求中获取JSON数据
-        request_data = await request.json()
-        
-        # 验证必填参数
-        if not request_data.get('user_id'):
-            raise HTTPException(status_code=400, detail="user_id 参数不能为空")
-        
-        # 查询状态为 "Delivered" 的订单
-        orders = db.query(Order).filter(
-            Order.status == "Delivered"
-        ).order_by(Order.order_date.desc()).all()
-        
-        result = []
-        for order in orders:
-            # 获取订单商品
-            items = db.query(OrderItem).filter(OrderItem.order_id == order.id).all()
-            
-            order_data = {
-                "id": order.id,
-                "status": order.status,
-                "status_step": order.status_step,
-                "status_text": order.status_text,
-                "status_detail_text": order.status_detail_text,
-                "customer_name": order.customer_name,
-                "total_amount": float(order.total_amount),
-                "shipping": {
-                    "street": order.shipping_street,
-                    "city": order.shipping_city,
-                    "zipcode": order.shipping_zipcode
-                },
-                "payment_method": order.payment_method,
-                "notes": order.notes,
-                "orderDate": order.order_date.isoformat() if order.order_date else None,
-                "statusStep": order.status_step,
-                "statusText": order.status_text,
-                "statusDetailText": order.status_detail_text,
-                "statusClass": f"status-{order.status.lower()}",
-                "items": [
-                    {
-                        "id": item.id,
-                        "product_id": item.product_id,
-                        "productName": item.product_name,
-                        "image": item.product_image,
-                        "quantity": item.quantity,
-                        "price": float(item.price)
-                    }
-                    for item in items
-                ]
-            }
-            result.append(order_data)
-        
-        return {
-            "success": True,
-            "orders": result
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取Delivered状态订单列表失败: {str(e)}")
+    return await _list_orders(request, db, "delivered", "获取Delivered状态订单列表失败")
 
 
 @router.post("/logistics/update_status")
 async def update_order_status(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     更新订单状态（物流管理员使用）
@@ -925,7 +463,7 @@ async def update_order_status(
         reason = request_data.get('reason', '')
         
         # 查询订单
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = await db.get(Order, order_id)
         
         if not order:
             raise HTTPException(status_code=404, detail="订单不存在")
@@ -981,7 +519,7 @@ async def update_order_status(
         else:
             raise HTTPException(status_code=400, detail="无效的操作类型")
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -991,14 +529,14 @@ async def update_order_status(
     except HTTPException as he:
         raise he
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"更新订单状态失败: {str(e)}")
 
 
 @router.post("/sample/create")
 async def create_sample_order(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     创建小样订单（先试后用）
@@ -1032,12 +570,12 @@ async def create_sample_order(
         product_id = request_data.get('product_id')
         
         # 检查用户是否存在
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.get(User, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="用户不存在")
         
         # 检查产品是否存在
-        product = db.query(Product).filter(Product.id == product_id).first()
+        product = await db.get(Product, product_id)
         if not product:
             raise HTTPException(status_code=404, detail="产品不存在")
         
@@ -1067,7 +605,7 @@ async def create_sample_order(
             order_date=datetime.now()
         )
         db.add(order)
-        db.flush()  # 获取订单ID
+        await db.flush()  # 获取订单ID
         
         # 创建订单商品
         order_item = OrderItem(
@@ -1089,7 +627,7 @@ async def create_sample_order(
         )
         db.add(sample_purchase)
         
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -1103,14 +641,14 @@ async def create_sample_order(
     except HTTPException as he:
         raise he
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"创建小样订单失败: {str(e)}")
 
 
 @router.post("/sample/check")
 async def check_sample_purchase(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     检查用户是否已经购买过指定产品的小样
@@ -1136,10 +674,10 @@ async def check_sample_purchase(
         product_id = request_data.get('product_id')
         
         # 检查用户是否已经购买过该产品的小样
-        existing_purchase = db.query(SamplePurchase).filter(
+        existing_purchase = await db.scalar(select(SamplePurchase).where(
             SamplePurchase.user_id == user_id,
             SamplePurchase.product_id == product_id
-        ).first()
+        ))
         
         return {
             "success": True,
@@ -1,20 +1,52 @@
 """
 产品相关API接口
 """
+import io
+import tempfile
 from fastapi import APIRouter, HTTPException, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from models.category import Category
 from models.product import Product
 from models.supplier import Supplier
-from utils.database import get_db
-from sqlalchemy import or_
+from models.tag import Tag, ProductTag
+from utils.database import get_async_db
+from utils.config import settings
+from utils.search_engine import product_search
+from utils.catalog import catalog
+from utils.catalog_export import EXPORT_FORMATS, iter_export, resolve_format
+from utils.catalog_import import (
+    build_product_row, import_products, known_references, new_product_id, resolve_import_format
+)
+from utils.change_feed import read_changes
+from utils import invalidation
+from utils.product_cache import product_cache
+from utils.serializer import compile_serializer, ORJSONResponse
+from utils.tags import set_product_tags
+from utils.facets import FACETS, facet_index, format_facets, parse_price, popcount, price_buckets
+from utils.product_query import (
+    query_category_products,
+    query_tag_products,
+    decode_cursor,
+    encode_cursor,
+    normalize_page_size,
+    parse_fields,
+    load_only_fields,
+    CATEGORY_PRODUCT_FIELDS,
+    SAMPLE_PRODUCT_FIELDS,
+    SEARCH_PRODUCT_FIELDS,
+    ALL_PRODUCT_FIELDS,
+    DETAIL_PRODUCT_FIELDS,
+)
 
 router = APIRouter()
 
 
 @router.get("/categories")
-async def categories(db: Session = Depends(get_db)):
+async def categories(db: AsyncSession = Depends(get_async_db)):
     """
     获取所有产品类别
     
@@ -36,18 +68,15 @@ async def categories(db: Session = Depends(get_db)):
         ]
     """
     try:
-        # 查询所有类别
-        categories = db.query(Category).order_by(Category.name).all()
+        # 从目录读模型获取所有类别（版本未变化时不访问数据库）
+        await catalog.ensure_fresh(db)
         
-        # 转换为字典列表
-        result = []
-        for category in categories:
-            result.append({
-                "id": category.id,
-                "name": category.name,
-                "description": category.description,
-                "icon": category.icon
-            })
+        # 转换为字典列表（按版本缓存）
+        def build():
+            serialize = compile_serializer(Category, ("id", "name", "description", "icon"))
+            return [serialize(category) for category in sorted(catalog.categories.values(), key=lambda c: c.name)]
+        
+        result = catalog.view("categories", build)
         
         print(f"✅ 成功获取 {len(result)} 个产品类别")
         return {
@@ -67,19 +96,31 @@ async def categories(db: Session = Depends(get_db)):
 @router.get("/categories/{category_id}")
 async def get_category_products(
     category_id: str,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    根据类别ID获取该类别下的所有产品
+    根据类别ID分页获取该类别下的产品
     
     路径参数:
         category_id (str): 类别ID（必填）
     
+    查询参数:
+        cursor (str): 上一页返回的 next_cursor（可选，为空时返回第一页）
+        page_size (int): 每页数量（可选，最大 PRODUCT_PAGE_SIZE_MAX；与 cursor 都未传入时返回全部产品，只传入 cursor 时默认 PRODUCT_PAGE_SIZE）
+        sort (str): 排序字段 created_at / selling_price / discount_price / stock_quantity（可选，默认 created_at）
+        order (str): asc 或 desc（可选，created_at 默认倒序，其他字段默认正序）
+        fields (str): 逗号分隔的返回字段，如 id,title,img,selling_price（可选，默认返回全部字段，id 总是返回）
+    
     Returns:
-        dict: 包含成功状态、产品数量和产品列表
+        dict: 包含成功状态、本页产品数量、产品列表和下一页游标
     
     Example:
-        GET /api/product/categories/MLB5672
+        GET /api/product/categories/MLB5672?sort=selling_price&page_size=20
         
         Response:
         {
@@ -101,7 +142,9 @@ async def get_category_products(
                     ...
                 },
                 ...
-            ]
+            ],
+            "next_cursor": "WyJzZWxsaW5nX3ByaWNlIiwgOTkuOTks...",
+            "has_more": true
         }
     """
     try:
@@ -117,58 +160,47 @@ async def get_category_products(
         
         category_id = category_id.strip()
         
-        # 验证类别是否存在
-        category = db.query(Category).filter(Category.id == category_id).first()
+        # 从目录读模型验证类别是否存在
+        await catalog.ensure_fresh(db)
+        category = catalog.categories.get(category_id)
         if not category:
             raise HTTPException(
                 status_code=404,
                 detail=f"类别 {category_id} 不存在"
             )
         
-        # 查询该类别下的所有产品（不使用分页）
-        products = db.query(Product).filter(
-            Product.category_id == category_id
-        ).order_by(Product.created_at.desc()).all()
+        # 按游标分页查询该类别下的产品（只加载请求的字段对应的列）
+        try:
+            fields = parse_fields(fields, CATEGORY_PRODUCT_FIELDS)
+            page = await query_category_products(
+                db,
+                category_id,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                page_size=page_size,
+                fields=fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # 转换为字典列表
-        result = []
-        for product in products:
-            result.append({
-                "id": product.id,
-                "title": product.title,
-                "description": product.description,
-                "img": product.img,
-                "product_mlb_thumbnail": product.product_mlb_thumbnail,
-                "category_id": product.category_id,
-                "supplier_id": product.supplier_id,
-                "shipping_from": product.shipping_from,
-                "weight": product.weight,
-                "dimensions": product.dimensions,
-                "moq": product.moq,
-                "tags": product.tags,
-                "stock_quantity": product.stock_quantity,
-                "reserved_quantity": product.reserved_quantity,
-                "low_stock_threshold": product.low_stock_threshold,
-                "max_order_quantity": product.max_order_quantity,
-                "cost_price": product.cost_price,
-                "selling_price": product.selling_price,
-                "discount_price": product.discount_price,
-                "product_mlb_price": product.product_mlb_price,
-                "roi": product.roi,
-                "created_at": product.created_at.isoformat() if product.created_at else None,
-                "updated_at": product.updated_at.isoformat() if product.updated_at else None
-            })
+        # 转换为字典列表（只包含请求的字段）
+        serialize = compile_serializer(Product, fields)
+        result = [serialize(product) for product in page["products"]]
         
         print(f"✅ 成功获取类别 {category_id} 下的 {len(result)} 个产品")
         
-        return {
+        # 结果已是可直接编码的字典，直接返回 ORJSONResponse 跳过 jsonable_encoder
+        return ORJSONResponse({
             "success": True,
             "code": 200,
             "count": len(result),
             "category_id": category_id,
             "category_name": category.name,
-            "products": result
-        }
+            "products": result,
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        })
         
     except HTTPException as he:
         # 重新抛出HTTP异常
@@ -183,10 +215,26 @@ async def get_category_products(
         )
 
 
+# 产品详情字典（单个和批量详情接口共用）
+_product_detail_dict = compile_serializer(Product, DETAIL_PRODUCT_FIELDS)
+
+
+async def _load_product_detail(db: AsyncSession, product_id: str):
+    """从数据库加载产品详情字典，产品不存在时返回 None"""
+    product = await db.get(Product, product_id)
+    return _product_detail_dict(product) if product else None
+
+
+async def _load_product_details(db: AsyncSession, product_ids: List[str]):
+    """通过一次 IN 查询加载多个产品的详情字典，返回 {产品ID: 详情}"""
+    products = (await db.scalars(select(Product).where(Product.id.in_(product_ids)))).all()
+    return {product.id: _product_detail_dict(product) for product in products}
+
+
 @router.post("/get_product")
 async def get_product_detail(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     根据产品ID获取产品详细信息
@@ -253,50 +301,22 @@ async def get_product_detail(
         
         print(f"接收到的产品ID: {product_id}")
         
-        # 查询产品详情 
-        product = db.query(Product).filter(Product.id == product_id).first()
+        # 查询产品详情（优先读取 Redis 缓存，未命中时合并并发查询）
+        result = await product_cache.get(db, product_id, _load_product_detail)
         
-        if not product:
+        if not result:
             raise HTTPException(
                 status_code=404,
                 detail=f"产品 {product_id} 不存在"
             )
         
-        # 转换为字典  
-        result = {
-            "id": product.id,
-            "title": product.title,
-            "description": product.description,
-            "img": product.img,
-            "product_mlb_thumbnail": product.product_mlb_thumbnail,
-            "category_id": product.category_id,
-            "supplier_id": product.supplier_id,
-            "shipping_from": product.shipping_from,
-            "weight": product.weight,
-            "dimensions": product.dimensions,
-            "moq": product.moq,
-            "tags": product.tags,
-            "stock_quantity": product.stock_quantity,
-            "reserved_quantity": product.reserved_quantity,
-            "low_stock_threshold": product.low_stock_threshold,
-            "max_order_quantity": product.max_order_quantity,
-            "cost_price": product.cost_price,
-            "selling_price": product.selling_price,
-            "discount_price": product.discount_price,
-            "product_mlb_price": product.product_mlb_price,
-            "roi": product.roi,
-            "variations": product.variations,
-            "created_at": product.created_at.isoformat() if product.created_at else None,
-            "updated_at": product.updated_at.isoformat() if product.updated_at else None
-        }
-        
         print(f"✅ 成功获取产品 {product_id} 的详细信息")
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "code": 200,
             "product": result
-        }
+        })
         
     except HTTPException as he:
         # 重新抛出HTTP异常
@@ -311,16 +331,135 @@ async def get_product_detail(
         )
 
 
+@router.post("/get_products")
+async def get_product_details(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+    ):
+    """
+    批量获取产品详细信息（购物车、订单历史、对比页面等一次性获取多个产品）
+    
+    请求体参数:
+        product_ids (list): 产品ID列表（必填，最多 PRODUCT_BATCH_MAX 个，重复的ID只返回一次）
+    
+    Returns:
+        dict: 包含成功状态、按产品ID索引的产品详情（字段与 /get_product 相同）和不存在的产品ID列表
+    
+    Example:
+        POST /api/product/get_products
+        
+        Request Body:
+        {
+            "product_ids": ["MLB123456", "MLB654321", "MLB000000"]
+        }
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "count": 2,
+            "products": {
+                "MLB123456": {"id": "MLB123456", "title": "产品标题", ...},
+                "MLB654321": {"id": "MLB654321", "title": "产品标题", ...}
+            },
+            "missing": ["MLB000000"]
+        }
+    """
+    try:
+        # 获取请求体数据
+        request_data = await request.json()
+        
+        # 验证产品ID列表
+        product_ids = request_data.get('product_ids')
+        if not isinstance(product_ids, list) or not product_ids:
+            raise HTTPException(
+                status_code=400,
+                detail="缺少必填字段: product_ids（非空列表）"
+            )
+        if not all(isinstance(product_id, str) and product_id.strip() for product_id in product_ids):
+            raise HTTPException(
+                status_code=400,
+                detail="product_ids 中的每一项都必须是非空字符串"
+            )
+        
+        # 去除首尾空白和重复ID（保持请求中的顺序）
+        product_ids = list(dict.fromkeys(product_id.strip() for product_id in product_ids))
+        if len(product_ids) > settings.PRODUCT_BATCH_MAX:
+            raise HTTPException(
+                status_code=400,
+                detail=f"一次最多查询 {settings.PRODUCT_BATCH_MAX} 个产品"
+            )
+        
+        print(f"接收到批量产品详情请求，共 {len(product_ids)} 个产品ID")
+        
+        # 一次 MGET 读取缓存，未命中的产品一次 IN 查询加载
+        found = await product_cache.get_many(db, product_ids, _load_product_details)
+        
+        products = {product_id: found[product_id] for product_id in product_ids if product_id in found}
+        missing = [product_id for product_id in product_ids if product_id not in found]
+        
+        print(f"✅ 成功获取 {len(products)} 个产品的详细信息，{len(missing)} 个不存在")
+        
+        return ORJSONResponse({
+            "success": True,
+            "code": 200,
+            "count": len(products),
+            "products": products,
+            "missing": missing
+        })
+        
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
+    except Exception as e:
+        print(f"❌ 批量获取产品详情失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量获取产品详情失败: {str(e)}"
+        )
+
+
+@router.get("/cache/stats")
+async def get_product_cache_stats():
+    """
+    获取当前工作进程的产品详情缓存命中统计
+    
+    Returns:
+        dict: 包含命中、旧数据命中、未命中、合并查询、后台刷新和 Redis 错误次数
+    
+    Example:
+        GET /api/product/cache/stats
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "stats": {"hits": 120, "stale_hits": 3, "misses": 5, "coalesced": 40, "refreshes": 3, "errors": 0}
+        }
+    """
+    return {
+        "success": True,
+        "code": 200,
+        "stats": dict(product_cache.stats)
+    }
+
+
 @router.post("/search/keyword")
 async def search_products(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
-    根据关键词搜索产品（模糊查询）
+    根据关键词搜索产品
+    
+    在标题、描述和标签中搜索（不区分大小写和重音，最后一个词支持前缀匹配），按相关度排序，
+    最多返回 SEARCH_RESULT_LIMIT 个产品
     
     请求体参数:
         keyword (str): 搜索关键词（必填）
+        fields (list|str): 返回字段列表或逗号分隔的字符串（可选，默认返回全部字段，id 总是返回）
     
     Returns:
         dict: 包含成功状态和产品列表
@@ -369,53 +508,45 @@ async def search_products(
         
         print(f"接收到的搜索关键词: {keyword}")
         
-        # 在 products 表的 title 字段中进行模糊查询
-        # 使用 LIKE 查询实现模糊匹配
-        products = db.query(Product).filter(
-            Product.title.like(f'%{keyword}%')
-        ).order_by(Product.created_at.desc()).all()
+        # 解析需要返回的字段
+        try:
+            fields = parse_fields(request_data.get('fields'), SEARCH_PRODUCT_FIELDS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 通过进程内倒排索引搜索（首次搜索时构建索引），得到按相关度排序的产品ID
+        await product_search.ensure_built(db)
+        hits = product_search.search(keyword, limit=settings.SEARCH_RESULT_LIMIT)
+        ranked_ids = [product_id for product_id, _ in hits]
+        
+        # 按主键批量加载命中的产品（只加载请求的字段对应的列），并保持相关度顺序
+        # 同时通过 JOIN 获取类别名称
+        rows = []
+        if ranked_ids:
+            rows_by_id = {
+                product.id: (product, category_name)
+                for product, category_name in (await db.execute(
+                    select(Product, Category.name)
+                    .outerjoin(Category, Category.id == Product.category_id)
+                    .where(Product.id.in_(ranked_ids))
+                    .options(load_only_fields(fields))
+                )).all()
+            }
+            rows = [rows_by_id[product_id] for product_id in ranked_ids if product_id in rows_by_id]
         
-        # 转换为字典列表
-        result = []
-        for product in products:
-            # 获取类别名称
-            category = db.query(Category).filter(Category.id == product.category_id).first()
-            result.append({
-                "id": product.id,
-                "title": product.title,
-                "description": product.description,
-                "img": product.img,
-                "product_mlb_thumbnail": product.product_mlb_thumbnail,
-                "category_id": product.category_id,
-                "category_name": category.name if category else None,
-                "supplier_id": product.supplier_id,
-                "shipping_from": product.shipping_from,
-                "weight": product.weight,
-                "dimensions": product.dimensions,
-                "moq": product.moq,
-                "tags": product.tags,
-                "stock_quantity": product.stock_quantity,
-                "reserved_quantity": product.reserved_quantity,
-                "low_stock_threshold": product.low_stock_threshold,
-                "max_order_quantity": product.max_order_quantity,
-                "cost_price": product.cost_price,
-                "selling_price": product.selling_price,
-                "discount_price": product.discount_price,
-                "product_mlb_price": product.product_mlb_price,
-                "roi": product.roi,
-                "created_at": product.created_at.isoformat() if product.created_at else None,
-                "updated_at": product.updated_at.isoformat() if product.updated_at else None
-            })
+        # 转换为字典列表（只包含请求的字段）
+        serialize = compile_serializer(Product, fields)
+        result = [serialize(product, category_name=category_name) for product, category_name in rows]
         
         print(f"✅ 搜索关键词 '{keyword}' 找到 {len(result)} 个产品")
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "code": 200,
             "count": len(result),
             "keyword": keyword,
             "products": result
-        }
+        })
         
     except HTTPException as he:
         # 重新抛出HTTP异常
@@ -430,10 +561,149 @@ async def search_products(
         )
 
 
+@router.post("/filter")
+async def filter_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    分面筛选产品
+    
+    在服务端组合标签、供应商、发货地和价格条件筛选产品，并返回各分面的数量；
+    同一分面内多选取并集，不同分面之间取交集，某个分面的数量只应用其他分面的条件
+    
+    请求体参数:
+        category_id (str): 类别ID（可选，为空时在所有产品中筛选）
+        tags (list): 标签（可选）
+        supplier_ids (list): 供应商ID（可选）
+        shipping_from (list): 发货地（可选）
+        price_buckets (list): 价格区间，取值见返回的 facets.price（可选）
+        min_price (float): 最低实际支付价格（可选，有折扣价时按折扣价）
+        max_price (float): 最高实际支付价格（可选）
+        cursor (str): 上一页返回的 next_cursor（可选）
+        page_size (int): 每页数量（可选，默认 PRODUCT_PAGE_SIZE，最大 PRODUCT_PAGE_SIZE_MAX）
+        fields (list|str): 返回字段列表或逗号分隔的字符串（可选，默认返回全部字段，id 总是返回）
+    
+    Returns:
+        dict: 包含筛选结果总数、当前页产品（按创建时间倒序）、分面数量和下一页游标
+    
+    Example:
+        POST /api/product/filter
+        
+        Request Body:
+        {
+            "category_id": "MLB5672",
+            "tags": ["premium"],
+            "price_buckets": ["25-50", "50-100"]
+        }
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "total": 42,
+            "count": 42,
+            "products": [...],
+            "facets": {
+                "tags": [{"value": "premium", "count": 42, "selected": true}, ...],
+                "suppliers": [{"value": "SUP001", "name": "供应商", "count": 30, "selected": false}, ...],
+                "shipping_from": [{"value": "广东省广州市", "count": 42, "selected": false}],
+                "price": [{"value": "0-25", "count": 3, "selected": false}, ...]
+            },
+            "next_cursor": null,
+            "has_more": false
+        }
+    """
+    try:
+        # 获取请求体数据
+        request_data = await request.json()
+        print(f"接收到的分面筛选请求数据: {request_data}")
+        
+        category_id = (request_data.get('category_id') or '').strip() or None
+        
+        # 校验筛选条件（每个分面都是字符串列表）
+        selected = {}
+        for facet, key in FACETS.items():
+            values = request_data.get(key) or []
+            if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{key} 必须是字符串列表"
+                )
+            selected[facet] = values
+        
+        buckets = price_buckets()
+        unknown = sorted(set(selected["price"]) - {label for label, _, _ in buckets})
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"不支持的价格区间: {', '.join(unknown)}"
+            )
+        
+        try:
+            min_price = parse_price(request_data.get('min_price'), "min_price")
+            max_price = parse_price(request_data.get('max_price'), "max_price")
+            page_size = normalize_page_size(request_data.get('page_size'))
+            fields = parse_fields(request_data.get('fields'), ALL_PRODUCT_FIELDS)
+            cursor = request_data.get('cursor')
+            cursor = decode_cursor(cursor, "created_at") if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 从目录读模型获取类别（版本未变化时不访问数据库）
+        await catalog.ensure_fresh(db)
+        if category_id and category_id not in catalog.categories:
+            raise HTTPException(
+                status_code=404,
+                detail=f"类别 {category_id} 不存在"
+            )
+        
+        # 通过预先计算的位图索引筛选并统计各分面数量（按读模型版本缓存）
+        index = facet_index(category_id)
+        matched, counts = index.filter(selected, min_price=min_price, max_price=max_price)
+        start = index.position_after(*cursor) if cursor else 0
+        products, has_more = index.page(matched, start=start, limit=page_size)
+        
+        # 转换为字典列表（只包含请求的字段）
+        serialize = compile_serializer(Product, fields)
+        categories = catalog.categories
+        result = []
+        for product in products:
+            category = categories.get(product.category_id)
+            result.append(serialize(product, category_name=category.name if category else None))
+        
+        total = popcount(matched)
+        print(f"✅ 分面筛选找到 {total} 个产品，返回 {len(result)} 个")
+        
+        return ORJSONResponse({
+            "success": True,
+            "code": 200,
+            "total": total,
+            "count": len(result),
+            "category_id": category_id,
+            "products": result,
+            "facets": format_facets(counts, selected, catalog.suppliers, buckets),
+            "next_cursor": encode_cursor(products[-1], "created_at") if has_more else None,
+            "has_more": has_more
+        })
+        
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
+    except Exception as e:
+        print(f"❌ 分面筛选产品失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"分面筛选产品失败: {str(e)}"
+        )
+
+
 @router.post("/create")
 async def create_product(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
     ):
     """
     创建新产品
@@ -515,47 +785,35 @@ async def create_product(
                 )
         
         # 验证类别是否存在
-        category = db.query(Category).filter(Category.id == request_data['category_id']).first()
+        category = await db.get(Category, request_data['category_id'])
         if not category:
             raise HTTPException(
                 status_code=404,
                 detail=f"类别 {request_data['category_id']} 不存在"
             )
         
-        # 生成产品ID（实际项目中可能需要更复杂的ID生成逻辑）
-        import uuid
-        product_id = f"MLB{uuid.uuid4().hex[:8].upper()}"
-        
-        # 创建产品对象
-        new_product = Product(
-            id=product_id,
-            title=request_data['name'],
-            description=request_data['description'],
-            selling_price=float(request_data['price']),
-            category_id=request_data['category_id'],
-            supplier_id=request_data['supplier_id'],
-            stock_quantity=int(request_data['stock']),
-            img=request_data.get('main_image_url', ''),
-            product_mlb_thumbnail=request_data.get('thumbnail_urls', []),
-            tags=request_data.get('tags', []),
-            variations=request_data.get('variations', []),
-            moq=1,  # 默认最小订购量
-            cost_price=float(request_data['price']) * 0.6,  # 假设成本价为售价的60%
-            discount_price=None,
-            product_mlb_price=f"R$ {request_data['price']:.2f}".replace('.', ','),
-            roi="112%",  # 默认ROI
-            shipping_from="广东省广州市",  # 默认发货地
-            weight=1.0,  # 默认重量
-            dimensions={"length": 30, "width": 20, "height": 10},  # 默认尺寸
-            reserved_quantity=0,
-            low_stock_threshold=10,
-            max_order_quantity=1000
-        )
+        # 校验字段格式、整理标签并生成产品ID（实际项目中可能需要更复杂的ID生成逻辑）
+        try:
+            row = build_product_row(request_data, new_product_id())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        product_id = row["id"]
+        tag_names = row["tags"]
+        new_product = Product(**row)
         
-        # 保存到数据库
+        # 保存到数据库（同一事务中写入标签注册表和产品标签关联）
         db.add(new_product)
-        db.commit()
-        db.refresh(new_product)
+        await set_product_tags(db, product_id, tag_names)
+        await db.commit()
+        await db.refresh(new_product)
+        
+        # 增量更新搜索索引，并使目录读模型失效（下次读取时增量加载）
+        product_search.add_document(new_product.id, new_product.title, new_product.description, new_product.tags)
+        catalog.invalidate()
+        product_cache.evict(new_product.id)
+        # 通知其他工作进程淘汰该产品的缓存
+        invalidation.publish("product", [new_product.id])
         
         print(f"✅ 成功创建产品 {product_id}")
         
@@ -596,12 +854,12 @@ async def create_product(
 
 
 @router.get("/tags")
-async def get_product_tags(db: Session = Depends(get_db)):
+async def get_product_tags(db: AsyncSession = Depends(get_async_db)):
     """
-    获取所有可用的产品标签
+    获取所有产品标签（内置标签和产品中出现过的自定义标签）
     
     Returns:
-        dict: 包含成功状态和标签列表
+        dict: 包含成功状态和标签列表，每个标签包含使用该标签的产品数量
     
     Example:
         GET /api/product/tags
@@ -617,79 +875,24 @@ async def get_product_tags(db: Session = Depends(get_db)):
                     "name": "New Arrival",
                     "display_name": "新品上市",
                     "color": "#10b981",
-                    "description": "最新上架的产品"
-                },
-                {
-                    "id": "tag-002", 
-                    "name": "On Sale",
-                    "display_name": "特价促销",
-                    "color": "#ef4444",
-                    "description": "正在促销的产品"
+                    "description": "最新上架的产品",
+                    "product_count": 12
                 },
                 ...
             ]
         }
     """
     try:
-        # 模拟标签数据（实际项目中应该从数据库获取）
-        tags = [
-            {
-                "id": "tag-001",
-                "name": "New Arrival",
-                "display_name": "新品上市",
-                "color": "#10b981",
-                "description": "最新上架的产品"
-            },
-            {
-                "id": "tag-002",
-                "name": "On Sale", 
-                "display_name": "特价促销",
-                "color": "#ef4444",
-                "description": "正在促销的产品"
-            },
-            {
-                "id": "tag-003",
-                "name": "Best Seller",
-                "display_name": "热销商品",
-                "color": "#f59e0b",
-                "description": "销量最好的产品"
-            },
-            {
-                "id": "tag-004",
-                "name": "Featured",
-                "display_name": "精选推荐",
-                "color": "#8b5cf6",
-                "description": "精选推荐的产品"
-            },
-            {
-                "id": "tag-005",
-                "name": "Limited Edition",
-                "display_name": "限量版",
-                "color": "#ec4899",
-                "description": "限量版产品"
-            },
-            {
-                "id": "tag-006",
-                "name": "Premium",
-                "display_name": "高端产品",
-                "color": "#6366f1",
-                "description": "高端品质产品"
-            },
-            {
-                "id": "tag-007",
-                "name": "Eco Friendly",
-                "display_name": "环保产品",
-                "color": "#22c55e",
-                "description": "环保友好产品"
-            },
-            {
-                "id": "tag-008",
-                "name": "Fast Shipping",
-                "display_name": "快速发货",
-                "color": "#06b6d4",
-                "description": "支持快速发货"
-            }
-        ]
+        # 查询所有标签，产品数量通过 product_tags 主键索引统计
+        rows = (await db.execute(
+            select(Tag, func.count(ProductTag.product_id))
+            .outerjoin(ProductTag, ProductTag.tag_id == Tag.id)
+            .group_by(Tag.id)
+            .order_by(Tag.created_at, Tag.id)
+        )).all()
+        
+        serialize = compile_serializer(Tag, ("id", "name", "display_name", "color", "description", "product_count"))
+        tags = [serialize(tag, product_count=product_count) for tag, product_count in rows]
         
         print(f"✅ 成功获取 {len(tags)} 个产品标签")
         
@@ -710,8 +913,104 @@ async def get_product_tags(db: Session = Depends(get_db)):
         )
 
 
+@router.get("/tags/{tag_id}/products")
+async def get_tag_products(
+    tag_id: str,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    根据标签ID分页获取带有该标签的产品
+    
+    路径参数:
+        tag_id (str): 标签ID（必填）
+    
+    查询参数:
+        cursor、sort、order、fields 与类别产品列表相同
+        page_size (int): 每页数量（可选，默认 PRODUCT_PAGE_SIZE，最大 PRODUCT_PAGE_SIZE_MAX）
+    
+    Returns:
+        dict: 包含成功状态、本页产品数量、产品列表和下一页游标
+    
+    Example:
+        GET /api/product/tags/tag-003/products?page_size=20
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "count": 20,
+            "tag_id": "tag-003",
+            "tag_name": "热销商品",
+            "products": [...],
+            "next_cursor": "WyJjcmVhdGVkX2F0IiwgIjIwMjQt...",
+            "has_more": true
+        }
+    """
+    try:
+        print(f"接收到的标签ID: {tag_id}")
+        
+        tag_id = tag_id.strip()
+        
+        # 验证标签是否存在
+        tag = await db.get(Tag, tag_id)
+        if not tag:
+            raise HTTPException(
+                status_code=404,
+                detail=f"标签 {tag_id} 不存在"
+            )
+        
+        # 按游标分页查询带有该标签的产品（只加载请求的字段对应的列）
+        try:
+            fields = parse_fields(fields, CATEGORY_PRODUCT_FIELDS)
+            page = await query_tag_products(
+                db,
+                tag_id,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                page_size=page_size,
+                fields=fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 转换为字典列表（只包含请求的字段）
+        serialize = compile_serializer(Product, fields)
+        result = [serialize(product) for product in page["products"]]
+        
+        print(f"✅ 成功获取标签 {tag_id} 下的 {len(result)} 个产品")
+        
+        return ORJSONResponse({
+            "success": True,
+            "code": 200,
+            "count": len(result),
+            "tag_id": tag_id,
+            "tag_name": tag.display_name,
+            "products": result,
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        })
+        
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
+    except Exception as e:
+        print(f"❌ 获取标签产品失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取标签产品失败: {str(e)}"
+        )
+
+
 @router.get("/supplier")
-async def get_suppliers(db: Session = Depends(get_db)):
+async def get_suppliers(db: AsyncSession = Depends(get_async_db)):
     """
     获取所有供应商信息
     
@@ -746,21 +1045,17 @@ async def get_suppliers(db: Session = Depends(get_db)):
         }
     """
     try:
-        # 从数据库查询所有供应商
-        suppliers = db.query(Supplier).order_by(Supplier.name).all()
+        # 从目录读模型获取所有供应商（版本未变化时不访问数据库）
+        await catalog.ensure_fresh(db)
         
-        # 转换为字典列表
-        result = []
-        for supplier in suppliers:
-            result.append({
-                "id": supplier.id,
-                "name": supplier.name,
-                "location": supplier.location,
-                "created_at": supplier.created_at.isoformat() if supplier.created_at else None,
-                "updated_at": supplier.updated_at.isoformat() if supplier.updated_at else None
-            })
+        # 转换为字典列表（按版本缓存）
+        def build():
+            serialize = compile_serializer(Supplier, ("id", "name", "location", "created_at", "updated_at"))
+            return [serialize(supplier) for supplier in sorted(catalog.suppliers.values(), key=lambda s: s.name)]
         
-        print(f"✅ 成功从数据库获取 {len(result)} 个供应商信息")
+        result = catalog.view("suppliers", build)
+        
+        print(f"✅ 成功获取 {len(result)} 个供应商信息")
         
         return {
             "success": True,
@@ -781,11 +1076,15 @@ async def get_suppliers(db: Session = Depends(get_db)):
 
 @router.get("/all")
 async def get_all_products(
-    db: Session = Depends(get_db)
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取所有产品信息
     
+    查询参数:
+        fields (str): 逗号分隔的返回字段，如 id,title,img,selling_price（可选，默认返回全部字段，id 总是返回）
+    
     Returns:
         dict: 包含成功状态、产品数量和产品列表
     
@@ -815,50 +1114,39 @@ async def get_all_products(
         }
     """
     try:
-        # 查询所有产品
-        products = db.query(Product).order_by(Product.created_at.desc()).all()
-        
-        # 转换为字典列表
-        result = []
-        for product in products:
-            # 获取类别名称
-            category = db.query(Category).filter(Category.id == product.category_id).first()
-            result.append({
-                "id": product.id,
-                "title": product.title,
-                "description": product.description,
-                "img": product.img,
-                "product_mlb_thumbnail": product.product_mlb_thumbnail,
-                "category_id": product.category_id,
-                "category_name": category.name if category else None,
-                "supplier_id": product.supplier_id,
-                "shipping_from": product.shipping_from,
-                "weight": product.weight,
-                "dimensions": product.dimensions,
-                "user_limit_quantity": product.user_limit_quantity,
-                "tags": product.tags,
-                "stock_quantity": product.stock_quantity,
-                "reserved_quantity": product.reserved_quantity,
-                "low_stock_threshold": product.low_stock_threshold,
-                "max_order_quantity": product.max_order_quantity,
-                "cost_price": product.cost_price,
-                "selling_price": product.selling_price,
-                "discount_price": product.discount_price,
-                "product_mlb_price": product.product_mlb_price,
-                "roi": product.roi,
-                "created_at": product.created_at.isoformat() if product.created_at else None,
-                "updated_at": product.updated_at.isoformat() if product.updated_at else None
-            })
+        # 从目录读模型获取所有产品（版本未变化时不访问数据库）
+        await catalog.ensure_fresh(db)
+        
+        # 解析需要返回的字段
+        try:
+            fields = parse_fields(fields, ALL_PRODUCT_FIELDS)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 转换为字典列表，类别名称从读模型中按ID查找（按版本和字段组合缓存）
+        def build():
+            serialize = compile_serializer(Product, fields)
+            categories = catalog.categories
+            result = []
+            for product in catalog.all_products():
+                category = categories.get(product.category_id)
+                result.append(serialize(product, category_name=category.name if category else None))
+            return result
+        
+        result = catalog.view(("all", fields), build)
         
         print(f"✅ 成功获取所有 {len(result)} 个产品")
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "code": 200,
             "count": len(result),
             "products": result
-        }
+        })
         
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
     except Exception as e:
         print(f"❌ 获取所有产品失败: {str(e)}")
         import traceback
@@ -869,26 +1157,234 @@ async def get_all_products(
         )
 
 
+@router.get("/export")
+async def export_products(
+    format: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """
+    流式导出所有产品
+    
+    按产品ID顺序逐批读取并输出，内存占用与产品数量无关，适合下游系统全量拉取目录
+    
+    查询参数:
+        format (str): ndjson（每行一个 JSON 对象）或 csv（可选，默认 ndjson）
+        fields (str): 逗号分隔的导出字段（可选，默认导出全部字段，id 总是导出）
+    
+    Returns:
+        StreamingResponse: 以附件形式下载的 products.ndjson 或 products.csv
+    
+    Example:
+        GET /api/product/export?format=csv&fields=title,selling_price,category_name
+        
+        Response（text/csv）:
+        id,title,category_name,selling_price
+        MLB123456,产品标题,汽车配件,99.99
+        ...
+    """
+    try:
+        export_format = resolve_format(format)
+        fields = parse_fields(fields, ALL_PRODUCT_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[export_format]
+    print(f"✅ 开始导出产品目录（{export_format}，{len(fields)} 个字段）")
+    
+    return StreamingResponse(
+        iter_export(export_format, fields),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{extension}"'}
+    )
+
+
+# 导入请求体超过该大小时写入临时文件，不在内存中保存整个文件
+_IMPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+
+@router.post("/import")
+async def import_products_endpoint(
+    request: Request,
+    format: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    批量导入产品
+    
+    请求体为 NDJSON（每行一个产品）或 CSV（第一行为表头），字段与 POST /api/product/create 相同，
+    另外可以指定 id；/api/product/export 导出的文件也可以直接导入。
+    逐批写入，出错的行记录行号后跳过，不影响其他行
+    
+    查询参数:
+        format (str): ndjson 或 csv（可选，默认根据 Content-Type 判断，否则为 ndjson）
+        chunk_size (int): 每批写入的行数（可选，默认 IMPORT_CHUNK_SIZE）
+    
+    Returns:
+        dict: 包含成功导入的产品ID和每个出错行的错误信息
+    
+    Example:
+        POST /api/product/import?format=csv
+        
+        Request Body（text/csv）:
+        name,description,price,category_id,supplier_id,stock,tags
+        数字电视天线,高清智能电视天线,13.63,MLB5672,SUP001,150,"[""新品上市""]"
+        无线耳机,蓝牙耳机,59.9,MLB9999,SUP001,20,
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "message": "导入完成：成功 1 个，失败 1 个",
+            "imported": 1,
+            "failed": 1,
+            "product_ids": ["MLB1A2B3C4D"],
+            "errors": [{"line": 3, "id": null, "error": "类别 MLB9999 不存在"}]
+        }
+    """
+    try:
+        try:
+            import_format = resolve_import_format(format, request.headers.get("content-type"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if chunk_size is not None and chunk_size < 1:
+            raise HTTPException(status_code=400, detail="chunk_size 必须大于 0")
+        
+        # 目录读模型中已有的类别和供应商不再查询数据库；读取后结束只读事务并归还连接（导入使用同步引擎）
+        await catalog.ensure_fresh(db)
+        await db.rollback()
+        known_ids = known_references(catalog)
+        
+        # 请求体先写入临时文件，再在线程池中逐批解析和写入（同步引擎，不阻塞事件循环）
+        with tempfile.SpooledTemporaryFile(max_size=_IMPORT_SPOOL_SIZE) as spool:
+            async for chunk in request.stream():
+                spool.write(chunk)
+            spool.seek(0)
+            stream = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+            try:
+                result = await run_in_threadpool(import_products, stream, import_format, chunk_size, known_ids)
+            finally:
+                stream.detach()
+        
+        imported, failed = len(result["product_ids"]), len(result["errors"])
+        return ORJSONResponse({
+            "success": True,
+            "code": 200,
+            "message": f"导入完成：成功 {imported} 个，失败 {failed} 个",
+            "imported": imported,
+            "failed": failed,
+            "product_ids": result["product_ids"],
+            "errors": result["errors"]
+        })
+        
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="导入文件必须是 UTF-8 编码")
+    except Exception as e:
+        print(f"❌ 批量导入产品失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量导入产品失败: {str(e)}"
+        )
+
+
+@router.get("/changes")
+async def get_catalog_changes(
+    since: Optional[str] = None,
+    limit: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    目录变更订阅（增量同步）
+    
+    返回 since 之后新增或修改的类别、供应商和产品，以及被删除记录的墓碑；
+    客户端保存返回的 next_since，下一次请求时原样传回，has_more 为 true 时应立即继续请求
+    
+    查询参数:
+        since (str): 上一次返回的 next_since，或 ISO 时间如 2024-01-15T10:30:00（可选，为空时返回全部数据）
+        limit (int): 每个实体每次最多返回的记录数（可选，默认并且最大为 CHANGE_FEED_LIMIT）
+    
+    Returns:
+        dict: 包含按实体分组的变更记录、墓碑列表和下一次同步的游标
+    
+    Example:
+        GET /api/product/changes?since=eyJjYXRlZ29yeSI6IFsi...
+        
+        Response:
+        {
+            "success": true,
+            "code": 200,
+            "changes": {
+                "categories": [],
+                "suppliers": [],
+                "products": [{"id": "MLB123456", "title": "产品标题", "updated_at": "2024-01-15T10:30:00", ...}]
+            },
+            "deleted": [{"entity": "product", "id": "MLB654321", "deleted_at": "2024-01-15T10:31:00"}],
+            "next_since": "eyJjYXRlZ29yeSI6IFsi...",
+            "has_more": false
+        }
+    """
+    try:
+        try:
+            feed = await read_changes(db, since=since, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        changes = feed["changes"]
+        print(
+            f"✅ 成功获取目录变更：{len(changes['categories'])} 个类别、{len(changes['suppliers'])} 个供应商、"
+            f"{len(changes['products'])} 个产品、{len(feed['deleted'])} 条删除记录"
+        )
+        
+        return ORJSONResponse({
+            "success": True,
+            "code": 200,
+            **feed
+        })
+        
+    except HTTPException as he:
+        # 重新抛出HTTP异常
+        raise he
+    except Exception as e:
+        print(f"❌ 获取目录变更失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail=f"获取目录变更失败: {str(e)}"
+        )
+
+
 @router.post("/sample")
 async def get_sample_products(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     获取"先试后用"页面的产品信息（不包含moq字段，只包含user_limit_quantity）
     
     请求体参数:
         category_id (str): 类别ID（必填）
+        cursor (str): 上一页返回的 next_cursor（可选，为空时返回第一页）
+        page_size (int): 每页数量（可选，最大 PRODUCT_PAGE_SIZE_MAX；与 cursor 都未传入时返回全部产品，只传入 cursor 时默认 PRODUCT_PAGE_SIZE）
+        sort (str): 排序字段 created_at / selling_price / discount_price / stock_quantity（可选，默认 created_at）
+        order (str): asc 或 desc（可选，created_at 默认倒序，其他字段默认正序）
+        fields (list|str): 返回字段列表或逗号分隔的字符串（可选，默认返回全部字段，id 总是返回）
     
     Returns:
-        dict: 包含成功状态、产品数量和产品列表（仅限购相关字段）
+        dict: 包含成功状态、本页产品数量、产品列表（仅限购相关字段）和下一页游标
     
     Example:
         POST /api/product/sample
         
         Request Body:
         {
-            "category_id": "MLB5672"
+            "category_id": "MLB5672",
+            "page_size": 20
         }
         
         Response:
@@ -912,7 +1408,9 @@ async def get_sample_products(
                     "created_at": "2024-01-15T10:30:00"
                 },
                 ...
-            ]
+            ],
+            "next_cursor": null,
+            "has_more": false
         }
     """
     try:
@@ -920,8 +1418,13 @@ async def get_sample_products(
         request_data = await request.json()
         print(f"接收到的先试后用请求数据: {request_data}")
         
-        # 获取类别ID
+        # 获取类别ID和分页参数
         category_id = request_data.get('category_id', '').strip()
+        cursor = request_data.get('cursor')
+        page_size = request_data.get('page_size')
+        sort = request_data.get('sort')
+        order = request_data.get('order')
+        fields = request_data.get('fields')
         
         # 验证类别ID不为空
         if not category_id:
@@ -932,58 +1435,46 @@ async def get_sample_products(
         
         print(f"接收到的先试后用类别ID: {category_id}")
         
-        # 验证类别是否存在
-        category = db.query(Category).filter(Category.id == category_id).first()
+        # 从目录读模型验证类别是否存在
+        await catalog.ensure_fresh(db)
+        category = catalog.categories.get(category_id)
         if not category:
             raise HTTPException(
                 status_code=404,
                 detail=f"类别 {category_id} 不存在"
             )
         
-        # 查询该类别下的所有产品（不使用分页）
-        products = db.query(Product).filter(
-            Product.category_id == category_id
-        ).order_by(Product.created_at.desc()).all()
+        # 按游标分页查询该类别下的产品（只加载请求的字段对应的列）
+        try:
+            fields = parse_fields(fields, SAMPLE_PRODUCT_FIELDS)
+            page = await query_category_products(
+                db,
+                category_id,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                page_size=page_size,
+                fields=fields
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # 转换为字典列表（只包含先试后用需要的字段）
-        result = []
-        for product in products:
-            result.append({
-                "id": product.id,
-                "title": product.title,
-                "description": product.description,
-                "img": product.img,
-                "product_mlb_thumbnail": product.product_mlb_thumbnail,
-                "category_id": product.category_id,
-                "supplier_id": product.supplier_id,
-                "shipping_from": product.shipping_from,
-                "weight": product.weight,
-                "dimensions": product.dimensions,
-                "user_limit_quantity": product.user_limit_quantity,  # 只包含限购数量
-                "tags": product.tags,
-                "stock_quantity": product.stock_quantity,
-                "reserved_quantity": product.reserved_quantity,
-                "low_stock_threshold": product.low_stock_threshold,
-                "max_order_quantity": product.max_order_quantity,
-                "cost_price": product.cost_price,
-                "selling_price": product.selling_price,
-                "discount_price": product.discount_price,
-                "product_mlb_price": product.product_mlb_price,
-                "roi": product.roi,
-                "created_at": product.created_at.isoformat() if product.created_at else None,
-                "updated_at": product.updated_at.isoformat() if product.updated_at else None
-            })
+        # 转换为字典列表（只包含请求的字段）
+        serialize = compile_serializer(Product, fields)
+        result = [serialize(product) for product in page["products"]]
         
         print(f"✅ 成功获取先试后用类别 {category_id} 下的 {len(result)} 个产品")
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "code": 200,
             "count": len(result),
             "category_id": category_id,
             "category_name": category.name,
-            "products": result
-        }
+            "products": result,
+            "next_cursor": page["next_cursor"],
+            "has_more": page["has_more"]
+        })
         
     except HTTPException as he:
         # 重新抛出HTTP异常
@@ -0,0 +1,2 @@
+# 性能基准测试包
+# 每个 bench_*.py 都可以在 backend 目录下通过 python -m benchmarks.<模块名> 运行
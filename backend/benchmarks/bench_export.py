@@ -0,0 +1,122 @@
+"""
+产品目录导出内存基准测试
+对比 /api/product/all（整个目录在内存中生成列表）和 /api/product/export（流式导出）的峰值 RSS；
+每个场景在独立的子进程中执行，响应内容直接丢弃，只统计字节数
+
+用法（在 backend 目录下执行）:
+    python -m benchmarks.bench_export [--products 10000 100000]
+"""
+import argparse
+import asyncio
+import json
+import resource
+import subprocess
+import sys
+import time
+from benchmarks.common import configure_database, seed_catalog
+
+SCENARIOS = {
+    "/api/product/all": "/api/product/all",
+    "导出 NDJSON": "/api/product/export?format=ndjson",
+    "导出 CSV": "/api/product/export?format=csv",
+}
+
+
+def peak_rss_mb():
+    """当前进程的峰值 RSS（MB，Linux 下 ru_maxrss 单位为 KB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def request(app, url):
+    """直接调用 ASGI 应用，丢弃响应内容，返回 (状态码, 响应字节数)"""
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    sent = False
+    status, size = None, 0
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # 客户端不断开，等待响应结束时被取消
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, size
+
+
+def run_scenario(url, database_url):
+    """子进程：请求一次并输出 JSON 结果"""
+    configure_database(database_url)
+    from main import app
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    status, size = asyncio.run(request(app, url))
+    elapsed = (time.perf_counter() - start) * 1000
+    assert status == 200, status
+    print(json.dumps({"baseline": baseline, "peak": peak_rss_mb(), "bytes": size, "ms": elapsed}))
+
+
+def child(args):
+    """在子进程中执行本脚本，返回标准输出"""
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_export"] + args,
+        capture_output=True, text=True, check=True
+    ).stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="产品目录导出峰值内存基准测试")
+    parser.add_argument("--products", type=int, nargs="+", default=[10000, 100000], help="产品数量（可传多个）")
+    parser.add_argument("--seed", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        configure_database(args.database_url)
+        seed_catalog(args.seed)
+        return
+    if args.scenario:
+        run_scenario(args.scenario, args.database_url)
+        return
+
+    print(f"\n产品目录导出峰值 RSS")
+    print(f"{'产品数':>8}  {'场景':<20}{'响应(MB)':>10}{'耗时(ms)':>10}{'启动后(MB)':>12}{'峰值(MB)':>10}{'增量(MB)':>10}")
+    for count in args.products:
+        # 数据库引擎在导入时创建，每种数据量的写入和每个场景都在独立的子进程中执行
+        database_url = configure_database()
+        child(["--seed", str(count), "--database-url", database_url])
+        for name, url in SCENARIOS.items():
+            output = child(["--scenario", url, "--database-url", database_url])
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{count:>8}  {name:<20}{result['bytes'] / 1024 / 1024:>10.1f}{result['ms']:>10.0f}"
+                f"{result['baseline']:>12.1f}{result['peak']:>10.1f}{result['peak'] - result['baseline']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+fields= 字段选择基准测试
+对比类别产品列表、所有产品列表在返回全部字段和只返回卡片字段时的响应字节数和延迟
+
+用法（在 backend 目录下执行）:
+    python -m benchmarks.bench_product_fields [--products 10000] [--page-size 200] [--repeat 5] [--database-url URL]
+"""
+import argparse
+from benchmarks.common import configure_database, seed_catalog, measure
+
+# 商品卡片网格实际使用的字段
+CARD_FIELDS = "title,img,selling_price,discount_price,moq"
+ALL_CARD_FIELDS = "title,img,selling_price,discount_price,category_name"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fields= 字段选择的响应大小和延迟基准测试")
+    parser.add_argument("--products", type=int, default=10000, help="产品数量")
+    parser.add_argument("--page-size", type=int, default=200, help="类别产品列表每页数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景的重复次数")
+    parser.add_argument("--database-url", default=None, help="数据库地址（默认使用临时 SQLite）")
+    args = parser.parse_args()
+
+    configure_database(args.database_url)
+    seed_catalog(args.products)
+
+    from fastapi.testclient import TestClient
+    from main import app
+
+    client = TestClient(app)
+
+    scenarios = [
+        ("类别产品列表：全部字段", "/api/product/categories/CAT0000", {"page_size": args.page_size}),
+        ("类别产品列表：卡片字段", "/api/product/categories/CAT0000", {"page_size": args.page_size, "fields": CARD_FIELDS}),
+        ("所有产品列表：全部字段", "/api/product/all", {}),
+        ("所有产品列表：卡片字段", "/api/product/all", {"fields": ALL_CARD_FIELDS}),
+    ]
+
+    print(f"\nfields= 字段选择（{args.products} 个产品，类别列表每页 {args.page_size} 个）")
+    print(f"{'场景':<30}{'产品数':>8}{'响应字节':>12}{'每个产品字节':>14}{'中位数(ms)':>12}{'最小(ms)':>12}")
+    for name, path, params in scenarios:
+        response = client.get(path, params=params)
+        assert response.status_code == 200, response.text
+        count = len(response.json()["products"])
+        size = len(response.content)
+
+        def request():
+            assert client.get(path, params=params).status_code == 200
+
+        median, best = measure(request, args.repeat)
+        print(f"{name:<30}{count:>8}{size:>12}{size / max(count, 1):>14.0f}{median:>12.1f}{best:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
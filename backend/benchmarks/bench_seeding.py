@@ -0,0 +1,104 @@
+"""
+测试数据初始化基准测试
+将 fixtures/mock-data.json 中的产品复制扩充为大规模 fixture，对比：
+- 逐表重新读取文件、count() 后逐行 db.add（订单逐个 flush）的原有方式
+- 一次解析、批量插入的 seed_fixture_data（首次初始化）
+- fixture 未变化时再次初始化（校验和跳过）
+每个场景在独立的子进程中使用新的数据库执行（数据库引擎在导入时创建）
+
+用法（在 backend 目录下执行）:
+    python -m benchmarks.bench_seeding [--products 50000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import configure_database
+
+
+def build_fixture(products):
+    """复制扩充产品（ID 加序号），其余数据保持不变，返回 fixture 文件路径"""
+    with open('fixtures/mock-data.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    templates = data['products']
+    data['products'] = templates + [
+        dict(templates[i % len(templates)], id=f"BENCH{i:08d}") for i in range(max(products - len(templates), 0))
+    ]
+    path = os.path.join(tempfile.mkdtemp(prefix="brail-bench-"), "mock-data.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    return path
+
+
+def legacy_seed(path):
+    """原有的初始化方式：每张表重新读取文件，count() 后逐行 db.add"""
+    from utils.database import SessionLocal
+    from utils.seeding import seed_plan
+
+    for key, _, model, convert, children in seed_plan():
+        with open(path, 'r', encoding='utf-8') as f:
+            records = json.load(f).get(key, [])
+        db = SessionLocal()
+        try:
+            if db.query(model).count() > 0:
+                continue
+            for record in records:
+                db.add(model(**convert(record)))
+                if children:
+                    db.flush()
+                    child_model, child_rows = children
+                    for row in child_rows(record):
+                        db.add(child_model(**row))
+            db.commit()
+        finally:
+            db.close()
+
+
+def run_scenario(scenario, database_url, path):
+    """子进程：创建表并执行初始化，输出耗时（毫秒）"""
+    configure_database(database_url)
+    from utils.database import Base, engine
+    from utils.seeding import seed_fixture_data
+    import models  # noqa: F401  注册所有模型
+
+    Base.metadata.create_all(bind=engine)
+    if scenario == "warm":
+        seed_fixture_data(path)
+
+    start = time.perf_counter()
+    if scenario == "legacy":
+        legacy_seed(path)
+    else:
+        seed_fixture_data(path)
+    print(json.dumps({"ms": (time.perf_counter() - start) * 1000}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测试数据初始化基准测试")
+    parser.add_argument("--products", type=int, default=50000, help="fixture 中的产品数量")
+    parser.add_argument("--scenario", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--fixture", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        run_scenario(args.scenario, args.database_url, args.fixture)
+        return
+
+    path = build_fixture(args.products)
+    print(f"\n测试数据初始化（{args.products} 个产品）")
+    for scenario, name in (("legacy", "逐行 db.add"), ("cold", "批量插入（首次）"), ("warm", "校验和未变化")):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_seeding", "--scenario", scenario,
+             "--database-url", configure_database(), "--fixture", path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"  {name:<16}{result['ms']:>10.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
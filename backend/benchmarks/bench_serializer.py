@@ -0,0 +1,115 @@
+"""
+序列化层微基准测试
+对比修改前的路径（手写字典 + jsonable_encoder + JSONResponse）和修改后的路径
+（预编译的转换函数 + ORJSONResponse）编码产品列表的吞吐量，不访问数据库
+
+用法（在 backend 目录下执行）:
+    python -m benchmarks.bench_serializer [--products 10000] [--repeat 5]
+"""
+import argparse
+from datetime import datetime
+from benchmarks.common import configure_database, measure
+
+
+def legacy_dict(product):
+    """修改前各接口手写的产品字典"""
+    return {
+        "id": product.id,
+        "title": product.title,
+        "description": product.description,
+        "img": product.img,
+        "product_mlb_thumbnail": product.product_mlb_thumbnail,
+        "category_id": product.category_id,
+        "supplier_id": product.supplier_id,
+        "shipping_from": product.shipping_from,
+        "weight": product.weight,
+        "dimensions": product.dimensions,
+        "moq": product.moq,
+        "tags": product.tags,
+        "stock_quantity": product.stock_quantity,
+        "reserved_quantity": product.reserved_quantity,
+        "low_stock_threshold": product.low_stock_threshold,
+        "max_order_quantity": product.max_order_quantity,
+        "cost_price": product.cost_price,
+        "selling_price": product.selling_price,
+        "discount_price": product.discount_price,
+        "product_mlb_price": product.product_mlb_price,
+        "roi": product.roi,
+        "variations": product.variations,
+        "created_at": product.created_at.isoformat() if product.created_at else None,
+        "updated_at": product.updated_at.isoformat() if product.updated_at else None
+    }
+
+
+def make_products(count):
+    """在内存中生成产品对象（与 seed_catalog 的数据相同）"""
+    from models.product import Product
+    now = datetime(2024, 1, 15, 10, 30, 0, 123456)
+    return [
+        Product(
+            id=f"BENCH{i:08d}",
+            title=f"Produto de Teste {i} Suporte Veicular",
+            description=f"Descrição do produto de teste {i} - 高质量产品",
+            img=f"http://example.com/{i}.webp",
+            product_mlb_thumbnail=[f"http://example.com/{i}.webp"],
+            category_id=f"CAT{i % 32:04d}",
+            supplier_id=f"SUP{i % 10:04d}",
+            shipping_from="广东省广州市",
+            weight=1.5,
+            dimensions={"length": 30, "width": 20, "height": 10},
+            moq=1 + i % 10,
+            tags=["premium", f"tag{i % 50}"],
+            stock_quantity=i % 500,
+            reserved_quantity=0,
+            low_stock_threshold=10,
+            cost_price=5.0,
+            selling_price=10 + i % 1000 / 10,
+            product_mlb_price="R$ 10,00",
+            roi="112%",
+            variations=[{"id": "var-001", "name": "版本", "price": 10.0}],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="产品序列化吞吐量微基准测试")
+    parser.add_argument("--products", type=int, default=10000, help="产品数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个场景的重复次数")
+    args = parser.parse_args()
+
+    configure_database()
+
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse
+    from models.product import Product
+    from utils.product_query import DETAIL_PRODUCT_FIELDS
+    from utils.serializer import compile_serializer, ORJSONResponse
+
+    products = make_products(args.products)
+    serialize = compile_serializer(Product, DETAIL_PRODUCT_FIELDS)
+    assert [serialize(p) for p in products[:10]] == [legacy_dict(p) for p in products[:10]]
+
+    legacy_rows = [legacy_dict(p) for p in products]
+    compiled_rows = [serialize(p) for p in products]
+
+    scenarios = [
+        ("转换为字典：手写", lambda: [legacy_dict(p) for p in products]),
+        ("转换为字典：预编译", lambda: [serialize(p) for p in products]),
+        ("编码：jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder({"products": legacy_rows}))),
+        ("编码：ORJSONResponse", lambda: ORJSONResponse({"products": compiled_rows})),
+        ("整体：修改前", lambda: JSONResponse(jsonable_encoder({"products": [legacy_dict(p) for p in products]}))),
+        ("整体：修改后", lambda: ORJSONResponse({"products": [serialize(p) for p in products]})),
+    ]
+
+    print(f"\n产品序列化吞吐量（{args.products} 个产品）")
+    print(f"{'场景':<42}{'中位数(ms)':>12}{'最小(ms)':>12}{'产品/秒':>14}")
+    for name, fn in scenarios:
+        median, best = measure(fn, args.repeat)
+        print(f"{name:<42}{median:>12.1f}{best:>12.1f}{args.products / (median / 1000):>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+基准测试公共工具
+在导入业务模块前配置数据库地址，并批量生成测试数据、统计耗时
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def configure_database(database_url=None):
+    """
+    配置基准测试使用的数据库（默认使用临时 SQLite 文件）
+    必须在导入 utils、models、main 之前调用
+    """
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="brail-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+    if database_url.startswith("sqlite"):
+        os.environ["ASYNC_DATABASE_URL"] = database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+
+def seed_catalog(products, categories=32, suppliers=10):
+    """创建所有表并批量写入类别、供应商和产品"""
+    from sqlalchemy import insert
+    from utils.database import engine, Base
+    from models import Category, Supplier, Product
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [
+            {"id": f"CAT{i:04d}", "name": f"类别 {i}"} for i in range(categories)
+        ])
+        conn.execute(insert(Supplier), [
+            {"id": f"SUP{i:04d}", "name": f"供应商 {i}", "location": "广东省广州市"} for i in range(suppliers)
+        ])
+        rows = [
+            {
+                "id": f"BENCH{i:08d}",
+                "title": f"Produto de Teste {i} Suporte Veicular",
+                "description": f"Descrição do produto de teste {i} - 高质量产品",
+                "img": f"http://example.com/{i}.webp",
+                "product_mlb_thumbnail": [f"http://example.com/{i}.webp"],
+                "category_id": f"CAT{i % categories:04d}",
+                "supplier_id": f"SUP{i % suppliers:04d}",
+                "shipping_from": "广东省广州市",
+                "weight": 1.5,
+                "dimensions": {"length": 30, "width": 20, "height": 10},
+                "moq": 1 + i % 10,
+                "tags": ["premium", f"tag{i % 50}"],
+                "stock_quantity": i % 500,
+                "selling_price": 10 + i % 1000 / 10,
+                "product_mlb_price": "R$ 10,00",
+                "variations": [{"id": "var-001", "name": "版本", "price": 10.0}],
+            }
+            for i in range(products)
+        ]
+        for start in range(0, len(rows), 1000):
+            conn.execute(insert(Product), rows[start:start + 1000])
+
+
+def measure(fn, repeat=5):
+    """重复执行 fn，返回 (中位数毫秒, 最小毫秒)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), min(timings)
+
+
+def report(title, rows):
+    """打印结果表：rows 为 [(名称, 中位数毫秒, 最小毫秒), ...]"""
+    print(f"\n{title}")
+    print(f"{'场景':<40}{'中位数(ms)':>12}{'最小(ms)':>12}")
+    for name, median, best in rows:
+        print(f"{name:<40}{median:>12.1f}{best:>12.1f}")
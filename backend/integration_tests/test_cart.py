@@ -0,0 +1,461 @@
+"""
+购物车接口集成测试
+验证 upsert 语句在并发加入同一商品时不丢失数量，以及购物车/商品不存在、数量小于 MOQ 时的错误响应；
+批量修改按顺序执行、整体提交或整体不写入，查询次数与操作数无关；
+购物车依赖的唯一索引在迁移时合并重复数据、缺失时拒绝写入，迁移后无需重启即恢复写入；
+获取购物车ID命中缓存时不执行 SQL，并发的首次访问只创建一个购物车
+"""
+import sys
+import os
+import asyncio
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fakeredis
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, func, insert, inspect, select
+from models.cart import Cart
+from models.cart_item import CartItem
+from models.product import Product
+from models.user import User
+from utils.cart_cache import user_cart_cache
+from utils.config import settings
+from utils import migrations
+from utils.database import Base, SessionLocal, async_engine, engine
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    """测试客户端"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def cart_id(client):
+    """用户 3 的购物车（测试结束后清空）"""
+    cart_id = client.post("/api/cart/getCartId", json={"user_id": 3}).json()["cartId"]
+    yield cart_id
+    db = SessionLocal()
+    db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture(scope="module")
+def products():
+    """按 ID 排序的前 20 个产品（ID 和最小订购量）"""
+    db = SessionLocal()
+    rows = db.execute(select(Product.id, Product.moq).order_by(Product.id).limit(20)).all()
+    db.close()
+    return rows
+
+
+@pytest.fixture(scope="module")
+def product(products):
+    """任意一个产品（ID 和最小订购量）"""
+    return products[0]
+
+
+def post_concurrently(url, bodies):
+    """在同一个事件循环中并发发送 POST 请求，返回全部响应"""
+    async def send():
+        # 连接池在等待连接时会绑定到当前事件循环，前后各重建一次，避免与其他测试的事件循环混用
+        if async_engine is not None:
+            await async_engine.dispose()
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*[client.post(url, json=body) for body in bodies])
+        finally:
+            if async_engine is not None:
+                await async_engine.dispose()
+
+    return asyncio.run(send())
+
+
+def cart_rows(cart_id, product_id):
+    """购物车中该商品的所有行"""
+    db = SessionLocal()
+    rows = db.execute(
+        select(CartItem.id, CartItem.quantity).where(CartItem.cart_id == cart_id, CartItem.product_id == product_id)
+    ).all()
+    db.close()
+    return rows
+
+
+class TestAddToCart:
+    """加入购物车接口测试类"""
+
+    def test_add_then_increment(self, client, cart_id, product):
+        """第一次加入新建商品行，再次加入时在同一行上累加数量"""
+        body = {"cart_id": cart_id, "product_id": product.id, "quantity": product.moq}
+        first = client.post("/api/cart/add_item", json=body)
+        assert first.status_code == 200, first.text
+        assert first.json()["message"] == "商品已加入购物车"
+        assert first.json()["item"]["quantity"] == product.moq
+
+        second = client.post("/api/cart/add_item", json=body)
+        assert second.status_code == 200, second.text
+        assert second.json()["message"] == "商品数量已更新"
+        assert second.json()["item"] == {"id": first.json()["item"]["id"], "product_id": product.id, "quantity": product.moq * 2}
+
+    def test_concurrent_adds_do_not_lose_increments(self, cart_id, product):
+        """并发加入同一商品，最终数量等于每次加入数量之和，且只有一行"""
+        requests = 20
+
+        body = {"cart_id": cart_id, "product_id": product.id, "quantity": product.moq}
+        responses = post_concurrently("/api/cart/add_item", [body] * requests)
+        assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+        assert sum(response.json()["message"] == "商品已加入购物车" for response in responses) == 1
+
+        rows = cart_rows(cart_id, product.id)
+        assert len(rows) == 1
+        assert rows[0].quantity == product.moq * requests
+
+    def test_errors(self, client, cart_id, product):
+        """购物车或商品不存在返回 404，数量小于 MOQ 返回 400，均不写入"""
+        response = client.post("/api/cart/add_item", json={"cart_id": 999999, "product_id": product.id, "quantity": product.moq})
+        assert response.status_code == 404
+        assert "购物车" in response.json()["detail"]
+
+        response = client.post("/api/cart/add_item", json={"cart_id": cart_id, "product_id": "NOT-EXIST", "quantity": 1})
+        assert response.status_code == 404
+        assert "商品" in response.json()["detail"]
+
+        db = SessionLocal()
+        product_id, moq = db.execute(select(Product.id, Product.moq).where(Product.moq > 1).limit(1)).one()
+        db.close()
+        response = client.post("/api/cart/add_item", json={"cart_id": cart_id, "product_id": product_id, "quantity": moq - 1})
+        assert response.status_code == 400
+        assert str(moq) in response.json()["detail"]
+
+        response = client.post("/api/cart/add_item", json={"cart_id": cart_id, "product_id": product.id, "quantity": 0})
+        assert response.status_code == 400
+
+        assert cart_rows(cart_id, product_id) == []
+        assert cart_rows(cart_id, product.id) == []
+
+
+class TestCartBatch:
+    """批量修改购物车接口测试类"""
+
+    def add(self, client, cart_id, product):
+        """通过单个接口加入商品，返回购物车商品项ID"""
+        response = client.post("/api/cart/add_item", json={
+            "cart_id": cart_id, "product_id": product.id, "quantity": product.moq
+        })
+        assert response.status_code == 200, response.text
+        return response.json()["item"]["id"]
+
+    def test_operations_apply_in_order(self, client, cart_id, products):
+        """加入、修改、删除按顺序执行，同一商品的多次加入合并，删除后可重新加入"""
+        a, b, c, d = products[:4]
+        item_a = self.add(client, cart_id, a)
+        item_b = self.add(client, cart_id, b)
+        item_d = self.add(client, cart_id, d)
+
+        response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+            {"op": "update", "item_id": item_a, "quantity": a.moq * 3},
+            {"op": "add", "product_id": a.id, "quantity": a.moq},
+            {"op": "remove", "item_id": item_b},
+            {"op": "add", "product_id": c.id, "quantity": c.moq},
+            {"op": "add", "product_id": c.id, "quantity": c.moq},
+            {"op": "remove", "item_id": item_d},
+            {"op": "add", "product_id": d.id, "quantity": d.moq * 2},
+        ]})
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["applied"] == 7
+
+        quantities = {item["product_id"]: item["quantity"] for item in data["items"]}
+        assert quantities == {a.id: a.moq * 4, c.id: c.moq * 2, d.id: d.moq * 2}
+        assert data["summary"]["totalAmount"] == round(sum(item["totalPrice"] for item in data["items"]), 2)
+        assert client.get(f"/api/cart/get_cart_data/{cart_id}").json()["items"] == data["items"]
+
+    def test_invalid_operation_writes_nothing(self, client, cart_id, products):
+        """任一操作不合法时返回出错操作的序号，之前的操作也不写入"""
+        a, b = products[:2]
+        item_a = self.add(client, cart_id, a)
+
+        cases = [
+            ({"op": "add", "product_id": "NOT-EXIST", "quantity": 1}, 404),
+            ({"op": "update", "item_id": 999999, "quantity": 1}, 404),
+            ({"op": "add", "product_id": b.id, "quantity": 0}, 400),
+            ({"op": "clear"}, 400),
+        ]
+        for operation, status_code in cases:
+            response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+                {"op": "update", "item_id": item_a, "quantity": a.moq * 5},
+                {"op": "add", "product_id": b.id, "quantity": b.moq},
+                operation,
+            ]})
+            assert response.status_code == status_code, response.text
+            assert response.json()["detail"].startswith("第 3 个操作")
+
+        # 已删除的商品项不能再修改
+        response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+            {"op": "remove", "item_id": item_a},
+            {"op": "update", "item_id": item_a, "quantity": a.moq},
+        ]})
+        assert response.status_code == 404
+
+        assert cart_rows(cart_id, a.id)[0].quantity == a.moq
+        assert cart_rows(cart_id, b.id) == []
+
+        response = client.post("/api/cart/batch", json={"cart_id": 999999, "operations": [{"op": "remove", "item_id": item_a}]})
+        assert response.status_code == 404
+        response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": []})
+        assert response.status_code == 400
+
+    def test_query_count_is_constant(self, client, cart_id, products):
+        """2 个操作和 20 个操作执行的 SQL 数量相同"""
+        def batch(operations):
+            response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": operations})
+            assert response.status_code == 200, response.text
+            return int(response.headers["X-Query-Count"]), response.json()
+
+        settings.QUERY_COUNTER_ENABLED = True
+        try:
+            small, _ = batch([{"op": "add", "product_id": p.id, "quantity": p.moq} for p in products[:2]])
+            items = client.get(f"/api/cart/get_cart_data/{cart_id}").json()["items"]
+            operations = [{"op": "add", "product_id": p.id, "quantity": p.moq} for p in products[2:]]
+            operations += [{"op": "update", "item_id": item["id"], "quantity": item["moq"] * 2} for item in items[:1]]
+            operations += [{"op": "remove", "item_id": item["id"]} for item in items[1:]]
+            large, data = batch(operations)
+        finally:
+            settings.QUERY_COUNTER_ENABLED = False
+
+        assert len(data["items"]) == len(products) - 1
+        assert large <= small + 2, f"批量修改的 SQL 数量从 {small} 增长到 {large}"
+
+
+@pytest.fixture
+def legacy_engine():
+    """独立的 SQLite 数据库（按模型建表，测试中删除唯一索引以模拟创建索引之前的旧表）"""
+    legacy = create_engine("sqlite://")
+    Base.metadata.create_all(bind=legacy)
+    yield legacy
+    legacy.dispose()
+
+
+class TestUniqueIndexMigration:
+    """购物车唯一索引迁移和启动检查测试类"""
+
+    def test_duplicate_items_are_merged_before_creating_index(self, legacy_engine):
+        """重复的商品行合并为 ID 最小的一行（数量相加），然后创建唯一索引"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP INDEX {migrations.CART_ITEM_INDEX}")
+            conn.execute(insert(CartItem), [
+                {"id": 1, "cart_id": 1, "product_id": "P1", "quantity": 2, "price": 1},
+                {"id": 2, "cart_id": 1, "product_id": "P2", "quantity": 1, "price": 1},
+                {"id": 3, "cart_id": 1, "product_id": "P1", "quantity": 3, "price": 1},
+                {"id": 4, "cart_id": 2, "product_id": "P1", "quantity": 5, "price": 1},
+                {"id": 5, "cart_id": 1, "product_id": "P1", "quantity": 4, "price": 1},
+            ])
+            assert migrations._cart_item_index_pending(conn)
+            migrations._migrate_cart_item_index(conn)
+
+        with legacy_engine.connect() as conn:
+            assert not migrations._cart_item_index_pending(conn)
+            rows = conn.execute(select(CartItem.id, CartItem.quantity).order_by(CartItem.id)).all()
+        assert [tuple(row) for row in rows] == [(1, 9), (2, 1), (4, 5)]
+
+    def test_duplicate_carts_are_merged_before_creating_index(self, legacy_engine):
+        """同一用户的多个购物车合并到 ID 最小的购物车，商品行移入并按商品合并数量"""
+        with legacy_engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP INDEX {migrations.CART_USER_INDEX}")
+            conn.exec_driver_sql(f"CREATE INDEX {migrations.LEGACY_CART_USER_INDEX} ON carts (user_id)")
+            conn.execute(insert(Cart), [
+                {"id": 1, "user_id": 1}, {"id": 2, "user_id": 1}, {"id": 3, "user_id": 1}, {"id": 4, "user_id": 2},
+            ])
+            conn.execute(insert(CartItem), [
+                {"id": 1, "cart_id": 2, "product_id": "P1", "quantity": 2, "price": 1},
+                {"id": 2, "cart_id": 1, "product_id": "P1", "quantity": 1, "price": 1},
+                {"id": 3, "cart_id": 2, "product_id": "P2", "quantity": 1, "price": 1},
+                {"id": 4, "cart_id": 3, "product_id": "P2", "quantity": 3, "price": 1},
+                {"id": 5, "cart_id": 3, "product_id": "P3", "quantity": 1, "price": 1},
+                {"id": 6, "cart_id": 4, "product_id": "P1", "quantity": 7, "price": 1},
+            ])
+            assert migrations._cart_user_index_pending(conn)
+            migrations._migrate_cart_user_index(conn)
+
+        with legacy_engine.connect() as conn:
+            assert not migrations._cart_user_index_pending(conn)
+            assert not migrations._index_exists(conn, "carts", migrations.LEGACY_CART_USER_INDEX)
+            carts = conn.execute(select(Cart.id, Cart.user_id).order_by(Cart.id)).all()
+            items = conn.execute(
+                select(CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.quantity).order_by(CartItem.id)
+            ).all()
+        assert [tuple(row) for row in carts] == [(1, 1), (4, 2)]
+        assert [tuple(row) for row in items] == [(2, 1, "P1", 3), (3, 1, "P2", 4), (5, 1, "P3", 1), (6, 4, "P1", 7)]
+
+    def test_add_is_refused_without_index(self, client, cart_id, product, monkeypatch):
+        """唯一索引缺失时加入购物车和批量修改返回 503，不写入数据"""
+        original = migrations._missing_indexes
+        hide_index(monkeypatch, migrations.CART_ITEM_INDEX)
+        try:
+            response = client.post("/api/cart/add_item", json={
+                "cart_id": cart_id, "product_id": product.id, "quantity": product.moq
+            })
+            assert response.status_code == 503
+            assert migrations.CART_ITEM_INDEX in response.json()["detail"]
+
+            response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+                {"op": "add", "product_id": product.id, "quantity": product.moq}
+            ]})
+            assert response.status_code == 503
+        finally:
+            migrations._missing_indexes = original
+
+        assert cart_rows(cart_id, product.id) == []
+
+    def test_cart_id_is_refused_without_index(self, client, new_user, monkeypatch):
+        """carts.user_id 唯一索引缺失时获取购物车ID返回 503，不创建购物车"""
+        original = migrations._missing_indexes
+        hide_index(monkeypatch, migrations.CART_USER_INDEX)
+        settings.CART_ID_CACHE_ENABLED = False
+        try:
+            response = client.post("/api/cart/getCartId", json={"user_id": new_user})
+        finally:
+            settings.CART_ID_CACHE_ENABLED = True
+            migrations._missing_indexes = original
+
+        assert response.status_code == 503
+        assert migrations.CART_USER_INDEX in response.json()["detail"]
+        db = SessionLocal()
+        assert db.scalar(select(Cart.id).where(Cart.user_id == new_user)) is None
+        db.close()
+
+    def test_add_resumes_after_migration(self, client, cart_id, product):
+        """检查结果为缺失的索引在下一次写操作时重新检查，迁移完成后无需重启即可加入购物车"""
+        original = migrations._missing_indexes
+        migrations._missing_indexes = {migrations.CART_ITEM_INDEX}
+        try:
+            response = client.post("/api/cart/add_item", json={
+                "cart_id": cart_id, "product_id": product.id, "quantity": product.moq
+            })
+            assert response.status_code == 200, response.text
+            assert migrations._missing_indexes == set()
+        finally:
+            migrations._missing_indexes = original
+
+    def test_cart_id_resumes_after_migration(self, client, new_user):
+        """carts.user_id 唯一索引的缺失结果同样在下一次使用时重新检查，迁移完成后无需重启"""
+        original = migrations._missing_indexes
+        migrations._missing_indexes = {migrations.CART_USER_INDEX}
+        settings.CART_ID_CACHE_ENABLED = False
+        try:
+            response = client.post("/api/cart/getCartId", json={"user_id": new_user})
+        finally:
+            settings.CART_ID_CACHE_ENABLED = True
+            migrations._missing_indexes = original
+
+        assert response.status_code == 200, response.text
+        db = SessionLocal()
+        assert db.scalar(select(Cart.id).where(Cart.user_id == new_user)) == response.json()["cartId"]
+        db.close()
+
+    def test_startup_runs_migrations(self, monkeypatch):
+        """已有的数据库在应用启动时先执行未完成的迁移，再检查必需的唯一索引"""
+        import main
+
+        calls = []
+        monkeypatch.setattr(main, "verify_connection", lambda: True)
+        monkeypatch.setattr(main, "check_database_exists", lambda name: True)
+        monkeypatch.setattr(main, "run_migrations", lambda: calls.append("migrate"))
+        monkeypatch.setattr(main, "check_required_indexes", lambda: calls.append("check") or [])
+        monkeypatch.setattr(main.invalidation, "start_listener", lambda: None)
+        monkeypatch.setattr(main.invalidation, "stop_listener", lambda: None)
+
+        async def start_and_stop():
+            async with main.lifespan(app):
+                pass
+
+        asyncio.run(start_and_stop())
+        assert calls == ["migrate", "check"]
+
+    def test_startup_check_finds_indexes(self):
+        """测试数据库中已创建必需的唯一索引"""
+        assert migrations.check_required_indexes() == []
+
+
+def hide_index(monkeypatch, index_name):
+    """模拟数据库中缺少某个唯一索引（检查结果为缺失，重新检查时仍然缺失）"""
+    index_exists = migrations._index_exists
+    monkeypatch.setattr(
+        migrations, "_index_exists",
+        lambda conn, table_name, name: name != index_name and index_exists(conn, table_name, name)
+    )
+    migrations._missing_indexes = {index_name}
+
+
+@pytest.fixture
+def new_user():
+    """一个还没有购物车的新用户（测试结束后删除用户和购物车）"""
+    db = SessionLocal()
+    user = User(name="购物车ID测试", email="cart-id-test@example.com", password="x")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    yield user_id
+    db = SessionLocal()
+    db.execute(delete(Cart).where(Cart.user_id == user_id))
+    db.execute(delete(User).where(User.id == user_id))
+    db.commit()
+    db.close()
+
+
+class TestCartId:
+    """获取购物车ID接口测试类"""
+
+    def test_user_id_is_unique(self):
+        """carts.user_id 上有唯一索引"""
+        indexes = inspect(engine).get_indexes("carts")
+        assert any(index["column_names"] == ["user_id"] and index["unique"] for index in indexes)
+
+    def test_cached_cart_id_costs_no_query(self, client, new_user):
+        """第一次获取时创建购物车并写入缓存，之后命中缓存不执行 SQL"""
+        # 使用 fakeredis，并清除之前连接真实 Redis 失败后的暂停状态
+        original = user_cart_cache.client, user_cart_cache._redis_down_until
+        user_cart_cache.client, user_cart_cache._redis_down_until = fakeredis.FakeRedis(decode_responses=True), 0.0
+        settings.QUERY_COUNTER_ENABLED = True
+        try:
+            first = client.post("/api/cart/getCartId", json={"user_id": new_user})
+            second = client.post("/api/cart/getCartId", json={"user_id": new_user})
+        finally:
+            settings.QUERY_COUNTER_ENABLED = False
+            user_cart_cache.client, user_cart_cache._redis_down_until = original
+
+        assert first.status_code == 200 and second.status_code == 200
+        assert first.json()["cartId"] == second.json()["cartId"]
+        assert int(first.headers["X-Query-Count"]) == 1
+        assert int(second.headers["X-Query-Count"]) == 0
+
+        db = SessionLocal()
+        assert db.scalar(select(Cart.id).where(Cart.user_id == new_user)) == first.json()["cartId"]
+        db.close()
+
+    def test_concurrent_first_visits_create_one_cart(self, new_user):
+        """同一用户并发的首次访问返回同一个购物车，数据库中只有一个购物车"""
+        settings.CART_ID_CACHE_ENABLED = False
+        try:
+            responses = post_concurrently("/api/cart/getCartId", [{"user_id": new_user}] * 10)
+        finally:
+            settings.CART_ID_CACHE_ENABLED = True
+
+        assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+        assert len({response.json()["cartId"] for response in responses}) == 1
+
+        db = SessionLocal()
+        assert db.scalar(select(func.count()).select_from(Cart).where(Cart.user_id == new_user)) == 1
+        db.close()
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,268 @@
+"""
+Redis 购物车存储集成测试
+使用 fakeredis 作为本地 Redis 替身，验证购物车接口只修改 Redis、后台批量写回和结账时同步写回数据库，
+以及写回后的数据库数据与 Redis 中的购物车一致
+"""
+import sys
+import os
+import asyncio
+import threading
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fakeredis
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from models.cart_item import CartItem
+from models.order import Order, OrderItem
+from models.product import Product
+import utils.cart_store as cart_store_module
+from utils.cart_store import cart_store
+from utils.config import settings
+from utils.database import SessionLocal, async_engine
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    """测试客户端"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def redis_carts():
+    """启用 Redis 购物车存储（使用 fakeredis），测试结束后恢复"""
+    original = cart_store.client
+    cart_store.client = fakeredis.FakeRedis(decode_responses=True)
+    settings.CART_STORE = "redis"
+    yield cart_store
+    settings.CART_STORE = "mysql"
+    cart_store.client = original
+
+
+@pytest.fixture
+def cart_id(client):
+    """用户 3 的购物车（测试结束后清空）"""
+    cart_id = client.post("/api/cart/getCartId", json={"user_id": 3}).json()["cartId"]
+    yield cart_id
+    db = SessionLocal()
+    db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+    db.commit()
+    db.close()
+
+
+@pytest.fixture(scope="module")
+def products():
+    """按 ID 排序的前 5 个产品（ID 和最小订购量）"""
+    db = SessionLocal()
+    rows = db.execute(select(Product.id, Product.moq).order_by(Product.id).limit(5)).all()
+    db.close()
+    return rows
+
+
+def db_quantities(cart_id):
+    """数据库中购物车的 {商品ID: 数量}"""
+    db = SessionLocal()
+    rows = db.execute(select(CartItem.product_id, CartItem.quantity).where(CartItem.cart_id == cart_id)).all()
+    db.close()
+    return dict(rows)
+
+
+def add(client, cart_id, product, times=1):
+    """通过接口加入商品，返回购物车商品项ID"""
+    response = client.post("/api/cart/add_item", json={
+        "cart_id": cart_id, "product_id": product.id, "quantity": product.moq * times
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["item"]["id"]
+
+
+class TestRedisCartStore:
+    """Redis 购物车存储测试类"""
+
+    def test_mutations_are_written_back(self, client, redis_carts, cart_id, products):
+        """加入、修改、删除只修改 Redis，写回后数据库与 Redis 中的购物车一致"""
+        a, b, c = products[:3]
+        item_a = add(client, cart_id, a)
+        add(client, cart_id, a)
+        item_b = add(client, cart_id, b)
+        add(client, cart_id, c)
+
+        response = client.put(f"/api/cart/update_item/{cart_id}/{item_b}", json={"quantity": b.moq * 3})
+        assert response.status_code == 200, response.text
+        response = client.request("DELETE", "/api/cart/item", json={"item_id": item_a})
+        assert response.status_code == 200, response.text
+
+        assert db_quantities(cart_id) == {}
+        redis_data = client.get(f"/api/cart/get_cart_data/{cart_id}").json()
+        assert {item["product_id"]: item["quantity"] for item in redis_data["items"]} == {b.id: b.moq * 3, c.id: c.moq}
+
+        assert redis_carts.flush_pending() == 1
+        assert redis_carts.flush_pending() == 0
+        assert db_quantities(cart_id) == {b.id: b.moq * 3, c.id: c.moq}
+
+        # 写回的数据与数据库存储方式读取的购物车详情相同（商品项ID、单价一致）
+        settings.CART_STORE = "mysql"
+        assert client.get(f"/api/cart/get_cart_data/{cart_id}").json() == redis_data
+
+    def test_cart_is_loaded_from_database(self, client, redis_carts, cart_id, products):
+        """Redis 中没有的购物车从数据库加载，可按数据库中的商品项ID修改和删除"""
+        a, b = products[:2]
+        settings.CART_STORE = "mysql"
+        item_a = add(client, cart_id, a)
+        item_b = add(client, cart_id, b)
+        settings.CART_STORE = "redis"
+
+        response = client.request("DELETE", "/api/cart/item", json={"item_id": item_a})
+        assert response.status_code == 200, response.text
+        add(client, cart_id, b)
+        response = client.request("DELETE", "/api/cart/item", json={"item_id": item_a})
+        assert response.status_code == 404
+
+        redis_carts.flush_pending()
+        assert db_quantities(cart_id) == {b.id: b.moq * 2}
+        items = client.get(f"/api/cart/get_cart_data/{cart_id}").json()["items"]
+        assert [item["id"] for item in items] == [item_b]
+
+    def test_concurrent_adds_do_not_lose_increments(self, redis_carts, cart_id, products):
+        """并发加入同一商品，Redis 中的数量等于每次加入数量之和"""
+        product = products[0]
+        requests = 20
+
+        async def add_concurrently():
+            # 连接池在等待连接时会绑定到当前事件循环，前后各重建一次，避免与其他测试的事件循环混用
+            if async_engine is not None:
+                await async_engine.dispose()
+            transport = httpx.ASGITransport(app=app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await asyncio.gather(*[
+                        client.post("/api/cart/add_item", json={
+                            "cart_id": cart_id, "product_id": product.id, "quantity": product.moq
+                        })
+                        for _ in range(requests)
+                    ])
+            finally:
+                if async_engine is not None:
+                    await async_engine.dispose()
+
+        responses = asyncio.run(add_concurrently())
+        assert all(response.status_code == 200 for response in responses), [r.text for r in responses]
+        assert len({response.json()["item"]["id"] for response in responses}) == 1
+
+        redis_carts.flush_pending()
+        assert db_quantities(cart_id) == {product.id: product.moq * requests}
+
+    def test_batch_and_errors(self, client, redis_carts, cart_id, products):
+        """批量修改与数据库存储方式的校验规则相同，不合法时不修改 Redis"""
+        a, b = products[:2]
+        item_a = add(client, cart_id, a)
+
+        response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+            {"op": "update", "item_id": item_a, "quantity": a.moq * 2},
+            {"op": "add", "product_id": "NOT-EXIST", "quantity": 1},
+        ]})
+        assert response.status_code == 404
+        assert response.json()["detail"].startswith("第 2 个操作")
+
+        response = client.post("/api/cart/batch", json={"cart_id": cart_id, "operations": [
+            {"op": "update", "item_id": item_a, "quantity": a.moq * 2},
+            {"op": "add", "product_id": b.id, "quantity": b.moq},
+            {"op": "add", "product_id": b.id, "quantity": b.moq},
+        ]})
+        assert response.status_code == 200, response.text
+        assert {item["product_id"]: item["quantity"] for item in response.json()["items"]} == {a.id: a.moq * 2, b.id: b.moq * 2}
+
+        response = client.post("/api/cart/add_item", json={"cart_id": 999999, "product_id": a.id, "quantity": a.moq})
+        assert response.status_code == 404
+
+        redis_carts.flush_pending()
+        assert db_quantities(cart_id) == {a.id: a.moq * 2, b.id: b.moq * 2}
+
+    def test_item_index_is_cleared(self, client, redis_carts, cart_id, products):
+        """删除商品项或写回后删除 cart:item_index 中的条目，已写回的商品项仍可按ID删除"""
+        a, b = products[:2]
+        item_a = add(client, cart_id, a)
+        item_b = add(client, cart_id, b)
+        index_key = redis_carts.ITEM_INDEX_KEY
+        assert redis_carts.client.hlen(index_key) == 2
+
+        response = client.request("DELETE", "/api/cart/item", json={"item_id": item_a})
+        assert response.status_code == 200, response.text
+        assert redis_carts.client.hkeys(index_key) == [str(item_b)]
+
+        redis_carts.flush_pending()
+        assert redis_carts.client.hlen(index_key) == 0
+        response = client.request("DELETE", "/api/cart/item", json={"item_id": item_b})
+        assert response.status_code == 200, response.text
+        redis_carts.flush_pending()
+        assert db_quantities(cart_id) == {}
+
+    def test_update_racing_with_remove(self, client, redis_carts, cart_id, products, monkeypatch):
+        """修改数量期间商品项被删除时返回 404，不留下孤立的数量字段"""
+        product = products[0]
+        item_id = add(client, cart_id, product)
+        original = cart_store_module.load_products
+
+        async def load_then_remove(db, product_ids):
+            result = await original(db, product_ids)
+            # 模拟在读取商品与写入数量之间完成的并发删除
+            await redis_carts.remove_item(db, item_id)
+            return result
+
+        monkeypatch.setattr(cart_store_module, "load_products", load_then_remove)
+        response = client.put(f"/api/cart/update_item/{cart_id}/{item_id}", json={"quantity": product.moq * 2})
+        assert response.status_code == 404
+        assert redis_carts.client.hgetall(redis_carts._keys(cart_id)[1]) == {}
+
+    def test_write_back_is_serialized(self, client, redis_carts, cart_id, products):
+        """同一购物车的写回串行执行：后台任务跳过正在写回的购物车，结账写回等待其完成"""
+        product = products[0]
+        add(client, cart_id, product)
+        tokens = redis_carts._lock([cart_id])
+
+        assert redis_carts.flush_pending() == 1
+        assert db_quantities(cart_id) == {}
+        assert redis_carts.client.sismember(redis_carts.DIRTY_KEY, cart_id)
+
+        flusher = threading.Thread(target=redis_carts.flush_cart, args=(cart_id,))
+        flusher.start()
+        flusher.join(0.3)
+        assert flusher.is_alive()
+        redis_carts._unlock(tokens)
+        flusher.join(5)
+        assert not flusher.is_alive()
+        assert db_quantities(cart_id) == {product.id: product.moq}
+        assert not redis_carts.client.exists(redis_carts._lock_key(cart_id))
+
+    def test_checkout_flushes_cart(self, client, redis_carts, cart_id, products):
+        """创建订单时同步写回来源购物车"""
+        product = products[0]
+        add(client, cart_id, product)
+
+        response = client.post("/api/order/create", json={
+            "user_id": 3,
+            "cart_id": cart_id,
+            "customer_name": "购物车写回测试",
+            "items": [{"product_id": product.id, "product_name": "测试商品", "quantity": product.moq, "price": 1.0}]
+        })
+        assert response.status_code == 200, response.text
+        order_id = response.json()["order_id"]
+
+        try:
+            assert db_quantities(cart_id) == {product.id: product.moq}
+            assert redis_carts.flush_pending() == 0
+        finally:
+            db = SessionLocal()
+            db.execute(delete(OrderItem).where(OrderItem.order_id == order_id))
+            db.execute(delete(Order).where(Order.id == order_id))
+            db.commit()
+            db.close()
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
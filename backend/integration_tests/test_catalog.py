@@ -0,0 +1,123 @@
+"""
+目录读模型集成测试
+验证目录接口在版本未变化时不访问数据库，创建产品后能读到新产品，较晚提交的行不会被水位线跳过
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from datetime import timedelta
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import DateTime, func, insert, select
+from models.product import Product
+from utils.config import settings
+from utils.catalog import catalog
+from utils.catalog_import import build_product_row
+from utils.database import SessionLocal
+from main import app
+
+CATEGORY_ID = "MLB5672"
+
+# 类别产品列表和先试后用列表按游标分页直接查询数据库，只有类别校验使用读模型
+CATALOG_ENDPOINTS = [
+    ("get", "/api/product/categories", None),
+    ("get", "/api/product/supplier", None),
+    ("get", "/api/product/all", None),
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    """开启查询计数的测试客户端"""
+    settings.QUERY_COUNTER_ENABLED = True
+    yield TestClient(app)
+    settings.QUERY_COUNTER_ENABLED = False
+
+
+def call(client, method, path, body=None):
+    """调用接口，返回 (响应数据, 查询次数)"""
+    response = client.request(method, path, json=body)
+    assert response.status_code == 200, response.text
+    return response.json(), int(response.headers["X-Query-Count"])
+
+
+def watermark_product(product_id):
+    """直接写入数据库的测试产品行"""
+    return build_product_row({
+        "name": f"目录水位线测试产品 {product_id}",
+        "description": "目录读模型测试",
+        "price": 9.9,
+        "category_id": CATEGORY_ID,
+        "supplier_id": "SUP001",
+        "stock": 1
+    }, product_id)
+
+
+class TestCatalogReadModel:
+    """目录读模型测试类"""
+
+    @pytest.mark.parametrize("method,path,body", CATALOG_ENDPOINTS)
+    def test_warm_reads_skip_database(self, client, method, path, body):
+        """读模型加载后，目录接口不再执行 SQL"""
+        call(client, method, path, body)
+        _, count = call(client, method, path, body)
+        assert count == 0, f"{path} 执行了 {count} 条 SQL"
+
+    def test_create_product_is_visible(self, client):
+        """创建产品后，列表接口返回新产品"""
+        call(client, "get", "/api/product/all")
+        version = catalog.version
+
+        response = client.post("/api/product/create", json={
+            "name": "目录读模型测试产品",
+            "description": "目录读模型测试",
+            "price": 12.5,
+            "category_id": CATEGORY_ID,
+            "supplier_id": "SUP001",
+            "stock": 10
+        })
+        assert response.status_code == 200, response.text
+        product_id = response.json()["product"]["id"]
+        assert catalog.version == version + 1
+
+        all_products, _ = call(client, "get", "/api/product/all")
+        assert product_id in {product["id"] for product in all_products["products"]}
+
+        category, _ = call(client, "get", f"/api/product/categories/{CATEGORY_ID}")
+        assert category["products"][0]["id"] == product_id
+
+        # 增量加载之后再次读取不访问数据库
+        _, count = call(client, "get", "/api/product/all")
+        assert count == 0
+
+    def test_late_commit_is_loaded(self, client):
+        """updated_at 早于已加载的最新行、之后才提交的产品，在下一次加载时读到"""
+        db = SessionLocal()
+        now = db.scalar(select(func.now(type_=DateTime())))
+        try:
+            db.execute(insert(Product).values(**watermark_product("WATERMARK01"), created_at=now, updated_at=now))
+            db.commit()
+            catalog.invalidate()
+            call(client, "get", "/api/product/all")
+
+            # 模拟在上一行之前执行、之后才提交的写入
+            earlier = now - timedelta(seconds=1)
+            db.execute(insert(Product).values(**watermark_product("WATERMARK02"), created_at=earlier, updated_at=earlier))
+            db.commit()
+            catalog.invalidate()
+            all_products, _ = call(client, "get", "/api/product/all")
+            assert {"WATERMARK01", "WATERMARK02"} <= {product["id"] for product in all_products["products"]}
+        finally:
+            # 通过 ORM 删除，写入删除记录，读模型随后移除这两个产品
+            for product in db.scalars(select(Product).where(Product.id.like("WATERMARK%"))).all():
+                db.delete(product)
+            db.commit()
+            db.close()
+            catalog.invalidate()
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,79 @@
+"""
+产品目录流式导出集成测试
+验证 NDJSON 与 CSV 导出内容完整，并按批次逐块输出
+"""
+import sys
+import os
+import csv
+import io
+import json
+import math
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils.config import settings
+from utils.catalog_export import iter_ndjson
+
+client = TestClient(app)
+
+
+def all_products(fields):
+    """通过 /api/product/all 读取产品，按ID排序"""
+    response = client.get("/api/product/all", params={"fields": fields})
+    assert response.status_code == 200, response.text
+    return sorted(response.json()["products"], key=lambda product: product["id"])
+
+
+class TestCatalogExport:
+    """产品目录导出测试类"""
+
+    def test_ndjson_matches_all_products(self):
+        """NDJSON 每行一个产品，按ID排序，内容与产品列表一致"""
+        response = client.get("/api/product/export", params={"fields": "title,tags,category_name,created_at"})
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "products.ndjson" in response.headers["content-disposition"]
+
+        exported = [json.loads(line) for line in response.text.splitlines()]
+        assert exported == all_products("title,tags,category_name,created_at")
+
+    def test_csv_has_header_and_all_rows(self):
+        """CSV 第一行为表头，列表字段以 JSON 文本输出"""
+        response = client.get("/api/product/export", params={"format": "csv", "fields": "title,tags,selling_price"})
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"].startswith("text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        expected = all_products("title,tags,selling_price")
+        assert list(rows[0]) == ["id", "title", "tags", "selling_price"]
+        assert [row["id"] for row in rows] == [product["id"] for product in expected]
+        assert [json.loads(row["tags"]) if row["tags"] else None for row in rows] == [product["tags"] for product in expected]
+        assert float(rows[0]["selling_price"]) == expected[0]["selling_price"]
+
+    def test_export_is_streamed_in_batches(self):
+        """每批 EXPORT_BATCH_SIZE 行输出一块"""
+        previous = settings.EXPORT_BATCH_SIZE
+        settings.EXPORT_BATCH_SIZE = 7
+        try:
+            chunks = list(iter_ndjson(("id", "title")))
+        finally:
+            settings.EXPORT_BATCH_SIZE = previous
+
+        total = sum(chunk.count(b"\n") for chunk in chunks)
+        assert total == len(all_products("title"))
+        assert len(chunks) == math.ceil(total / 7)
+        assert all(chunk.count(b"\n") == 7 for chunk in chunks[:-1])
+
+    @pytest.mark.parametrize("params", [{"format": "xml"}, {"fields": "title,password"}])
+    def test_invalid_parameters(self, params):
+        """不支持的格式或字段返回 400"""
+        assert client.get("/api/product/export", params=params).status_code == 400
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
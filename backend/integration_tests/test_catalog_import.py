@@ -0,0 +1,225 @@
+"""
+产品批量导入集成测试
+验证 NDJSON 与 CSV 导入、逐行错误报告、写入失败时的逐行回退，以及每批的查询次数与行数无关
+"""
+import sys
+import os
+import io
+import json
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import fakeredis
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from main import app
+from models.product import Product
+from models.tag import Tag, ProductTag
+from utils import catalog_import
+from utils.catalog_import import import_products
+from utils.database import SessionLocal, engine
+from utils.product_cache import product_cache
+from utils.query_counter import install_query_counter, start_query_count, stop_query_count, get_query_count
+
+client = TestClient(app)
+
+
+def get_product(product_id):
+    """读取产品详情"""
+    return client.post("/api/product/get_product", json={"product_id": product_id})
+
+
+def product(product_id, **overrides):
+    """导入用的产品数据"""
+    data = {
+        "id": product_id,
+        "name": f"批量导入测试产品 {product_id}",
+        "description": "批量导入测试",
+        "price": 19.9,
+        "category_id": "MLB5672",
+        "supplier_id": "SUP001",
+        "stock": 10,
+    }
+    data.update(overrides)
+    return data
+
+
+def ndjson(*lines):
+    """将产品数据（或原始文本行）拼接为 NDJSON"""
+    return "\n".join(line if isinstance(line, str) else json.dumps(line, ensure_ascii=False) for line in lines)
+
+
+@pytest.fixture(autouse=True)
+def cleanup():
+    """删除测试导入的产品和测试中注册的自定义标签"""
+    yield
+    db = SessionLocal()
+    db.execute(delete(ProductTag).where(ProductTag.product_id.like("IMPORT%")))
+    db.execute(delete(Product).where(Product.id.like("IMPORT%")))
+    db.execute(delete(Tag).where(Tag.display_name == "批量导入标签"))
+    db.commit()
+    db.close()
+
+
+class TestCatalogImport:
+    """产品批量导入测试类"""
+
+    def test_ndjson_import_reports_row_errors(self):
+        """出错的行记录行号后跳过，其他行正常导入"""
+        body = ndjson(
+            product("IMPORT0001", tags=["新品上市", "批量导入标签"]),
+            product("IMPORT0002", category_id="NOTEXIST"),
+            "{not json",
+            product("IMPORT0003", price="abc"),
+            product("IMPORT0004", supplier_id="NOTEXIST"),
+            {key: value for key, value in product("IMPORT0005").items() if key != "stock"},
+            product("IMPORT0001"),
+            product("IMPORT0006"),
+        )
+        response = client.post("/api/product/import", content=body.encode())
+        assert response.status_code == 200, response.text
+        data = response.json()
+
+        assert data["product_ids"] == ["IMPORT0001", "IMPORT0006"]
+        assert data["imported"] == 2 and data["failed"] == 6
+        assert [error["line"] for error in data["errors"]] == [2, 3, 4, 5, 6, 7]
+        assert "NOTEXIST" in data["errors"][0]["error"]
+        assert "stock" in data["errors"][4]["error"]
+        assert "已存在" in data["errors"][5]["error"]
+
+        detail = get_product("IMPORT0001").json()["product"]
+        assert detail["tags"] == ["新品上市", "批量导入标签"]
+        db = SessionLocal()
+        linked = db.scalars(
+            select(Tag.display_name).join(ProductTag, ProductTag.tag_id == Tag.id)
+            .where(ProductTag.product_id == "IMPORT0001")
+        ).all()
+        db.close()
+        assert sorted(linked) == sorted(["新品上市", "批量导入标签"])
+
+    def test_csv_import_in_chunks(self):
+        """CSV 按批写入，列表字段为 JSON 文本，未提供 id 时自动生成"""
+        lines = ["name,description,price,category_id,supplier_id,stock,tags,id"]
+        for i in range(5):
+            lines.append(f'CSV导入产品 {i},批量导入测试,{10 + i},MLB5672,SUP001,{i},"[""特价促销""]",IMPORT{i:04d}')
+        lines.append("无ID产品,批量导入测试,9.9,MLB5672,SUP001,1,,")
+        response = client.post(
+            "/api/product/import",
+            params={"chunk_size": 2},
+            content="\n".join(lines).encode(),
+            headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["failed"] == 0
+        assert data["product_ids"][:5] == [f"IMPORT{i:04d}" for i in range(5)]
+        generated = data["product_ids"][5]
+
+        detail = get_product("IMPORT0003").json()["product"]
+        assert detail["tags"] == ["特价促销"]
+        assert detail["selling_price"] == 13
+        assert get_product(generated).status_code == 200
+
+        db = SessionLocal()
+        db.execute(delete(Product).where(Product.id == generated))
+        db.commit()
+        db.close()
+
+    def test_failed_chunk_falls_back_to_row_inserts(self):
+        """某一批写入数据库失败时逐行写入，只跳过出错的行"""
+        body = ndjson(product("IMPORT0001"), product("IMPORT0002", name={"pt": "não suportado"}), product("IMPORT0003"))
+        data = client.post("/api/product/import", content=body.encode()).json()
+        assert data["product_ids"] == ["IMPORT0001", "IMPORT0003"]
+        assert [error["line"] for error in data["errors"]] == [2]
+
+    def test_rows_are_validated_before_writing(self):
+        """必填字段为空、字符串类型或长度不符合列定义、列表字段类型错误的行在写入前作为行错误跳过"""
+        body = ndjson(
+            product("IMPORT0001", name="  "),
+            product("IMPORT0002", name="长" * 501),
+            product("IMPORT0003", category_id=""),
+            product("IMPORT0004", main_image_url=123),
+            product("IMPORT0005", tags="不是列表"),
+            product("IMPORT0006"),
+        )
+        data = client.post("/api/product/import", content=body.encode()).json()
+        assert data["product_ids"] == ["IMPORT0006"]
+        assert [error["line"] for error in data["errors"]] == [1, 2, 3, 4, 5]
+        messages = [error["error"] for error in data["errors"]]
+        assert messages[:4] == ["name 不能为空", "name 不能超过 500 个字符", "category_id 不能为空", "main_image_url 必须是字符串"]
+        assert "tags" in messages[4]
+
+    def test_unexpected_write_error_falls_back_to_row_inserts(self, monkeypatch):
+        """批量写入抛出非数据库异常时同样逐行写入，出错的行记录为行错误"""
+        original = catalog_import._write
+
+        def write(rows):
+            if any(row["id"] == "IMPORT0002" for row in rows):
+                raise TypeError("模拟写入错误")
+            original(rows)
+
+        monkeypatch.setattr(catalog_import, "_write", write)
+        body = ndjson(product("IMPORT0001"), product("IMPORT0002"), product("IMPORT0003"))
+        data = client.post("/api/product/import", content=body.encode()).json()
+        assert data["product_ids"] == ["IMPORT0001", "IMPORT0003"]
+        assert data["errors"] == [{"line": 2, "id": "IMPORT0002", "error": "模拟写入错误"}]
+
+    def test_aborted_import_still_invalidates(self):
+        """导入中途中断时，已提交批次的产品同样删除详情缓存"""
+        def lines():
+            yield json.dumps(product("IMPORT0001")) + "\n"
+            raise OSError("连接中断")
+
+        original = product_cache.client, product_cache._redis_down_until
+        product_cache.client, product_cache._redis_down_until = fakeredis.FakeRedis(decode_responses=True), 0.0
+        try:
+            product_cache._write("IMPORT0001", {"id": "IMPORT0001", "title": "已删除的旧产品"})
+            with pytest.raises(OSError):
+                import_products(lines(), "ndjson", chunk_size=1)
+            cached, _ = product_cache._read("IMPORT0001")
+        finally:
+            product_cache.client, product_cache._redis_down_until = original
+
+        assert cached is None
+        assert get_product("IMPORT0001").status_code == 200
+
+    def test_reference_lookups_are_batched(self):
+        """类别和供应商只查询一次，每批的查询次数与行数无关"""
+        install_query_counter(engine)
+        stream = io.StringIO(ndjson(*[product(f"IMPORT{i:04d}") for i in range(20)]))
+        token = start_query_count()
+        try:
+            result = import_products(stream, "ndjson", chunk_size=10)
+            queries = get_query_count()
+        finally:
+            stop_query_count(token)
+
+        assert len(result["product_ids"]) == 20
+        # 类别、供应商各一次；每批：检查产品ID是否已存在、插入产品
+        assert queries == 2 + 2 * 2
+
+    def test_import_evicts_cached_detail(self):
+        """导入后删除产品详情缓存中的旧条目，下一次读取返回导入的数据"""
+        original = product_cache.client, product_cache._redis_down_until
+        product_cache.client, product_cache._redis_down_until = fakeredis.FakeRedis(decode_responses=True), 0.0
+        try:
+            # 之前删除的同ID产品仍留在缓存中
+            product_cache._write("IMPORT0001", {"id": "IMPORT0001", "title": "已删除的旧产品"})
+            data = client.post("/api/product/import", content=ndjson(product("IMPORT0001")).encode()).json()
+            assert data["product_ids"] == ["IMPORT0001"]
+            detail = get_product("IMPORT0001").json()["product"]
+        finally:
+            product_cache.client, product_cache._redis_down_until = original
+
+        assert detail["title"] == "批量导入测试产品 IMPORT0001"
+
+    def test_invalid_format(self):
+        """不支持的导入格式返回 400"""
+        assert client.post("/api/product/import", params={"format": "xml"}, content=b"").status_code == 400
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
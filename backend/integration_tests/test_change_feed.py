@@ -0,0 +1,153 @@
+"""
+目录变更订阅集成测试
+验证全量同步分页、增量同步只返回变化的记录，以及删除以墓碑形式返回
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.category import Category
+from models.product import Product
+from utils.catalog import catalog
+from utils.config import settings
+from utils.database import SessionLocal
+
+client = TestClient(app)
+
+FEED_CATEGORY_ID = "FEEDTEST"
+
+
+def sync(since=None, limit=None):
+    """从 since 开始逐页读取，直到没有更多变化，返回 (按实体合并的结果, 最后的 next_since)"""
+    merged = {"categories": {}, "suppliers": {}, "products": {}, "deleted": []}
+    while True:
+        params = {key: value for key, value in {"since": since, "limit": limit}.items() if value is not None}
+        response = client.get("/api/product/changes", params=params)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        for key, rows in data["changes"].items():
+            merged[key].update((row["id"], row) for row in rows)
+        merged["deleted"].extend(data["deleted"])
+        since = data["next_since"]
+        if not data["has_more"]:
+            return merged, since
+
+
+@pytest.fixture
+def settled_immediately():
+    """不保留未稳定的时间窗口，使增量同步只返回新的变化"""
+    previous = settings.CHANGE_FEED_SETTLE_SECONDS
+    settings.CHANGE_FEED_SETTLE_SECONDS = -3600
+    yield
+    settings.CHANGE_FEED_SETTLE_SECONDS = previous
+
+
+@pytest.fixture
+def feed_category():
+    """测试专用的类别（删除时会级联删除其中的产品）"""
+    db = SessionLocal()
+    db.add(Category(id=FEED_CATEGORY_ID, name="变更订阅测试类别"))
+    for i in range(2):
+        db.add(Product(id=f"FEED{i:04d}", title=f"变更订阅测试产品 {i}", category_id=FEED_CATEGORY_ID,
+                       supplier_id="SUP001", selling_price=10.0))
+    db.commit()
+    yield db
+    # SQLite 默认不执行外键级联，手动清理
+    db.query(Product).filter(Product.category_id == FEED_CATEGORY_ID).delete()
+    db.commit()
+    db.close()
+    catalog.invalidate()
+
+
+class TestChangeFeed:
+    """目录变更订阅测试类"""
+
+    def test_full_sync_pages_through_catalog(self):
+        """从头同步时分页返回所有类别、供应商和产品，不重复"""
+        merged, _ = sync(limit=7)
+        all_products = client.get("/api/product/all", params={"fields": "title"}).json()["products"]
+        categories = client.get("/api/product/categories").json()["categories"]
+
+        assert set(merged["products"]) == {product["id"] for product in all_products}
+        assert set(merged["categories"]) == {category["id"] for category in categories}
+        assert merged["suppliers"]
+        product = next(iter(merged["products"].values()))
+        assert {"title", "selling_price", "variations", "updated_at"} <= set(product)
+
+    def test_incremental_sync_returns_only_changes(self, settled_immediately):
+        """增量同步只返回 since 之后新增的产品"""
+        _, since = sync()
+        empty, since = sync(since)
+        assert not empty["products"] and not empty["categories"] and not empty["deleted"]
+
+        response = client.post("/api/product/create", json={
+            "name": "变更订阅测试新产品",
+            "description": "变更订阅测试",
+            "price": 15,
+            "category_id": "MLB5672",
+            "supplier_id": "SUP001",
+            "stock": 1
+        })
+        assert response.status_code == 200, response.text
+        product_id = response.json()["product"]["id"]
+
+        changed, _ = sync(since)
+        assert list(changed["products"]) == [product_id]
+
+    def test_recent_changes_are_delivered_again(self):
+        """未稳定时间窗口内的记录在下一次同步中再次返回，避免遗漏同一时刻稍后提交的事务"""
+        _, since = sync()
+        response = client.post("/api/product/create", json={
+            "name": "变更订阅重复投递测试产品",
+            "description": "变更订阅测试",
+            "price": 15,
+            "category_id": "MLB5672",
+            "supplier_id": "SUP001",
+            "stock": 1
+        })
+        product_id = response.json()["product"]["id"]
+
+        first, since = sync(since)
+        second, _ = sync(since)
+        assert product_id in first["products"]
+        assert product_id in second["products"]
+
+    def test_deletions_are_returned_as_tombstones(self, feed_category, settled_immediately):
+        """删除类别时返回类别和其中产品的墓碑，读模型同时移除这些产品"""
+        _, since = sync()
+
+        db = feed_category
+        db.delete(db.get(Category, FEED_CATEGORY_ID))
+        db.commit()
+
+        changed, _ = sync(since)
+        assert {(item["entity"], item["id"]) for item in changed["deleted"]} == {
+            ("category", FEED_CATEGORY_ID), ("product", "FEED0000"), ("product", "FEED0001")
+        }
+
+        catalog.invalidate()
+        all_products = client.get("/api/product/all", params={"fields": "title"}).json()["products"]
+        assert not {"FEED0000", "FEED0001"} & {product["id"] for product in all_products}
+
+    def test_iso_time_since(self):
+        """since 为 ISO 时间时返回该时间及之后的变化"""
+        future = (datetime.utcnow() + timedelta(days=1)).isoformat() + "Z"
+        response = client.get("/api/product/changes", params={"since": future})
+        assert response.status_code == 200
+        assert not any(response.json()["changes"].values())
+
+    @pytest.mark.parametrize("params", [{"since": "not-a-cursor"}, {"limit": 0}])
+    def test_invalid_parameters(self, params):
+        """无效的 since 或 limit 返回 400"""
+        assert client.get("/api/product/changes", params=params).status_code == 400
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,172 @@
+"""
+分面筛选集成测试
+验证位图索引的筛选结果和分面数量与逐个产品判断的结果一致，并验证分页和参数校验
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils.config import settings
+from utils.facets import FacetIndex, effective_price
+
+client = TestClient(app)
+
+CATEGORY_ID = "MLB5672"
+
+
+def make_products(count=300):
+    """生成按创建时间倒序排列的产品记录"""
+    start = datetime(2024, 1, 1)
+    products = [
+        SimpleNamespace(
+            id=f"P{i:04d}",
+            tags=[f"tag{i % 7}", "premium"] if i % 3 == 0 else [f"tag{i % 7}"],
+            supplier_id=f"SUP{i % 4}",
+            shipping_from=None if i % 11 == 0 else ["广州", "深圳"][i % 2],
+            selling_price=float(i % 120) * 5,
+            discount_price=float(i % 120) * 4 if i % 5 == 0 else None,
+            created_at=start + timedelta(minutes=i // 2),
+        )
+        for i in range(count)
+    ]
+    products.sort(key=lambda p: (p.created_at, p.id), reverse=True)
+    return products
+
+
+def matches(product, tags=(), suppliers=(), shipping_from=(), min_price=None, max_price=None):
+    """逐个产品判断是否满足筛选条件"""
+    price = effective_price(product)
+    return (
+        (not tags or set(tags) & set(product.tags))
+        and (not suppliers or product.supplier_id in suppliers)
+        and (not shipping_from or product.shipping_from in shipping_from)
+        and (min_price is None or price >= min_price)
+        and (max_price is None or price <= max_price)
+    )
+
+
+class TestFacetIndex:
+    """分面位图索引测试类"""
+
+    def test_filter_matches_scan(self):
+        """筛选结果按创建时间倒序，与逐个判断的结果一致"""
+        products = make_products()
+        index = FacetIndex(products)
+        matched, _ = index.filter(
+            {"tags": ["tag1", "premium"], "suppliers": ["SUP0", "SUP3"]},
+            min_price=50, max_price=400
+        )
+        page, has_more = index.page(matched)
+        expected = [
+            p for p in products
+            if matches(p, tags=["tag1", "premium"], suppliers=["SUP0", "SUP3"], min_price=50, max_price=400)
+        ]
+        assert page == expected
+        assert has_more is False
+
+    def test_counts_exclude_own_facet(self):
+        """每个分面的数量只应用其他分面的筛选条件"""
+        products = make_products()
+        index = FacetIndex(products)
+        _, counts = index.filter({"tags": ["tag2"], "shipping_from": ["广州"]})
+
+        for supplier, count in counts["suppliers"].items():
+            assert count == sum(
+                1 for p in products
+                if p.supplier_id == supplier and matches(p, tags=["tag2"], shipping_from=["广州"])
+            )
+        # 标签分面不应用标签条件，其他标签的数量仍然可见
+        assert counts["tags"]["tag3"] == sum(
+            1 for p in products if "tag3" in p.tags and matches(p, shipping_from=["广州"])
+        )
+        assert sum(counts["price"].values()) == sum(
+            1 for p in products if matches(p, tags=["tag2"], shipping_from=["广州"])
+        )
+
+    def test_page_from_cursor_position(self):
+        """从游标位置继续读取时不重复、不遗漏"""
+        products = make_products()
+        index = FacetIndex(products)
+        matched, _ = index.filter({"suppliers": ["SUP1"]})
+
+        collected, start = [], 0
+        while True:
+            page, has_more = index.page(matched, start=start, limit=7)
+            collected.extend(page)
+            if not has_more:
+                break
+            start = index.position_after(page[-1].created_at, page[-1].id)
+        assert collected == [p for p in products if p.supplier_id == "SUP1"]
+
+
+class TestFilterEndpoint:
+    """分面筛选接口测试类"""
+
+    def test_filter_matches_category_listing(self):
+        """接口筛选结果与类别产品列表逐个判断的结果一致"""
+        everything = client.get(
+            f"/api/product/categories/{CATEGORY_ID}", params={"page_size": settings.PRODUCT_PAGE_SIZE_MAX}
+        ).json()["products"]
+        facets = client.post("/api/product/filter", json={"category_id": CATEGORY_ID}).json()["facets"]
+        supplier = facets["suppliers"][0]["value"]
+
+        response = client.post("/api/product/filter", json={
+            "category_id": CATEGORY_ID,
+            "supplier_ids": [supplier],
+            "min_price": 10,
+            "page_size": settings.PRODUCT_PAGE_SIZE_MAX
+        })
+        assert response.status_code == 200, response.text
+        data = response.json()
+
+        expected = [
+            p["id"] for p in everything
+            if p["supplier_id"] == supplier
+            and (p["discount_price"] if p["discount_price"] is not None else p["selling_price"]) >= 10
+        ]
+        assert [p["id"] for p in data["products"]] == expected
+        assert data["total"] == len(expected)
+        assert next(item for item in data["facets"]["suppliers"] if item["value"] == supplier)["selected"]
+
+    def test_pages_cover_all_results(self):
+        """按游标逐页读取的结果与一次读取的结果一致"""
+        full = client.post("/api/product/filter", json={"page_size": settings.PRODUCT_PAGE_SIZE_MAX}).json()
+        collected, cursor = [], None
+        while True:
+            data = client.post("/api/product/filter", json={"page_size": 5, "cursor": cursor}).json()
+            collected.extend(p["id"] for p in data["products"])
+            if not data["has_more"]:
+                break
+            cursor = data["next_cursor"]
+        assert collected[:len(full["products"])] == [p["id"] for p in full["products"]]
+        assert len(collected) == full["total"]
+
+    def test_price_bucket_counts_add_up(self):
+        """价格区间的数量之和等于不含价格条件的结果总数"""
+        data = client.post("/api/product/filter", json={"category_id": CATEGORY_ID}).json()
+        assert sum(item["count"] for item in data["facets"]["price"]) == data["total"]
+
+    @pytest.mark.parametrize("body,status", [
+        ({"tags": "premium"}, 400),
+        ({"price_buckets": ["1-2"]}, 400),
+        ({"min_price": "cheap"}, 400),
+        ({"cursor": "not-a-cursor"}, 400),
+        ({"fields": "password"}, 400),
+        ({"category_id": "NOT_A_CATEGORY"}, 404),
+    ])
+    def test_invalid_requests(self, body, status):
+        """无效的筛选条件返回 400，不存在的类别返回 404"""
+        response = client.post("/api/product/filter", json=body)
+        assert response.status_code == status
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+跨进程缓存失效集成测试
+模拟从 Redis 订阅线程收到其他工作进程的消息，验证本进程的缓存被淘汰
+"""
+import sys
+import os
+import json
+import asyncio
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from sqlalchemy import update
+from utils import invalidation
+from utils.catalog import catalog
+from utils.database import open_session
+from utils.search_engine import product_search
+from models.product import Product
+
+
+def receive(entity, ids=None, origin="other-worker"):
+    """模拟订阅线程收到一条失效消息"""
+    invalidation._on_message({
+        "type": "message",
+        "data": json.dumps({"entity": entity, "ids": ids, "version": 1, "origin": origin})
+    })
+
+
+class TestInvalidationBus:
+    """缓存失效总线测试类"""
+
+    def test_remote_message_invalidates_catalog(self):
+        """其他工作进程的产品消息使目录读模型失效"""
+        version = catalog.version
+        receive("product", ["MLB-REMOTE"])
+        assert catalog.version == version + 1
+
+    def test_own_message_is_ignored(self):
+        """本进程发布的消息不重复处理"""
+        version = catalog.version
+        receive("product", ["MLB-LOCAL"], origin=invalidation.WORKER_ID)
+        assert catalog.version == version
+
+    def test_malformed_message_is_ignored(self):
+        """无法解析的消息被忽略"""
+        version = catalog.version
+        invalidation._on_message({"type": "message", "data": "not json"})
+        assert catalog.version == version
+
+    def test_stale_products_are_reloaded_into_search_index(self):
+        """收到产品消息后，搜索索引只重新加载该产品"""
+        async def scenario():
+            async with open_session() as db:
+                await product_search.ensure_built(db)
+                product_id = next(iter(product_search._doc_len))
+                # 模拟其他工作进程修改产品标题
+                await db.execute(
+                    update(Product).where(Product.id == product_id).values(title="invalidationprobe")
+                )
+                await db.commit()
+                assert product_search.search("invalidationprobe") == []
+
+                receive("product", [product_id])
+                await product_search.ensure_built(db)
+                return product_id, [doc_id for doc_id, _ in product_search.search("invalidationprobe")]
+
+        product_id, hits = asyncio.run(scenario())
+        assert hits == [product_id]
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,102 @@
+"""
+订单分页查询集成测试
+验证订单列表接口的游标分页结果稳定、不重复、不遗漏
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert, update
+from main import app
+from models.order import Order
+from utils.config import settings
+from utils.database import SessionLocal
+
+client = TestClient(app)
+
+
+def fetch_all_pages(endpoint, page_size):
+    """按游标逐页读取，返回所有订单ID"""
+    order_ids = []
+    cursor = None
+    while True:
+        response = client.post(endpoint, json={"user_id": 1, "cursor": cursor, "page_size": page_size})
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert len(data["orders"]) <= page_size
+        order_ids.extend(order["id"] for order in data["orders"])
+        if not data["has_more"]:
+            assert data["next_cursor"] is None
+            return order_ids
+        cursor = data["next_cursor"]
+
+
+@pytest.fixture
+def undated_orders():
+    """用户 1 的 3 个 order_date 为 NULL 的订单（导入时日期无法解析）"""
+    order_ids = [f"ORD-NODATE-{i}" for i in range(3)]
+    db = SessionLocal()
+    db.execute(insert(Order), [
+        {"id": order_id, "user_id": 1, "status": "Delivered", "status_step": 4,
+         "customer_name": "无日期订单测试", "total_amount": 1}
+        for order_id in order_ids
+    ])
+    # order_date 有默认值，插入后再置为 NULL
+    db.execute(update(Order).where(Order.id.in_(order_ids)).values(order_date=None))
+    db.commit()
+    yield order_ids
+    db.execute(delete(Order).where(Order.id.in_(order_ids)))
+    db.commit()
+    db.close()
+
+
+class TestOrderPagination:
+    """订单游标分页测试类"""
+
+    @pytest.mark.parametrize("endpoint", ["/api/order/list", "/api/order/admin/processed"])
+    def test_pages_cover_all_orders(self, endpoint):
+        """逐页读取的结果与一次性读取的结果一致"""
+        response = client.post(endpoint, json={"user_id": 1, "page_size": 200})
+        assert response.status_code == 200, response.text
+        expected = [order["id"] for order in response.json()["orders"]]
+
+        paged = fetch_all_pages(endpoint, page_size=2)
+
+        assert paged == expected
+        assert len(set(paged)) == len(paged), "分页结果中存在重复订单"
+
+    @pytest.mark.parametrize("endpoint", ["/api/order/list", "/api/order/admin/processed"])
+    def test_orders_without_date_are_paged(self, endpoint, undated_orders):
+        """order_date 为 NULL 的订单排在最后，以其为游标的下一页仍能继续读取"""
+        paged = fetch_all_pages(endpoint, page_size=2)
+
+        assert len(set(paged)) == len(paged), "分页结果中存在重复订单"
+        assert paged[-len(undated_orders):] == sorted(undated_orders, reverse=True)
+
+    def test_full_list_without_page_size(self):
+        """未传入 page_size 和 cursor 时返回全部订单"""
+        expected = fetch_all_pages("/api/order/list", page_size=2)
+        previous = settings.ORDER_PAGE_SIZE
+        settings.ORDER_PAGE_SIZE = 1
+        try:
+            response = client.post("/api/order/list", json={"user_id": 1})
+        finally:
+            settings.ORDER_PAGE_SIZE = previous
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert [order["id"] for order in data["orders"]] == expected
+        assert data["has_more"] is False and data["next_cursor"] is None
+
+    def test_invalid_cursor(self):
+        """无效的游标返回 400"""
+        response = client.post("/api/order/admin/processed", json={"user_id": 1, "cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,76 @@
+"""
+批量产品详情接口集成测试
+验证结果按产品ID索引、报告不存在的产品，并且只执行一次 IN 查询
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from utils.config import settings
+from main import app
+
+
+@pytest.fixture(scope="module")
+def client():
+    """开启查询计数、关闭 Redis 缓存的测试客户端（每次都查询数据库）"""
+    settings.QUERY_COUNTER_ENABLED = True
+    settings.PRODUCT_CACHE_ENABLED = False
+    yield TestClient(app)
+    settings.QUERY_COUNTER_ENABLED = False
+    settings.PRODUCT_CACHE_ENABLED = True
+
+
+def product_ids(client, count):
+    """取出若干个已存在的产品ID"""
+    response = client.get("/api/product/all")
+    assert response.status_code == 200, response.text
+    return [product["id"] for product in response.json()["products"][:count]]
+
+
+class TestProductBatch:
+    """批量产品详情接口测试类"""
+
+    def test_results_keyed_by_id_with_missing(self, client):
+        """返回按ID索引的详情，不存在的产品列在 missing 中"""
+        ids = product_ids(client, 10)
+        response = client.post("/api/product/get_products", json={
+            "product_ids": ids + ["does-not-exist", ids[0]]
+        })
+        assert response.status_code == 200, response.text
+        data = response.json()
+
+        assert list(data["products"]) == ids
+        assert data["missing"] == ["does-not-exist"]
+        assert data["count"] == len(ids)
+
+        # 字段与单个产品详情接口一致
+        single = client.post("/api/product/get_product", json={"product_id": ids[0]}).json()["product"]
+        assert data["products"][ids[0]] == single
+
+    def test_single_query(self, client):
+        """无论请求多少个产品都只执行一次查询"""
+        ids = product_ids(client, 30)
+        response = client.post("/api/product/get_products", json={"product_ids": ids})
+        assert response.status_code == 200, response.text
+        assert int(response.headers["X-Query-Count"]) == 1
+
+    @pytest.mark.parametrize("body", [
+        {},
+        {"product_ids": []},
+        {"product_ids": "MLB123"},
+        {"product_ids": ["", "MLB123"]},
+        {"product_ids": [f"ID{i}" for i in range(settings.PRODUCT_BATCH_MAX + 1)]},
+    ])
+    def test_invalid_requests(self, client, body):
+        """缺少、为空、类型错误或超过上限的产品ID列表返回 400"""
+        response = client.post("/api/product/get_products", json=body)
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,201 @@
+"""
+产品详情缓存集成测试
+使用内存中的 Redis 替身验证命中统计、并发未命中合并、旧数据后台刷新、Redis 故障降级，
+以及产品失效消息删除缓存条目
+"""
+import sys
+import os
+import json
+import time
+import asyncio
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from utils import invalidation
+from utils.product_cache import ProductDetailCache, product_cache
+
+
+class MemoryRedis:
+    """只实现 get/set/delete 的内存 Redis 替身"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    """只实现 set/execute 的管道替身"""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    def execute(self):
+        for key, value in self.commands:
+            self.client.set(key, value)
+
+
+class BrokenRedis:
+    """所有操作都失败的 Redis 替身"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, key):
+        self.calls += 1
+        raise ConnectionError("redis down")
+
+    set = delete = get
+
+
+def make_loader(delay=0.0):
+    """返回一个记录调用次数的加载函数"""
+    calls = []
+
+    async def loader(db, product_id):
+        calls.append(product_id)
+        await asyncio.sleep(delay)
+        return {"id": product_id, "title": f"产品 {len(calls)}"}
+
+    return loader, calls
+
+
+def make_batch_loader(known):
+    """返回一个记录每次请求的产品ID的批量加载函数，只有 known 中的产品存在"""
+    calls = []
+
+    async def loader_many(db, product_ids):
+        calls.append(list(product_ids))
+        return {product_id: {"id": product_id} for product_id in product_ids if product_id in known}
+
+    return loader_many, calls
+
+
+class TestProductDetailCache:
+    """产品详情缓存测试类"""
+
+    def test_miss_then_hit(self):
+        """第一次未命中查询数据库，之后直接命中缓存"""
+        cache = ProductDetailCache(MemoryRedis())
+        loader, calls = make_loader()
+
+        async def scenario():
+            first = await cache.get(None, "P1", loader)
+            second = await cache.get(None, "P1", loader)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first == second == {"id": "P1", "title": "产品 1"}
+        assert calls == ["P1"]
+        assert cache.stats["misses"] == 1
+        assert cache.stats["hits"] == 1
+
+    def test_concurrent_misses_are_coalesced(self):
+        """同一产品的并发未命中只查询一次数据库"""
+        cache = ProductDetailCache(MemoryRedis())
+        loader, calls = make_loader(delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(*(cache.get(None, "P1", loader) for _ in range(20)))
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(result == results[0] for result in results)
+        assert cache.stats["coalesced"] == 19
+
+    def test_stale_entry_is_served_and_refreshed(self):
+        """过期条目先返回旧数据，再在后台刷新"""
+        client = MemoryRedis()
+        cache = ProductDetailCache(client)
+        client.data[cache.KEY_PREFIX + "P1"] = json.dumps({
+            "product": {"id": "P1", "title": "旧数据"},
+            "fresh_until": time.time() - 1
+        })
+        loader, calls = make_loader()
+
+        async def scenario():
+            stale = await cache.get(None, "P1", loader)
+            await asyncio.gather(*cache._refresh_tasks)
+            fresh = await cache.get(None, "P1", loader)
+            return stale, fresh
+
+        stale, fresh = asyncio.run(scenario())
+        assert stale["title"] == "旧数据"
+        assert fresh["title"] == "产品 1"
+        assert calls == ["P1"]
+        assert cache.stats["stale_hits"] == 1
+        assert cache.stats["refreshes"] == 1
+
+    def test_redis_failure_falls_back_to_database(self):
+        """Redis 故障时直接查询数据库，并暂停访问 Redis"""
+        client = BrokenRedis()
+        cache = ProductDetailCache(client)
+        loader, calls = make_loader()
+
+        async def scenario():
+            await cache.get(None, "P1", loader)
+            await cache.get(None, "P2", loader)
+
+        asyncio.run(scenario())
+        assert calls == ["P1", "P2"]
+        assert client.calls == 1
+        assert cache.stats["errors"] == 1
+
+    def test_get_many_loads_misses_in_one_call(self):
+        """批量读取时未命中的产品一次加载，之后全部命中缓存"""
+        cache = ProductDetailCache(MemoryRedis())
+        loader_many, calls = make_batch_loader({"P1", "P2", "P3"})
+
+        async def scenario():
+            await cache.get_many(None, ["P1"], loader_many)
+            first = await cache.get_many(None, ["P1", "P2", "P3", "P4"], loader_many)
+            second = await cache.get_many(None, ["P1", "P2", "P3"], loader_many)
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert set(first) == {"P1", "P2", "P3"}
+        assert second == {product_id: {"id": product_id} for product_id in ["P1", "P2", "P3"]}
+        # 第一次只加载 P1，第二次只加载未命中的 P2、P3、P4，第三次全部命中
+        assert calls == [["P1"], ["P2", "P3", "P4"]]
+        assert cache.stats["hits"] == 4
+
+    def test_invalidation_message_evicts_entries(self):
+        """收到产品失效消息后删除对应条目，下一次读取加载写入后的数据"""
+        original = product_cache.client, product_cache._redis_down_until
+        product_cache.client, product_cache._redis_down_until = MemoryRedis(), 0.0
+        loader, calls = make_loader()
+        try:
+            first = asyncio.run(product_cache.get(None, "P1", loader))
+            invalidation.dispatch("product", ["P1"])
+            second = asyncio.run(product_cache.get(None, "P1", loader))
+        finally:
+            product_cache.client, product_cache._redis_down_until = original
+
+        assert first["title"] == "产品 1"
+        assert second["title"] == "产品 2"
+        assert calls == ["P1", "P1"]
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
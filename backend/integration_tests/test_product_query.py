@@ -0,0 +1,235 @@
+"""
+类别产品分页查询集成测试
+验证类别产品列表和先试后用列表的游标分页在各排序方式下结果正确、不重复、不遗漏
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, Float
+from main import app
+from models.category import Category
+from models.product import Product
+from utils.catalog import catalog
+from utils.database import SessionLocal, engine
+
+client = TestClient(app)
+
+CATEGORY_ID = "MLB5672"
+SORTS = ["created_at", "selling_price", "discount_price", "stock_quantity"]
+
+
+def fetch_page(endpoint, **params):
+    """读取一页类别产品"""
+    if endpoint == "sample":
+        response = client.post("/api/product/sample", json={"category_id": CATEGORY_ID, **params})
+    else:
+        params = {key: value for key, value in params.items() if value is not None}
+        response = client.get(f"/api/product/categories/{CATEGORY_ID}", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def fetch_all_pages(endpoint, page_size, **params):
+    """按游标逐页读取，返回所有产品"""
+    products = []
+    cursor = None
+    while True:
+        data = fetch_page(endpoint, cursor=cursor, page_size=page_size, **params)
+        assert len(data["products"]) <= page_size
+        products.extend(data["products"])
+        if not data["has_more"]:
+            assert data["next_cursor"] is None
+            return products
+        cursor = data["next_cursor"]
+
+
+def expected_order(products, sort, descending):
+    """按 (排序字段, id) 排序，NULL 视为最小值"""
+    def key(product):
+        value = product[sort]
+        return (value is not None, value if value is not None else 0, product["id"])
+    return [product["id"] for product in sorted(products, key=key, reverse=descending)]
+
+
+class TestCategoryProductPagination:
+    """类别产品游标分页测试类"""
+
+    @pytest.mark.parametrize("endpoint", ["category", "sample"])
+    @pytest.mark.parametrize("sort", SORTS)
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_pages_cover_all_products(self, endpoint, sort, order):
+        """逐页读取的结果按排序字段有序，且覆盖类别下的所有产品"""
+        everything = fetch_page(endpoint, page_size=200)["products"]
+        paged = fetch_all_pages(endpoint, page_size=4, sort=sort, order=order)
+
+        paged_ids = [product["id"] for product in paged]
+        assert len(set(paged_ids)) == len(paged_ids), "分页结果中存在重复产品"
+        assert paged_ids == expected_order(everything, sort, order == "desc")
+
+    def test_default_is_newest_first(self):
+        """默认按创建时间倒序"""
+        data = fetch_page("category", page_size=200)
+        created = [product["created_at"] for product in data["products"]]
+        assert created == sorted(created, reverse=True)
+
+    @pytest.mark.parametrize("endpoint", ["category", "sample"])
+    def test_full_list_without_page_size(self, endpoint, monkeypatch):
+        """未传入 page_size 和 cursor 时返回类别下的全部产品（前端不读取 next_cursor）"""
+        from utils.config import settings
+        expected = [product["id"] for product in fetch_all_pages(endpoint, page_size=5)]
+        monkeypatch.setattr(settings, "PRODUCT_PAGE_SIZE", 2)
+
+        data = fetch_page(endpoint)
+        assert [product["id"] for product in data["products"]] == expected
+        assert data["count"] == len(expected) > 2
+        assert data["has_more"] is False and data["next_cursor"] is None
+
+    def test_page_size_is_capped(self):
+        """每页数量超过上限时截断"""
+        from utils.config import settings
+        data = fetch_page("category", page_size=settings.PRODUCT_PAGE_SIZE_MAX + 1000)
+        assert len(data["products"]) <= settings.PRODUCT_PAGE_SIZE_MAX
+
+    @pytest.mark.parametrize("params", [
+        {"sort": "title"},
+        {"order": "sideways"},
+        {"cursor": "not-a-cursor"},
+        {"page_size": 0},
+    ])
+    def test_invalid_parameters(self, params):
+        """无效的排序、游标和每页数量返回 400"""
+        response = client.get(f"/api/product/categories/{CATEGORY_ID}", params=params)
+        assert response.status_code == 400
+
+    def test_cursor_from_other_sort_is_rejected(self):
+        """游标只能用于生成它的排序方式"""
+        cursor = fetch_page("category", page_size=2, sort="selling_price")["next_cursor"]
+        response = client.get(
+            f"/api/product/categories/{CATEGORY_ID}",
+            params={"cursor": cursor, "sort": "stock_quantity"}
+        )
+        assert response.status_code == 400
+
+
+TIED_CATEGORY_ID = "TIEDPRICE"
+# 单精度 FLOAT 无法精确保存的价格，每个价格有多个产品，分页时相同价格跨越页边界
+TIED_PRICES = [19.99] * 5 + [0.1] * 3 + [1234.56] * 4
+
+
+@pytest.fixture(scope="module")
+def tied_price_products():
+    """测试专用类别：多个产品的售价和折扣价相同"""
+    db = SessionLocal()
+    db.add(Category(id=TIED_CATEGORY_ID, name="相同价格测试类别"))
+    for i, price in enumerate(TIED_PRICES):
+        db.add(Product(id=f"TIED{i:04d}", title=f"相同价格测试产品 {i}", category_id=TIED_CATEGORY_ID,
+                       supplier_id="SUP001", selling_price=price, discount_price=price if i % 2 else None))
+    db.commit()
+    catalog.invalidate()
+    yield [f"TIED{i:04d}" for i in range(len(TIED_PRICES))]
+    # SQLite 默认不执行外键级联，手动清理
+    db.query(Product).filter(Product.category_id == TIED_CATEGORY_ID).delete()
+    db.query(Category).filter(Category.id == TIED_CATEGORY_ID).delete()
+    db.commit()
+    db.close()
+    catalog.invalidate()
+
+
+class TestTiedPricePagination:
+    """相同价格跨页的游标分页测试类（使用 MySQL 运行时覆盖 DECIMAL 价格列的精确比较）"""
+
+    @pytest.mark.parametrize("sort", ["selling_price", "discount_price"])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_tied_prices_across_page_boundary(self, tied_price_products, sort, order):
+        """相同价格的产品分布在多页时，逐页读取不重复、不遗漏，且按 (价格, id) 有序"""
+        pages = 0
+        products = []
+        cursor = None
+        while pages <= len(TIED_PRICES):
+            params = {"sort": sort, "order": order, "page_size": 2, "cursor": cursor}
+            response = client.get(
+                f"/api/product/categories/{TIED_CATEGORY_ID}",
+                params={key: value for key, value in params.items() if value is not None}
+            )
+            assert response.status_code == 200, response.text
+            data = response.json()
+            products.extend(data["products"])
+            pages += 1
+            if not data["has_more"]:
+                break
+            cursor = data["next_cursor"]
+        else:
+            pytest.fail("游标分页没有结束（相同价格的产品被重复返回）")
+
+        assert sorted(product["id"] for product in products) == tied_price_products
+        assert [product["id"] for product in products] == expected_order(products, sort, order == "desc")
+
+    @pytest.mark.skipif(engine.dialect.name != "mysql", reason="仅 MySQL 存在 FLOAT 价格列")
+    def test_price_columns_are_decimal(self):
+        """MySQL 中的价格列已迁移为 DECIMAL"""
+        columns = {column["name"]: column["type"] for column in inspect(engine).get_columns("products")}
+        assert not isinstance(columns["selling_price"], Float)
+        assert not isinstance(columns["discount_price"], Float)
+
+
+class TestSparseFieldsets:
+    """fields= 字段选择测试类"""
+
+    CARD_FIELDS = ["title", "img", "selling_price"]
+
+    def test_category_products_only_return_requested_fields(self):
+        """类别产品列表只返回请求的字段（id 总是返回）"""
+        response = client.get(
+            f"/api/product/categories/{CATEGORY_ID}",
+            params={"fields": ",".join(self.CARD_FIELDS), "sort": "stock_quantity", "page_size": 3}
+        )
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert all(set(product) == {"id", *self.CARD_FIELDS} for product in data["products"])
+        # 排序列不在返回字段中时分页仍然可用
+        assert data["next_cursor"] is not None
+
+    def test_paging_with_fields_matches_full_listing(self):
+        """使用 fields 逐页读取的结果与不使用时一致"""
+        expected = [product["id"] for product in fetch_all_pages("category", page_size=5)]
+        paged = [product["id"] for product in fetch_all_pages("sample", page_size=5, fields=["title"])]
+        assert paged == expected
+
+    @pytest.mark.parametrize("path,fields,expected", [
+        ("/api/product/all", "title,category_name", {"id", "title", "category_name"}),
+        ("/api/product/all", "user_limit_quantity", {"id", "user_limit_quantity"}),
+    ])
+    def test_all_products_fields(self, path, fields, expected):
+        """所有产品列表按字段组合返回"""
+        response = client.get(path, params={"fields": fields})
+        assert response.status_code == 200, response.text
+        assert all(set(product) == expected for product in response.json()["products"])
+
+    def test_search_fields(self):
+        """搜索结果只返回请求的字段"""
+        response = client.post("/api/product/search/keyword", json={"keyword": "a", "fields": ["title", "category_name"]})
+        assert response.status_code == 200, response.text
+        assert all(set(product) == {"id", "title", "category_name"} for product in response.json()["products"])
+
+    @pytest.mark.parametrize("path", [f"/api/product/categories/{CATEGORY_ID}", "/api/product/all"])
+    def test_unknown_field(self, path):
+        """不支持的字段返回 400"""
+        response = client.get(path, params={"fields": "title,password"})
+        assert response.status_code == 400
+
+    def test_query_only_selects_requested_columns(self):
+        """查询语句只包含请求的列和排序列"""
+        from utils.product_query import build_category_products_query
+        sql = str(build_category_products_query(CATEGORY_ID, sort="selling_price", fields=("id", "title")))
+        assert "products.title" in sql and "products.selling_price" in sql
+        assert "products.description" not in sql and "products.variations" not in sql
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,137 @@
+"""
+接口 SQL 查询次数集成测试
+通过 X-Query-Count 响应头验证订单列表和购物车详情接口的查询次数不随订单、商品数量增长（无 N+1 查询）
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from models.cart_item import CartItem
+from models.product import Product
+from utils.config import settings
+from utils.database import SessionLocal
+from main import app
+
+ORDER_LIST_ENDPOINTS = [
+    "/api/order/list",
+    "/api/order/admin/pending",
+    "/api/order/admin/processed",
+    "/api/order/logistics/processing",
+    "/api/order/logistics/shipped",
+    "/api/order/logistics/sample_processed_orders",
+    "/api/order/logistics/customs",
+    "/api/order/logistics/cleared",
+    "/api/order/logistics/delivered",
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    """开启查询计数的测试客户端"""
+    settings.QUERY_COUNTER_ENABLED = True
+    yield TestClient(app)
+    settings.QUERY_COUNTER_ENABLED = False
+
+
+def query_count(response):
+    """读取响应头中的查询次数"""
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-Query-Count"])
+
+
+def create_order(client, item_count=3):
+    """创建一个包含多个商品的待审核订单"""
+    response = client.post("/api/order/create", json={
+        "user_id": 1,
+        "customer_name": "查询计数测试",
+        "items": [
+            {
+                "product_id": "9e31dc48-e690-4963-ad82-0e7dd8b6b360",
+                "product_name": "查询计数测试商品",
+                "quantity": 1,
+                "price": 10.0
+            }
+            for _ in range(item_count)
+        ]
+    })
+    assert response.status_code == 200, response.text
+
+
+class TestOrderListQueryCount:
+    """订单列表接口查询次数测试类"""
+
+    @pytest.mark.parametrize("endpoint", ORDER_LIST_ENDPOINTS)
+    def test_query_count_is_constant(self, client, endpoint):
+        """新增订单后，列表接口的查询次数保持不变"""
+        before = query_count(client.post(endpoint, json={"user_id": 1}))
+
+        for _ in range(3):
+            create_order(client)
+
+        after = query_count(client.post(endpoint, json={"user_id": 1}))
+
+        assert after == before, f"{endpoint} 查询次数从 {before} 增长到 {after}"
+        # 订单查询 + 订单商品批量查询
+        assert after <= 2, f"{endpoint} 执行了 {after} 条 SQL"
+
+
+@pytest.fixture
+def cart_id(client):
+    """用户 3 的购物车（测试结束后清空）"""
+    cart_id = client.post("/api/cart/getCartId", json={"user_id": 3}).json()["cartId"]
+    yield cart_id
+    db = SessionLocal()
+    db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+    db.commit()
+    db.close()
+
+
+class TestCartQueryCount:
+    """购物车详情接口查询次数测试类"""
+
+    def test_cart_data_query_count_is_constant(self, client, cart_id):
+        """购物车中的商品从 2 件增加到 20 件，查询次数保持不变，小计和总金额正确"""
+        db = SessionLocal()
+        products = [
+            {"id": product.id, "moq": product.moq, "selling_price": product.selling_price}
+            for product in db.scalars(select(Product).order_by(Product.id).limit(20))
+        ]
+        db.close()
+
+        def add(products):
+            for product in products:
+                response = client.post("/api/cart/add_item", json={
+                    "cart_id": cart_id, "product_id": product["id"], "quantity": product["moq"]
+                })
+                assert response.status_code == 200, response.text
+
+        add(products[:2])
+        before = query_count(client.get(f"/api/cart/get_cart_data/{cart_id}"))
+        add(products[2:])
+        response = client.get(f"/api/cart/get_cart_data/{cart_id}")
+        after = query_count(response)
+
+        assert after == before, f"购物车详情查询次数从 {before} 增长到 {after}"
+        # 购物车是否存在 + 商品行 JOIN 产品
+        assert after <= 2, f"购物车详情执行了 {after} 条 SQL"
+
+        data = response.json()
+        assert [item["product_id"] for item in data["items"]] == [product["id"] for product in products]
+        for item, product in zip(data["items"], products):
+            assert item["unitPrice"] == product["selling_price"]
+            assert item["totalPrice"] == item["unitPrice"] * product["moq"]
+        assert data["summary"]["totalAmount"] == round(sum(item["totalPrice"] for item in data["items"]), 2)
+
+    def test_missing_cart(self, client):
+        """购物车不存在时返回 404"""
+        assert client.get("/api/cart/get_cart_data/999999999").status_code == 404
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,67 @@
+"""
+产品搜索引擎测试
+验证分词（大小写、葡萄牙语重音、中文）、BM25 排序、前缀匹配和增量更新
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from utils.search_engine import ProductSearchEngine, tokenize
+
+
+@pytest.fixture
+def engine():
+    """包含少量产品的搜索引擎"""
+    engine = ProductSearchEngine()
+    engine.build([
+        ("p1", "Suporte Veicular Rotação 360°", "Suporte para celular", ["veicular"]),
+        ("p2", "Kit 2 Suporte Capacete", "Suporte de parede", ["kit"]),
+        ("p3", "Antena Digital 4K", "数字电视天线", ["premium"]),
+    ])
+    return engine
+
+
+class TestProductSearchEngine:
+    """产品搜索引擎测试类"""
+
+    def test_tokenize_folds_case_and_accents(self):
+        """分词统一大小写并去除重音"""
+        assert tokenize("ROTAÇÃO Câmera") == ["rotacao", "camera"]
+
+    def test_accent_insensitive_search(self, engine):
+        """不带重音的关键词能搜索到带重音的标题"""
+        assert [doc_id for doc_id, _ in engine.search("rotacao")] == ["p1"]
+
+    def test_all_terms_required_and_ranked(self, engine):
+        """多个关键词需全部命中"""
+        assert {doc_id for doc_id, _ in engine.search("suporte")} == {"p1", "p2"}
+        assert [doc_id for doc_id, _ in engine.search("suporte veicular")] == ["p1"]
+
+    def test_prefix_match_on_last_term(self, engine):
+        """最后一个关键词按前缀匹配"""
+        assert [doc_id for doc_id, _ in engine.search("suporte capa")] == ["p2"]
+        assert engine.search("capa suporte") == []
+
+    def test_chinese_search(self, engine):
+        """中文按双字匹配"""
+        assert [doc_id for doc_id, _ in engine.search("天线")] == ["p3"]
+
+    def test_incremental_update(self, engine):
+        """新增、更新、删除产品后索引立即生效"""
+        engine.add_document("p4", "Pneu Aro 14", None, ["pneu"])
+        assert [doc_id for doc_id, _ in engine.search("pneu")] == ["p4"]
+
+        engine.add_document("p4", "Roda Aro 14", None, [])
+        assert engine.search("pneu") == []
+
+        engine.remove_document("p4")
+        assert engine.search("roda") == []
+        assert len(engine) == 3
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
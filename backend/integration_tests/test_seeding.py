@@ -0,0 +1,76 @@
+"""
+测试数据初始化集成测试
+验证 fixture 未变化的表被跳过，变化时只插入新增的行
+"""
+import sys
+import os
+import json
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from sqlalchemy import delete, func, select
+from models.category import Category
+from models.order import Order, OrderItem
+from models.seed_checksum import SeedChecksum
+from utils.database import SessionLocal
+from utils.seeding import FIXTURE_PATH, checksum, seed_fixture_data
+
+
+@pytest.fixture
+def fixture_data():
+    """原始 fixture 数据"""
+    with open(FIXTURE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def changed_fixture(tmp_path, fixture_data):
+    """新增一个类别和一个订单的 fixture 文件，测试结束后删除新增的行并恢复校验和"""
+    fixture_data['categories'].append({"id": "SEEDTEST", "name": "初始化测试类别"})
+    order = dict(fixture_data['orders'][0], id="ORD-SEEDTEST")
+    fixture_data['orders'].append(order)
+    path = tmp_path / "mock-data.json"
+    path.write_text(json.dumps(fixture_data, ensure_ascii=False), encoding='utf-8')
+    yield str(path)
+
+    db = SessionLocal()
+    db.execute(delete(OrderItem).where(OrderItem.order_id == "ORD-SEEDTEST"))
+    db.execute(delete(Order).where(Order.id == "ORD-SEEDTEST"))
+    db.execute(delete(Category).where(Category.id == "SEEDTEST"))
+    db.commit()
+    db.close()
+    seed_fixture_data()
+
+
+class TestSeeding:
+    """测试数据初始化测试类"""
+
+    def test_unchanged_fixture_is_skipped(self, fixture_data):
+        """校验和已记录且未变化时不写入任何表"""
+        assert seed_fixture_data() == {}
+
+        db = SessionLocal()
+        stored = dict(db.execute(select(SeedChecksum.table_name, SeedChecksum.checksum)).all())
+        db.close()
+        assert stored["products"] == checksum(fixture_data["products"])
+
+    def test_changed_fixture_inserts_only_new_rows(self, changed_fixture, fixture_data):
+        """只有变化的表重新写入，已存在的行保持不变，新订单的订单商品一起写入"""
+        seeded = seed_fixture_data(changed_fixture)
+        assert seeded == {"categories": 1, "orders": 1}
+
+        db = SessionLocal()
+        assert db.get(Category, "SEEDTEST").name == "初始化测试类别"
+        items = db.scalar(select(func.count()).select_from(OrderItem).where(OrderItem.order_id == "ORD-SEEDTEST"))
+        db.close()
+        assert items == len(fixture_data["orders"][0]["items"])
+
+        # 再次执行时跳过
+        assert seed_fixture_data(changed_fixture) == {}
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+序列化层测试
+验证预编译的转换函数和 ORJSONResponse 对 datetime、Decimal、NULL 和额外字段的处理
+"""
+import sys
+import os
+import json
+from datetime import datetime
+from decimal import Decimal
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from models.order import Order
+from models.product import Product
+from utils.serializer import compile_serializer, ORJSONResponse
+from utils.product_query import DETAIL_PRODUCT_FIELDS
+
+client = TestClient(app)
+
+
+class TestSerializer:
+    """序列化层测试类"""
+
+    def test_product_fields(self):
+        """按字段顺序输出，datetime 转换为 ISO 字符串，额外字段从关键字参数读取"""
+        product = Product(id="P1", title="产品", selling_price=9.9, created_at=datetime(2024, 1, 15, 10, 30))
+        serialize = compile_serializer(Product, ("id", "title", "category_name", "selling_price", "created_at", "updated_at"))
+
+        result = serialize(product, category_name="类别")
+        assert list(result) == ["id", "title", "category_name", "selling_price", "created_at", "updated_at"]
+        assert result == {
+            "id": "P1",
+            "title": "产品",
+            "category_name": "类别",
+            "selling_price": 9.9,
+            "created_at": "2024-01-15T10:30:00",
+            "updated_at": None
+        }
+        assert serialize(product)["category_name"] is None
+
+    def test_decimal_columns(self):
+        """Numeric 列的 Decimal 值转换为 float"""
+        order = Order(id="O1", total_amount=Decimal("12.50"))
+        assert compile_serializer(Order, ("id", "total_amount"))(order) == {"id": "O1", "total_amount": 12.5}
+
+    def test_serializer_is_compiled_once(self):
+        """同一字段组合复用同一个转换函数"""
+        assert compile_serializer(Product, DETAIL_PRODUCT_FIELDS) is compile_serializer(Product, DETAIL_PRODUCT_FIELDS)
+
+    def test_response_encodes_datetime_and_decimal(self):
+        """ORJSONResponse 直接编码 datetime、Decimal 和非字符串键"""
+        response = ORJSONResponse({"at": datetime(2024, 1, 15, 10, 30), "amount": Decimal("1.10"), 1: "一"})
+        assert json.loads(response.body) == {"at": "2024-01-15T10:30:00", "amount": 1.1, "1": "一"}
+
+    def test_response_rejects_unknown_types(self):
+        """不支持的类型抛出异常，而不是静默输出"""
+        with pytest.raises(TypeError):
+            ORJSONResponse({"value": object()})
+
+    def test_app_uses_orjson_by_default(self):
+        """应用默认响应类为 ORJSONResponse"""
+        assert app.router.default_response_class is ORJSONResponse
+        response = client.get("/api/health")
+        assert response.status_code == 200
+        assert response.json()["status"] == "healthy"
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
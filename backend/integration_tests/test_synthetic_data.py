@@ -0,0 +1,100 @@
+"""
+合成数据生成器集成测试
+验证生成结果确定、满足唯一约束和引用关系，并能批量写入和整体删除
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from sqlalchemy import func, select
+from models.product import Product
+from models.order import Order, OrderItem
+from models.cart_item import CartItem
+from models.sample_purchase import SamplePurchase
+from models.tag import ProductTag
+from utils.database import SessionLocal
+from utils.synthetic_data import (
+    ID_PREFIX, generate, generate_carts, generate_orders, generate_products, generate_sample_purchases,
+    product_basics, product_id, reset, validate_counts
+)
+
+COUNTS = {
+    "users": 20, "categories": 4, "suppliers": 3, "products": 50,
+    "carts": 10, "orders": 30, "sample_purchases": 60,
+}
+
+
+def count(db, model, *conditions):
+    """统计满足条件的行数"""
+    return db.scalar(select(func.count()).select_from(model).where(*conditions))
+
+
+class TestSyntheticData:
+    """合成数据生成器测试类"""
+
+    def test_generation_is_deterministic(self):
+        """相同的种子生成相同的数据，增加数量时已生成的行保持不变"""
+        first = list(generate_products(50, 1, 4, 3))
+        assert first == list(generate_products(50, 1, 4, 3))
+        assert list(generate_products(100, 1, 4, 3))[:50] == first
+        assert first != list(generate_products(50, 2, 4, 3))
+
+    def test_rows_satisfy_constraints(self):
+        """订单和购物车商品引用已生成的产品，价格与产品一致；购物车商品和小样购买记录不重复"""
+        products = {product_id(n) for n in range(COUNTS["products"])}
+        for order, items in generate_orders(COUNTS["orders"], 1, COUNTS["users"], COUNTS["products"]):
+            assert items and {item["product_id"] for item in items} <= products
+            assert order["total_amount"] == round(sum(item["price"] * item["quantity"] for item in items), 2)
+            index = int(items[0]["product_id"][len(ID_PREFIX) + 1:])
+            assert items[0]["price"] == product_basics(index)[2]
+
+        for cart, items in generate_carts(COUNTS["carts"], 1, COUNTS["products"]):
+            assert len({item["product_id"] for item in items}) == len(items)
+
+        pairs = [(row["user_id"], row["product_id"])
+                 for row in generate_sample_purchases(COUNTS["sample_purchases"], 1, COUNTS["users"], COUNTS["products"])]
+        assert len(set(pairs)) == len(pairs)
+
+    def test_invalid_counts(self):
+        """购物车多于用户，或小样购买记录超过用户数 × 产品数时报错"""
+        with pytest.raises(ValueError):
+            validate_counts(dict(COUNTS, carts=COUNTS["users"] + 1))
+        with pytest.raises(ValueError):
+            validate_counts(dict(COUNTS, users=1, products=1, carts=1, sample_purchases=2))
+
+    def test_generate_and_reset(self):
+        """批量写入所有表（包括产品标签关联），并能整体删除"""
+        try:
+            written = generate(COUNTS, seed=3, batch_size=7)
+            assert written == COUNTS
+
+            db = SessionLocal()
+            try:
+                assert count(db, Product, Product.id.like(f"{ID_PREFIX}%")) == COUNTS["products"]
+                assert count(db, Order, Order.id.like(f"{ID_PREFIX}%")) == COUNTS["orders"]
+                assert count(db, OrderItem, OrderItem.order_id.like(f"{ID_PREFIX}%")) >= COUNTS["orders"]
+                assert count(db, CartItem, CartItem.product_id.like(f"{ID_PREFIX}%")) >= COUNTS["carts"]
+                assert count(db, SamplePurchase, SamplePurchase.product_id.like(f"{ID_PREFIX}%")) == COUNTS["sample_purchases"]
+                tagged = sum(1 for product in generate_products(COUNTS["products"], 3, 4, 3) for _ in product["tags"])
+                assert count(db, ProductTag, ProductTag.product_id.like(f"{ID_PREFIX}%")) == tagged
+            finally:
+                db.close()
+
+            # 已有合成数据时拒绝重复生成
+            with pytest.raises(ValueError):
+                generate(COUNTS, seed=3)
+        finally:
+            reset()
+
+        db = SessionLocal()
+        assert count(db, Product, Product.id.like(f"{ID_PREFIX}%")) == 0
+        assert count(db, Order, Order.id.like(f"{ID_PREFIX}%")) == 0
+        db.close()
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
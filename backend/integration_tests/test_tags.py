@@ -0,0 +1,110 @@
+"""
+标签注册表集成测试
+验证标签列表来自数据库、按标签分页查询产品，以及创建产品时写入标签关联
+"""
+import sys
+import os
+
+# 添加 backend 目录到 Python 路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from utils.config import settings
+
+client = TestClient(app)
+
+
+def get_tags():
+    """读取标签列表，返回 {显示名称: 标签}"""
+    response = client.get("/api/product/tags")
+    assert response.status_code == 200, response.text
+    return {tag["display_name"]: tag for tag in response.json()["tags"]}
+
+
+def tag_product_ids(tag_id, page_size=3):
+    """按游标逐页读取标签下的所有产品ID"""
+    ids, cursor = [], None
+    while True:
+        params = {"page_size": page_size, "fields": "title"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/api/product/tags/{tag_id}/products", params=params)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        ids.extend(product["id"] for product in data["products"])
+        if not data["has_more"]:
+            return ids
+        cursor = data["next_cursor"]
+
+
+class TestTagRegistry:
+    """标签注册表测试类"""
+
+    def test_builtin_and_product_tags_are_registered(self):
+        """内置标签和产品中出现的标签都在标签列表中，并带有产品数量"""
+        tags = get_tags()
+        assert tags["热销商品"]["id"] == "tag-003"
+        assert tags["热销商品"]["color"] == "#f59e0b"
+
+        products = client.get("/api/product/all", params={"fields": "tags"}).json()["products"]
+        expected = sum(1 for product in products if "premium" in (product["tags"] or []))
+        assert expected > 0
+        assert tags["premium"]["product_count"] == expected
+
+    def test_tag_listing_matches_product_tags(self):
+        """标签产品列表与产品 tags 字段一致，按创建时间倒序分页不重复"""
+        tag = get_tags()["premium"]
+        products = client.get("/api/product/all", params={"fields": "tags"}).json()["products"]
+        expected = [product["id"] for product in products if "premium" in (product["tags"] or [])]
+
+        ids = tag_product_ids(tag["id"], page_size=2)
+        assert len(ids) == len(set(ids))
+        assert ids == expected
+
+    def test_create_product_writes_tags(self):
+        """创建产品时写入标签关联，新标签自动注册"""
+        response = client.post("/api/product/create", json={
+            "name": "标签测试产品",
+            "description": "标签注册表测试",
+            "price": 20,
+            "category_id": "MLB5672",
+            "supplier_id": "SUP001",
+            "stock": 5,
+            "tags": ["热销商品", " 标签测试新标签 ", "热销商品"]
+        })
+        assert response.status_code == 200, response.text
+        product = response.json()["product"]
+        assert product["tags"] == ["热销商品", "标签测试新标签"]
+
+        tags = get_tags()
+        assert tags["标签测试新标签"]["product_count"] == 1
+        assert product["id"] in tag_product_ids("tag-003", page_size=settings.PRODUCT_PAGE_SIZE_MAX)
+        assert tag_product_ids(tags["标签测试新标签"]["id"]) == [product["id"]]
+
+    def test_invalid_tags_are_rejected(self):
+        """tags 不是字符串列表时返回 400"""
+        response = client.post("/api/product/create", json={
+            "name": "标签测试产品",
+            "description": "标签注册表测试",
+            "price": 20,
+            "category_id": "MLB5672",
+            "supplier_id": "SUP001",
+            "stock": 5,
+            "tags": "热销商品"
+        })
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("path,status", [
+        ("/api/product/tags/not-a-tag/products", 404),
+        ("/api/product/tags/tag-001/products?sort=title", 400),
+    ])
+    def test_invalid_listing_requests(self, path, status):
+        """不存在的标签返回 404，无效的排序返回 400"""
+        assert client.get(path).status_code == status
+
+
+if __name__ == "__main__":
+    # 运行测试
+    pytest.main([__file__, "-v"])
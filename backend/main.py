@@ -1,9 +1,14 @@
 import uvicorn
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from utils.config import settings
-from utils.database import verify_connection, engine, check_database_exists, create_database_with_tables
+from utils.database import verify_connection, engine, async_engine, check_database_exists, create_database_with_tables
+from utils.serializer import ORJSONResponse
+from utils.query_counter import install_query_counter, start_query_count, stop_query_count, get_query_count
+from utils import invalidation
+from utils.migrations import check_required_indexes, run_migrations
+from utils.cart_store import cart_store
 from api import auth, product, cart, order, pay
 
 # 应用启动时连接数据库
@@ -17,6 +22,12 @@ async def lifespan(app: FastAPI):
         
         if db_exists is True:
             print("✅ brail_db 数据库存在")
+            # 已有的数据库执行未完成的迁移（新建的数据库在建表时已执行）
+            if settings.MIGRATE_ON_STARTUP:
+                try:
+                    run_migrations()
+                except Exception as e:
+                    print(f"❌ 数据库迁移失败，请手动执行 python -m utils.migrations: {str(e)}")
         elif db_exists is False:
             print("⚠️ brail_db 数据库不存在，正在自动创建数据库和表...")
             # 自动创建 brail_db 数据库和所有表
@@ -30,15 +41,33 @@ async def lifespan(app: FastAPI):
     else:
         print("❌ 数据库连接验证失败，请检测数据库是否开启并正确配置")
     
+    # 检查写路径依赖的唯一索引，缺失时记录错误并停用对应的写操作
+    if check_required_indexes() == []:
+        print("✅ 必需的唯一索引均已创建")
+    
+    # 订阅跨进程缓存失效消息
+    invalidation.start_listener()
+    
+    # 启用 Redis 购物车时启动后台写回任务
+    cart_store.start_writer()
+    
     # 应用启动完成
     print("FastAPI 应用启动完成")
     
     yield
     # 关闭时执行（如果需要）
     print("正在关闭 FastAPI 应用...")
+    # 停止缓存失效订阅线程
+    invalidation.stop_listener()
+    # 停止购物车写回任务并写回剩余的购物车
+    await cart_store.stop_writer()
+    # 释放异步引擎连接池
+    if async_engine is not None:
+        await async_engine.dispose()
     print("✅ 应用已安全关闭")
 
-app = FastAPI(lifespan=lifespan)
+# 默认使用 orjson 编码响应
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # 配置 CORS
 app.add_middleware(
@@ -49,6 +78,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 注册 SQL 查询计数器（同步、异步引擎均统计）
+install_query_counter(engine)
+if async_engine is not None:
+    install_query_counter(async_engine)
+
+@app.middleware("http")
+async def query_count_middleware(request: Request, call_next):
+    """统计每个请求执行的 SQL 数量，并通过 X-Query-Count 响应头返回"""
+    if not settings.QUERY_COUNTER_ENABLED:
+        return await call_next(request)
+    token = start_query_count()
+    try:
+        response = await call_next(request)
+        response.headers["X-Query-Count"] = str(get_query_count())
+        return response
+    finally:
+        stop_query_count(token)
+
 # 健康检查接口  
 @app.get("/api/health")
 async def health_check():
@@ -9,5 +9,8 @@ from .supplier import Supplier
 from .product import Product
 from .order import Order, OrderItem
 from .sample_purchase import SamplePurchase
+from .tag import Tag, ProductTag
+from .catalog_tombstone import CatalogTombstone
+from .seed_checksum import SeedChecksum
 
-__all__ = ["User", "Category", "Cart", "CartItem", "Supplier", "Product", "Order", "OrderItem", "SamplePurchase"]
+__all__ = ["User", "Category", "Cart", "CartItem", "Supplier", "Product", "Order", "OrderItem", "SamplePurchase", "Tag", "ProductTag", "CatalogTombstone", "SeedChecksum"]
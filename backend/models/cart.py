@@ -1,7 +1,7 @@
 """
 购物车主表模型定义
 """
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from utils.database import Base
 
@@ -18,5 +18,10 @@ class Cart(Base):
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     
+    # 唯一索引：每个用户只有一个购物车（获取购物车ID的 insert-or-get 语句依赖该约束）
+    __table_args__ = (
+        Index("uq_carts_user_id", "user_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<Cart(id={self.id}, user_id={self.user_id}, created_at='{self.created_at}')>"
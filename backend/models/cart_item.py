@@ -1,7 +1,7 @@
 """
 购物车项目表模型定义
 """
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.sql import func
 from utils.database import Base
 
@@ -26,5 +26,10 @@ class CartItem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
+    # 唯一索引：同一购物车中每个商品只有一行（加入购物车的 upsert 依赖该约束累加数量）
+    __table_args__ = (
+        Index("uq_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
+    
     def __repr__(self):
         return f"<CartItem(id={self.id}, cart_id={self.cart_id}, product_id={self.product_id}, quantity={self.quantity}, price={self.price})>"
@@ -0,0 +1,28 @@
+"""
+目录删除记录模型定义
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from utils.database import Base
+
+class CatalogTombstone(Base):
+    """类别、供应商、产品的删除记录（变更订阅以墓碑形式返回删除）"""
+    __tablename__ = "catalog_tombstones"
+
+    # 主键
+    id = Column(Integer, primary_key=True, autoincrement=True, comment="删除记录ID")
+
+    # 被删除的记录
+    entity = Column(String(20), nullable=False, comment="实体类型(category/supplier/product)")
+    entity_id = Column(String(50), nullable=False, comment="被删除记录的ID")
+
+    # 时间戳
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), comment="删除时间")
+
+    # 变更订阅按 deleted_at 增量读取
+    __table_args__ = (
+        Index("idx_catalog_tombstones_deleted", "deleted_at", "id"),
+    )
+
+    def __repr__(self):
+        return f"<CatalogTombstone(id={self.id}, entity={self.entity}, entity_id={self.entity_id})>"
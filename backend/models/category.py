@@ -1,7 +1,7 @@
 """
 产品类别模型定义
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.sql import func
 from utils.database import Base
 
@@ -21,5 +21,10 @@ class Category(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
+    # 变更订阅按 updated_at 增量读取
+    __table_args__ = (
+        Index("idx_categories_updated", "updated_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Category(id={self.id}, name='{self.name}', icon='{self.icon}')>"
@@ -1,7 +1,7 @@
 """
 订单模型定义
 """
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from utils.database import Base
 from sqlalchemy.sql import func
@@ -45,7 +45,19 @@ class Order(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
     # 关联订单商品
-    items = relationship("OrderItem", backref="order", cascade="all, delete-orphan")
+    items = relationship("OrderItem", backref="order", cascade="all, delete-orphan", order_by="OrderItem.id")
+    
+    # 复合索引：与订单列表的筛选和排序方式（ORDER BY order_date DESC, id DESC）一致
+    __table_args__ = (
+        # 待审核 / 已处理列表：按 status + status_step 筛选
+        Index("idx_orders_status_step_date", "status", "status_step", "order_date", "id"),
+        # 物流各状态列表：只按 status 筛选
+        Index("idx_orders_status_date", "status", "order_date", "id"),
+        # 用户订单列表
+        Index("idx_orders_user_date", "user_id", "order_date", "id"),
+        # 不按等值条件筛选的列表（如已处理订单）直接按索引顺序分页
+        Index("idx_orders_date", "order_date", "id"),
+    )
     
     def __repr__(self):
         return f"<Order(id={self.id}, user_id={self.user_id}, status={self.status}, total_amount={self.total_amount})>"
@@ -59,7 +71,7 @@ class OrderItem(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True, comment="订单商品项ID")
     
     # 外键
-    order_id = Column(String(50), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, comment="订单ID")
+    order_id = Column(String(50), ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True, comment="订单ID")
     product_id = Column(String(50), ForeignKey("products.id"), nullable=False, comment="商品ID")
     
     # 商品信息（快照，防止商品信息变更影响历史订单）
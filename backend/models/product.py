@@ -1,9 +1,9 @@
 """
 产品模型定义
 """
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Float, Numeric, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, backref
 from utils.database import Base
 
 class Product(Base):
@@ -35,9 +35,10 @@ class Product(Base):
         comment="供应商ID"
     )
     
-    # 关系定义（使用 passive_deletes='all' 完全依赖数据库的级联删除）
-    category = relationship("Category", backref="products", passive_deletes='all')
-    supplier = relationship("Supplier", backref="products", passive_deletes='all')
+    # 关系定义（一对多一侧使用 passive_deletes='all' 完全依赖数据库的级联删除，
+    # 删除类别或供应商时不加载、不修改其产品）
+    category = relationship("Category", backref=backref("products", passive_deletes='all'))
+    supplier = relationship("Supplier", backref=backref("products", passive_deletes='all'))
     
     # 物流信息
     shipping_from = Column(String(255), nullable=True, comment="发货地")
@@ -57,8 +58,9 @@ class Product(Base):
     
     # 价格信息
     cost_price = Column(Float, nullable=True, comment="成本价")
-    selling_price = Column(Float, nullable=False, comment="实际售价单价(BRL)")
-    discount_price = Column(Float, nullable=True, comment="折扣价(BRL)")
+    # 价格按两位小数精确保存（游标分页按价格排序时需要精确的相等和大小比较），读取时仍为 float
+    selling_price = Column(Numeric(10, 2, asdecimal=False), nullable=False, comment="实际售价单价(BRL)")
+    discount_price = Column(Numeric(10, 2, asdecimal=False), nullable=True, comment="折扣价(BRL)")
     product_mlb_price = Column(String(50), nullable=True, comment="MLB售价(BRL)")
     roi = Column(String(20), nullable=True, comment="投资回报率")
     
@@ -69,6 +71,15 @@ class Product(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
+    # 复合索引（类别产品列表按各排序字段的游标分页；变更订阅按 updated_at 增量读取）
+    __table_args__ = (
+        Index("idx_products_category_created", "category_id", "created_at", "id"),
+        Index("idx_products_category_selling_price", "category_id", "selling_price", "id"),
+        Index("idx_products_category_discount_price", "category_id", "discount_price", "id"),
+        Index("idx_products_category_stock", "category_id", "stock_quantity", "id"),
+        Index("idx_products_updated", "updated_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Product(id={self.id}, title='{self.title}', category_id={self.category_id}, supplier_id={self.supplier_id})>"
 
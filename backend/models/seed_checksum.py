@@ -0,0 +1,24 @@
+"""
+测试数据校验和模型定义
+"""
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from utils.database import Base
+
+class SeedChecksum(Base):
+    """记录每张表最近一次写入的 fixture 数据校验和（数据未变化时跳过该表，整个文件未变化时不再解析文件）"""
+    __tablename__ = "seed_checksums"
+
+    # 主键
+    table_name = Column(String(64), primary_key=True, comment="表名")
+
+    # fixture 中该表数据的校验和
+    checksum = Column(String(64), nullable=False, comment="fixture 数据的 SHA-256 校验和")
+    fixture_checksum = Column(String(64), nullable=True, comment="最近一次检查时整个 fixture 文件的校验和")
+    row_count = Column(Integer, nullable=False, default=0, comment="fixture 中的行数")
+
+    # 时间戳
+    seeded_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="最近一次写入时间")
+
+    def __repr__(self):
+        return f"<SeedChecksum(table_name={self.table_name}, checksum={self.checksum[:12]})>"
@@ -1,7 +1,7 @@
 """
 供应商模型定义
 """
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index
 from sqlalchemy.sql import func
 from utils.database import Base
 
@@ -20,6 +20,11 @@ class Supplier(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
     
+    # 变更订阅按 updated_at 增量读取
+    __table_args__ = (
+        Index("idx_suppliers_updated", "updated_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Supplier(id={self.id}, name='{self.name}', location='{self.location}')>"
 
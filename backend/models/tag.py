@@ -0,0 +1,53 @@
+"""
+产品标签模型定义
+"""
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.sql import func
+from utils.database import Base
+
+class Tag(Base):
+    """标签表模型"""
+    __tablename__ = "tags"
+
+    # 主键
+    id = Column(String(50), primary_key=True, index=True, comment="标签ID")
+
+    # 基本信息（display_name 即产品 tags 字段中保存的标签文本）
+    name = Column(String(100), nullable=False, comment="标签英文名称")
+    display_name = Column(String(100), nullable=False, unique=True, index=True, comment="标签显示名称")
+    color = Column(String(20), nullable=True, comment="标签颜色")
+    description = Column(Text, nullable=True, comment="标签描述")
+
+    # 时间戳
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), comment="创建时间")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), comment="更新时间")
+
+    def __repr__(self):
+        return f"<Tag(id={self.id}, display_name='{self.display_name}')>"
+
+
+class ProductTag(Base):
+    """产品-标签关联表"""
+    __tablename__ = "product_tags"
+
+    # 复合主键 (tag_id, product_id)：按标签查找产品时直接使用主键索引
+    tag_id = Column(
+        String(50),
+        ForeignKey('tags.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment="标签ID"
+    )
+    product_id = Column(
+        String(50),
+        ForeignKey('products.id', ondelete='CASCADE'),
+        primary_key=True,
+        comment="产品ID"
+    )
+
+    # 按产品查找标签（更新产品标签时删除旧关联）
+    __table_args__ = (
+        Index("idx_product_tags_product", "product_id"),
+    )
+
+    def __repr__(self):
+        return f"<ProductTag(tag_id={self.tag_id}, product_id={self.product_id})>"
@@ -0,0 +1,87 @@
+"""
+用户购物车ID缓存
+用户与购物车的对应关系创建后不再变化，缓存在所有工作进程共享的 Redis 哈希 cart:user_ids（用户ID -> 购物车ID）中：
+- 命中时 /api/cart/getCartId 不执行任何 SQL
+- 未命中时通过一条 insert-or-get 语句获取（或创建）购物车，再写入缓存
+- Redis 不可用时直接查询数据库，并在 CART_ID_CACHE_RETRY_SECONDS 秒内不再尝试 Redis
+"""
+import time
+from utils.cart_query import get_or_create_cart_id
+from utils.config import settings
+from utils.session import redis_client
+
+
+class UserCartCache:
+    """用户购物车ID缓存（每个工作进程一份，数据存放在 Redis 中）"""
+
+    KEY = "cart:user_ids"
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else redis_client
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+        self._redis_down_until = 0.0
+
+    def _redis_available(self):
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action, error):
+        self.stats["errors"] += 1
+        self._redis_down_until = time.monotonic() + settings.CART_ID_CACHE_RETRY_SECONDS
+        print(f"⚠️ 购物车ID缓存{action}失败，暂时直接查询数据库: {str(error)}")
+
+    def _read(self, user_id):
+        """读取缓存的购物车ID，不存在或 Redis 不可用时返回 None"""
+        if not self._redis_available():
+            return None
+        try:
+            cart_id = self.client.hget(self.KEY, user_id)
+        except Exception as e:
+            self._redis_failed("读取", e)
+            return None
+        return int(cart_id) if cart_id is not None else None
+
+    def _write(self, user_id, cart_id):
+        """写入缓存"""
+        if not self._redis_available():
+            return
+        try:
+            self.client.hset(self.KEY, user_id, cart_id)
+        except Exception as e:
+            self._redis_failed("写入", e)
+
+    def clear(self):
+        """清空缓存（批量删除购物车后调用）"""
+        if not self._redis_available():
+            return
+        try:
+            self.client.delete(self.KEY)
+        except Exception as e:
+            self._redis_failed("清空", e)
+
+    async def get(self, db, user_id):
+        """
+        获取用户的购物车ID（没有时创建）
+
+        Args:
+            db: 当前请求的数据库会话（未命中时使用）
+            user_id: 用户ID
+
+        Returns:
+            int: 购物车ID
+        """
+        if not settings.CART_ID_CACHE_ENABLED:
+            return await get_or_create_cart_id(db, user_id)
+
+        cart_id = self._read(user_id)
+        if cart_id is not None:
+            self.stats["hits"] += 1
+            return cart_id
+
+        self.stats["misses"] += 1
+        cart_id = await get_or_create_cart_id(db, user_id)
+        self._write(user_id, cart_id)
+        return cart_id
+
+
+# 全局用户购物车ID缓存实例
+user_cart_cache = UserCartCache()
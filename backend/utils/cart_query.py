@@ -0,0 +1,409 @@
+"""
+购物车查询服务
+购物车详情通过一次 cart_items JOIN products 查询读取所有商品行及所需的产品列，
+遍历结果时同时计算每行小计和购物车总金额；查询次数与购物车中的商品数量无关
+加入购物车使用一条 INSERT ... SELECT 的 upsert 语句：购物车和商品是否存在、MOQ 校验、单价都在同一条语句中完成，
+已存在的商品行由 (cart_id, product_id) 唯一索引冲突转为原子的数量累加，并发加入不会丢失更新
+批量修改在内存中校验全部操作后，在一个事务中合并写入
+"""
+from sqlalchemy import bindparam, delete, exists, func, literal, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from models.cart import Cart
+from models.cart_item import CartItem
+from models.product import Product
+from utils.database import engine
+from utils.migrations import CART_ITEM_INDEX, CART_USER_INDEX, require_index
+
+# 产品没有主图时使用的占位图
+PLACEHOLDER_IMAGE = "https://via.placeholder.com/120x120/10b981/ffffff?text=Product"
+
+
+class CartNotFoundError(LookupError):
+    """购物车不存在"""
+
+
+class ProductNotFoundError(LookupError):
+    """商品不存在"""
+
+
+class CartItemNotFoundError(LookupError):
+    """购物车商品不存在"""
+
+
+class BelowMoqError(ValueError):
+    """数量小于商品的最小订购量"""
+
+
+# 批量修改支持的操作
+CART_OPERATIONS = ("add", "update", "remove")
+
+
+def build_cart_items_query(cart_id):
+    """
+    构建购物车商品查询（JOIN 产品表，只查询购物车页面需要的列）
+
+    产品已被删除的商品行不返回
+    """
+    return (
+        select(
+            CartItem.id,
+            CartItem.product_id,
+            CartItem.quantity,
+            CartItem.price,
+            Product.title,
+            Product.description,
+            Product.img,
+            Product.moq,
+        )
+        .join(Product, Product.id == CartItem.product_id)
+        .where(CartItem.cart_id == cart_id)
+        .order_by(CartItem.id)
+    )
+
+
+def serialize_cart_rows(rows):
+    """
+    将购物车商品行转换为接口返回的商品列表，并在同一次遍历中计算总金额
+
+    Returns:
+        tuple: (商品列表, 总金额)
+    """
+    items = []
+    total_amount = 0
+    for row in rows:
+        unit_price = float(row.price)
+        total_price = unit_price * row.quantity
+        total_amount += total_price
+        items.append({
+            "id": row.id,
+            "product_id": row.product_id,
+            "name": row.title,
+            "description": row.description,
+            "specification": "标准版本",  # 可以根据实际情况添加规格字段
+            "image": row.img or PLACEHOLDER_IMAGE,
+            "unitPrice": unit_price,
+            "totalPrice": total_price,
+            "quantity": row.quantity,
+            "moq": row.moq
+        })
+    return items, round(total_amount, 2)
+
+
+async def _cart_details(db, cart_id):
+    """读取购物车商品行并生成购物车详情"""
+    rows = (await db.execute(build_cart_items_query(cart_id))).all()
+    return cart_details(rows)
+
+
+def cart_details(rows):
+    """由购物车商品行生成接口返回的购物车详情（商品列表和总金额）"""
+    items, total_amount = serialize_cart_rows(rows)
+    return {
+        "items": items,
+        "summary": {
+            "totalAmount": total_amount
+        }
+    }
+
+
+def build_get_or_create_cart_statement(user_id, dialect_name=None):
+    """
+    构建查找或创建用户购物车的单条语句（依赖 carts.user_id 唯一索引，没有先查询再插入的竞争）
+
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)，结果的 lastrowid 即购物车ID
+    - SQLite / PostgreSQL: INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING id
+    """
+    dialect_name = dialect_name or engine.dialect.name
+    stmt = dialect_insert(dialect_name)(Cart).values(user_id=user_id)
+    if dialect_name == "mysql":
+        return stmt.on_duplicate_key_update(id=func.last_insert_id(Cart.id))
+    return stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id],
+        set_={"user_id": stmt.excluded.user_id},
+    ).returning(Cart.id)
+
+
+async def get_or_create_cart_id(db, user_id):
+    """
+    获取用户的购物车ID，用户没有购物车时创建（一条 SQL，并发的首次访问也只会创建一个购物车）
+
+    Raises:
+        MissingIndexError: carts.user_id 唯一索引不存在（每次调用都会新建购物车）
+
+    Returns:
+        int: 购物车ID
+    """
+    require_index(CART_USER_INDEX)
+    result = await db.execute(build_get_or_create_cart_statement(user_id))
+    cart_id = result.lastrowid if engine.dialect.name == "mysql" else result.scalar_one()
+    await db.commit()
+    return cart_id
+
+
+async def read_cart(db, cart_id):
+    """
+    读取购物车详情（两条 SQL：购物车是否存在、商品行 JOIN 产品）
+
+    Raises:
+        CartNotFoundError: 购物车不存在
+
+    Returns:
+        dict: items（商品列表）和 summary（总金额）
+    """
+    if await db.scalar(select(Cart.id).where(Cart.id == cart_id)) is None:
+        raise CartNotFoundError(f"购物车 {cart_id} 不存在")
+
+    return await _cart_details(db, cart_id)
+
+
+def build_add_item_statement(cart_id, product_id, quantity, dialect_name=None):
+    """
+    构建加入购物车的 upsert 语句
+
+    INSERT INTO cart_items (...) SELECT ... FROM products WHERE 商品存在 AND moq <= 数量 AND 购物车存在，
+    单价取商品的销售价格；(cart_id, product_id) 已存在时在数据库中累加数量：
+    - MySQL: ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity)
+    - SQLite / PostgreSQL: ON CONFLICT (cart_id, product_id) DO UPDATE SET quantity = quantity + excluded.quantity
+
+    购物车或商品不存在、数量小于 MOQ 时 SELECT 没有结果，语句影响行数为 0
+    """
+    dialect_name = dialect_name or engine.dialect.name
+    source = select(
+        literal(cart_id),
+        Product.id,
+        literal(quantity),
+        func.coalesce(Product.selling_price, 0),
+    ).where(
+        Product.id == product_id,
+        Product.moq <= quantity,
+        exists().where(Cart.id == cart_id),
+    )
+    columns = [CartItem.cart_id, CartItem.product_id, CartItem.quantity, CartItem.price]
+    return _add_quantity_on_conflict(dialect_insert(dialect_name)(CartItem).from_select(columns, source), dialect_name)
+
+
+def build_add_items_statement(rows, dialect_name=None):
+    """
+    构建批量加入购物车的多行 upsert 语句（rows 中的 cart_id、product_id、quantity、price 已校验）
+
+    已存在的 (cart_id, product_id) 同样在数据库中累加数量
+    """
+    dialect_name = dialect_name or engine.dialect.name
+    return _add_quantity_on_conflict(dialect_insert(dialect_name)(CartItem).values(rows), dialect_name)
+
+
+def dialect_insert(dialect_name):
+    """当前数据库方言支持冲突处理子句的 insert 构造函数"""
+    if dialect_name == "mysql":
+        return mysql.insert
+    return postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+
+
+def _add_quantity_on_conflict(stmt, dialect_name):
+    """(cart_id, product_id) 冲突时累加数量"""
+    if dialect_name == "mysql":
+        return stmt.on_duplicate_key_update(
+            quantity=CartItem.quantity + stmt.inserted.quantity,
+            updated_at=func.now(),
+        )
+    return stmt.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.product_id],
+        set_={
+            "quantity": CartItem.quantity + stmt.excluded.quantity,
+            "updated_at": func.now(),
+        },
+    )
+
+
+async def add_cart_item(db, cart_id, product_id, quantity):
+    """
+    将商品加入购物车（已存在时累加数量），并提交事务
+
+    正常情况下只执行 upsert 和读取结果行两条 SQL；upsert 未写入任何行时再查询具体原因
+
+    Raises:
+        CartNotFoundError: 购物车不存在
+        ProductNotFoundError: 商品不存在
+        BelowMoqError: 数量小于最小订购量
+        MissingIndexError: (cart_id, product_id) 唯一索引不存在（upsert 无法累加数量）
+
+    Returns:
+        tuple: (购物车商品行 (id, quantity), 是否为新加入的商品)
+    """
+    require_index(CART_ITEM_INDEX)
+    result = await db.execute(build_add_item_statement(cart_id, product_id, quantity))
+    if result.rowcount == 0:
+        await db.rollback()
+        if await db.scalar(select(Cart.id).where(Cart.id == cart_id)) is None:
+            raise CartNotFoundError(f"购物车 {cart_id} 不存在")
+        moq = await db.scalar(select(Product.moq).where(Product.id == product_id))
+        if moq is None:
+            raise ProductNotFoundError(f"商品 {product_id} 不存在")
+        raise BelowMoqError(f"数量不能小于最小订购量 {moq}")
+
+    # 在同一事务中读取（当前事务持有该行的写锁），数量即本次累加后的结果
+    item = (await db.execute(
+        select(CartItem.id, CartItem.quantity).where(
+            CartItem.cart_id == cart_id,
+            CartItem.product_id == product_id
+        )
+    )).one()
+    await db.commit()
+    return item, item.quantity == quantity
+
+
+def _plan_operation(op, items, products, plan):
+    """
+    校验一个批量操作并记录到写入计划中
+
+    plan 按商品记录最终效果：("set", 数量) 覆盖、("add", 数量) 累加、("remove", None) 删除；
+    items 为购物车当前（含本批次之前操作）的商品行 {item_id: product_id}
+    """
+    kind = op.get("op")
+    if kind not in CART_OPERATIONS:
+        raise ValueError(f"不支持的操作 {kind}，可选值: {', '.join(CART_OPERATIONS)}")
+
+    if kind == "remove":
+        product_id = items.pop(op.get("item_id"), None)
+        if product_id is None:
+            raise CartItemNotFoundError(f"购物车商品 {op.get('item_id')} 不存在")
+        plan[product_id] = ("remove", None)
+        return
+
+    quantity = op.get("quantity")
+    if not isinstance(quantity, int) or quantity < 1:
+        raise ValueError("数量必须大于 0")
+
+    if kind == "update":
+        product_id = items.get(op.get("item_id"))
+        if product_id is None:
+            raise CartItemNotFoundError(f"购物车商品 {op.get('item_id')} 不存在")
+    else:
+        product_id = op.get("product_id")
+        if product_id not in products:
+            raise ProductNotFoundError(f"商品 {product_id} 不存在")
+
+    # 与单个接口一致：产品已被删除的商品行仍可更新数量，不校验 MOQ
+    product = products.get(product_id)
+    if product is not None and quantity < product.moq:
+        raise BelowMoqError(f"数量不能小于最小订购量 {product.moq}")
+
+    if kind == "update":
+        plan[product_id] = ("set", quantity)
+        return
+
+    base, current = plan.get(product_id, ("add", 0))
+    if base == "remove":
+        # 本批次中先删除后重新加入：删除后按新商品插入
+        plan[product_id] = ("readd", quantity)
+    else:
+        plan[product_id] = (base, current + quantity)
+
+
+def affected_product_ids(operations, items):
+    """批量操作涉及的所有产品ID（加入的商品和被修改数量的购物车商品）"""
+    product_ids = {op.get("product_id") for op in operations if op.get("op") == "add"}
+    product_ids.update(
+        items[op.get("item_id")] for op in operations
+        if op.get("op") == "update" and op.get("item_id") in items
+    )
+    return product_ids
+
+
+async def load_products(db, product_ids):
+    """一次查询读取校验所需的产品列（ID、最小订购量、销售价格），返回 {产品ID: 行}"""
+    if not product_ids:
+        return {}
+    rows = (await db.execute(
+        select(Product.id, Product.moq, Product.selling_price).where(Product.id.in_(product_ids))
+    )).all()
+    return {row.id: row for row in rows}
+
+
+def plan_cart_operations(operations, items, products):
+    """
+    按顺序校验全部批量操作，返回每个商品的最终效果 {产品ID: (类型, 数量)}
+
+    Args:
+        items: 购物车当前的商品行 {item_id: product_id}（被删除的商品行会从中移除）
+        products: load_products 返回的产品
+
+    Raises:
+        LookupError / ValueError: 错误信息中包含出错操作的序号（从 1 开始）
+    """
+    plan = {}
+    for index, op in enumerate(operations, 1):
+        try:
+            _plan_operation(op, items, products, plan)
+        except (LookupError, ValueError) as e:
+            raise type(e)(f"第 {index} 个操作: {e}") from e
+    return plan
+
+
+async def apply_cart_operations(db, cart_id, operations):
+    """
+    在一个事务中批量执行加入、修改数量、删除操作，返回修改后的购物车详情
+
+    读取购物车商品行和所有涉及的产品各一条 SQL，在内存中按顺序校验全部操作；
+    任一操作校验失败时不写入任何数据（错误信息中包含操作序号）。
+    写入合并为最多三条语句：删除、按 ID 覆盖数量、多行 upsert 累加数量（同一商品的多次加入合并为一行）
+
+    Args:
+        operations: 操作列表，每项为
+            {"op": "add", "product_id": str, "quantity": int}
+            {"op": "update", "item_id": int, "quantity": int}
+            {"op": "remove", "item_id": int}
+
+    Raises:
+        CartNotFoundError / CartItemNotFoundError / ProductNotFoundError: 对应的数据不存在
+        BelowMoqError / ValueError: 操作不合法
+        MissingIndexError: (cart_id, product_id) 唯一索引不存在
+
+    Returns:
+        dict: 与 read_cart 相同的购物车详情
+    """
+    require_index(CART_ITEM_INDEX)
+    if await db.scalar(select(Cart.id).where(Cart.id == cart_id)) is None:
+        raise CartNotFoundError(f"购物车 {cart_id} 不存在")
+
+    rows = (await db.execute(
+        select(CartItem.id, CartItem.product_id).where(CartItem.cart_id == cart_id)
+    )).all()
+    items = {row.id: row.product_id for row in rows}
+    item_ids = {row.product_id: row.id for row in rows}
+
+    products = await load_products(db, affected_product_ids(operations, items))
+    plan = plan_cart_operations(operations, items, products)
+
+    removed = [item_ids[product_id] for product_id, (kind, _) in plan.items() if kind in ("remove", "readd")]
+    updated = [
+        {"item_id": item_ids[product_id], "new_quantity": quantity}
+        for product_id, (kind, quantity) in plan.items() if kind == "set"
+    ]
+    added = [
+        {
+            "cart_id": cart_id,
+            "product_id": product_id,
+            "quantity": quantity,
+            "price": products[product_id].selling_price or 0,
+        }
+        for product_id, (kind, quantity) in plan.items() if kind in ("add", "readd")
+    ]
+
+    try:
+        if removed:
+            await db.execute(delete(CartItem).where(CartItem.id.in_(removed)))
+        if updated:
+            table = CartItem.__table__
+            await db.execute(
+                update(table).where(table.c.id == bindparam("item_id")).values(quantity=bindparam("new_quantity")),
+                updated
+            )
+        if added:
+            await db.execute(build_add_items_statement(added))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return await _cart_details(db, cart_id)
@@ -0,0 +1,517 @@
+"""
+Redis 购物车存储（CART_STORE=redis 时启用）
+购物车是生命周期短、修改频繁的数据，启用后购物车接口只读写 Redis，由后台任务批量写回数据库：
+- 每个购物车使用三个哈希：cart:{cart_id}:qty（商品ID -> 数量）、cart:{cart_id}:item（商品ID -> 购物车商品项ID）、
+  cart:{cart_id}:price（商品ID -> 加入时的单价），修改数量是一次 HINCRBY / HSET（O(1)）
+- 全局哈希 cart:item_index 记录尚未写回数据库的新商品项 ID -> "购物车ID:商品ID"，供只传 item_id 的删除接口使用
+  （已写回的商品项通过数据库查找所属购物车），删除商品项或写回后删除对应条目
+- 判断商品项是否存在与写入在同一个 WATCH/MULTI 事务中完成，并发的修改和删除不会留下孤立的数量字段
+- 新商品项的 ID 由 Redis 计数器分配（首次使用时从 cart_items 的最大 ID 开始），写回时显式写入该 ID；
+  在 mysql 和 redis 存储之间切换前需先写回并清空 Redis 中的购物车数据
+- 购物车第一次被访问时从数据库加载；修改过的购物车 ID 加入 cart:dirty 集合，
+  后台任务每 CART_FLUSH_INTERVAL 秒取出最多 CART_FLUSH_BATCH_SIZE 个购物车，在一个事务中写回 cart_items
+- 结账（创建订单）时调用 flush_cart 同步写回该购物车
+- 同一购物车的写回通过 cart:{cart_id}:flush_lock 锁（SET NX，CART_FLUSH_LOCK_SECONDS 秒过期）串行执行，
+  持有锁后才读取 Redis 中的数据，后提交的写回总是包含更新的数据
+"""
+import asyncio
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from redis.exceptions import WatchError
+from sqlalchemy import delete, func, select
+from fastapi.concurrency import run_in_threadpool
+from models.cart import Cart
+from models.cart_item import CartItem
+from models.product import Product
+from utils.cart_query import (
+    BelowMoqError, CartItemNotFoundError, CartNotFoundError, ProductNotFoundError,
+    affected_product_ids, cart_details, dialect_insert, load_products, plan_cart_operations
+)
+from utils.config import settings
+from utils.database import engine
+from utils.session import redis_client
+
+# 写回时每条 INSERT 语句最多包含的商品行数
+WRITE_BACK_CHUNK_SIZE = 1000
+
+
+def redis_cart_enabled():
+    """购物车是否使用 Redis 存储"""
+    return settings.CART_STORE.lower() == "redis"
+
+
+class RedisCartStore:
+    """Redis 购物车存储（每个工作进程一份，数据存放在 Redis 中）"""
+
+    KEY_PREFIX = "cart:"
+    ITEM_INDEX_KEY = "cart:item_index"
+    ITEM_SEQUENCE_KEY = "cart:item_seq"
+    DIRTY_KEY = "cart:dirty"
+
+    def __init__(self, client=None, bind=None):
+        self.client = client if client is not None else redis_client
+        self.bind = bind if bind is not None else engine  # 写回使用的同步引擎
+        self._writer = None
+
+    def _keys(self, cart_id):
+        """购物车的 Redis 键：(已加载标记, 数量, 商品项ID, 单价)"""
+        prefix = f"{self.KEY_PREFIX}{cart_id}:"
+        return prefix + "loaded", prefix + "qty", prefix + "item", prefix + "price"
+
+    def _lock_key(self, cart_id):
+        return f"{self.KEY_PREFIX}{cart_id}:flush_lock"
+
+    def _touch(self, pipe, cart_id, dirty=True):
+        """在管道中重置购物车键的过期时间，并标记为待写回"""
+        for key in self._keys(cart_id):
+            pipe.expire(key, settings.CART_REDIS_TTL)
+        if dirty:
+            pipe.sadd(self.DIRTY_KEY, cart_id)
+
+    async def _ensure_loaded(self, db, cart_id):
+        """购物车不在 Redis 中时从数据库加载（不存在时抛出 CartNotFoundError）"""
+        loaded_key, qty_key, item_key, price_key = self._keys(cart_id)
+        if self.client.exists(loaded_key):
+            return
+
+        if await db.scalar(select(Cart.id).where(Cart.id == cart_id)) is None:
+            raise CartNotFoundError(f"购物车 {cart_id} 不存在")
+        rows = (await db.execute(
+            select(CartItem.id, CartItem.product_id, CartItem.quantity, CartItem.price)
+            .where(CartItem.cart_id == cart_id)
+        )).all()
+
+        # WATCH 已加载标记：其他进程同时加载并已开始修改时放弃本次写入，避免覆盖其修改
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(loaded_key)
+                if pipe.exists(loaded_key):
+                    return
+                pipe.multi()
+                if rows:
+                    pipe.hset(qty_key, mapping={row.product_id: row.quantity for row in rows})
+                    pipe.hset(item_key, mapping={row.product_id: row.id for row in rows})
+                    pipe.hset(price_key, mapping={row.product_id: str(row.price) for row in rows})
+                pipe.set(loaded_key, 1)
+                self._touch(pipe, cart_id, dirty=False)
+                pipe.execute()
+            except WatchError:
+                pass
+
+    async def _next_item_id(self, db):
+        """分配新的购物车商品项ID"""
+        if not self.client.exists(self.ITEM_SEQUENCE_KEY):
+            max_id = await db.scalar(select(func.max(CartItem.id))) or 0
+            self.client.set(self.ITEM_SEQUENCE_KEY, max_id, nx=True)
+        return self.client.incr(self.ITEM_SEQUENCE_KEY)
+
+    async def _release(self, db):
+        """数据库读取结束后立即结束只读事务并归还连接（之后只访问 Redis）"""
+        await db.rollback()
+
+    def _read_state(self, cart_id):
+        """读取购物车的数量、商品项ID、单价三个哈希（同时重置过期时间）"""
+        _, qty_key, item_key, price_key = self._keys(cart_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(qty_key)
+        pipe.hgetall(item_key)
+        pipe.hgetall(price_key)
+        self._touch(pipe, cart_id, dirty=False)
+        quantities, item_ids, prices = pipe.execute()[:3]
+        return quantities, item_ids, prices
+
+    def _product_of(self, reader, cart_id, item_id):
+        """购物车商品项对应的商品ID，商品项不属于该购物车或已删除时返回 None（reader 为客户端或 WATCH 中的管道）"""
+        for product_id, cart_item_id in reader.hgetall(self._keys(cart_id)[2]).items():
+            if cart_item_id == str(item_id):
+                return product_id
+        return None
+
+    async def read_cart(self, db, cart_id):
+        """
+        读取购物车详情（商品行来自 Redis，产品列通过一次 IN 查询读取）
+
+        Raises:
+            CartNotFoundError: 购物车不存在
+
+        Returns:
+            dict: 与 cart_query.read_cart 相同的购物车详情
+        """
+        await self._ensure_loaded(db, cart_id)
+        quantities, item_ids, prices = self._read_state(cart_id)
+
+        products = {}
+        if quantities:
+            products = {
+                row.id: row for row in (await db.execute(
+                    select(Product.id, Product.title, Product.description, Product.img, Product.moq)
+                    .where(Product.id.in_(list(quantities)))
+                )).all()
+            }
+        await self._release(db)
+
+        rows = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            # 与数据库查询一致：产品已被删除的商品行不返回
+            if product is None or product_id not in item_ids:
+                continue
+            rows.append(SimpleNamespace(
+                id=int(item_ids[product_id]),
+                product_id=product_id,
+                quantity=int(quantity),
+                price=prices.get(product_id, 0),
+                title=product.title,
+                description=product.description,
+                img=product.img,
+                moq=product.moq,
+            ))
+        rows.sort(key=lambda row: row.id)
+        return cart_details(rows)
+
+    async def add_item(self, db, cart_id, product_id, quantity):
+        """
+        将商品加入购物车（已存在时 HINCRBY 累加数量）
+
+        Raises:
+            CartNotFoundError / ProductNotFoundError / BelowMoqError
+
+        Returns:
+            tuple: (商品项 (id, quantity), 是否为新加入的商品)
+        """
+        await self._ensure_loaded(db, cart_id)
+        product = (await load_products(db, [product_id])).get(product_id)
+        if product is None:
+            raise ProductNotFoundError(f"商品 {product_id} 不存在")
+        if quantity < product.moq:
+            raise BelowMoqError(f"数量不能小于最小订购量 {product.moq}")
+
+        _, qty_key, item_key, price_key = self._keys(cart_id)
+        new_id = None
+        if self.client.hget(item_key, product_id) is None:
+            new_id = await self._next_item_id(db)
+        await self._release(db)
+
+        # WATCH 商品项ID哈希：商品是否已在购物车中的判断与写入在同一事务中完成
+        # （并发加入同一新商品时只有一个 ID 生效，其余分配的 ID 不使用）
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(item_key)
+                    item_id = pipe.hget(item_key, product_id)
+                    if item_id is None and new_id is None:
+                        # 商品项在此期间被删除，分配新的商品项ID后重试
+                        new_id = await self._next_item_id(db)
+                        await self._release(db)
+                        continue
+                    pipe.multi()
+                    if item_id is None:
+                        pipe.hset(qty_key, product_id, quantity)
+                        pipe.hset(item_key, product_id, new_id)
+                        pipe.hset(price_key, product_id, str(product.selling_price or 0))
+                        pipe.hset(self.ITEM_INDEX_KEY, new_id, f"{cart_id}:{product_id}")
+                    else:
+                        pipe.hincrby(qty_key, product_id, quantity)
+                    self._touch(pipe, cart_id)
+                    results = pipe.execute()
+                except WatchError:
+                    continue
+            if item_id is None:
+                return SimpleNamespace(id=new_id, quantity=quantity), True
+            return SimpleNamespace(id=int(item_id), quantity=results[0]), False
+
+    async def update_item(self, db, cart_id, item_id, quantity):
+        """
+        修改购物车商品数量（HSET）
+
+        Raises:
+            CartNotFoundError / CartItemNotFoundError / BelowMoqError
+
+        Returns:
+            dict: 商品项 {"id", "quantity"}
+        """
+        await self._ensure_loaded(db, cart_id)
+        product_id = self._product_of(self.client, cart_id, item_id)
+        if product_id is None:
+            raise CartItemNotFoundError(f"购物车商品 {item_id} 不存在")
+
+        product = (await load_products(db, [product_id])).get(product_id)
+        await self._release(db)
+        if product is not None and quantity < product.moq:
+            raise BelowMoqError(f"数量不能小于最小订购量 {product.moq}")
+
+        # WATCH 商品项ID哈希后再次确认商品项存在：期间被删除时不写入数量（否则会留下孤立的数量字段）
+        _, qty_key, item_key, _ = self._keys(cart_id)
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(item_key)
+                    if pipe.hget(item_key, product_id) != str(item_id):
+                        raise CartItemNotFoundError(f"购物车商品 {item_id} 不存在")
+                    pipe.multi()
+                    pipe.hset(qty_key, product_id, quantity)
+                    self._touch(pipe, cart_id)
+                    pipe.execute()
+                    return {"id": item_id, "quantity": quantity}
+                except WatchError:
+                    continue
+
+    async def remove_item(self, db, item_id):
+        """
+        删除购物车商品项（购物车未加载时先通过数据库找到所属购物车）
+
+        Raises:
+            CartItemNotFoundError: 商品项不存在
+        """
+        entry = self.client.hget(self.ITEM_INDEX_KEY, item_id)
+        if entry is not None:
+            cart_id = int(entry.split(":", 1)[0])
+        else:
+            cart_id = await db.scalar(select(CartItem.cart_id).where(CartItem.id == item_id))
+            if cart_id is None:
+                raise CartItemNotFoundError(f"购物车商品项 {item_id} 不存在")
+
+        await self._ensure_loaded(db, cart_id)
+        await self._release(db)
+
+        _, qty_key, item_key, price_key = self._keys(cart_id)
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(item_key)
+                    product_id = self._product_of(pipe, cart_id, item_id)
+                    if product_id is None:
+                        raise CartItemNotFoundError(f"购物车商品项 {item_id} 不存在")
+                    pipe.multi()
+                    for key in (qty_key, item_key, price_key):
+                        pipe.hdel(key, product_id)
+                    pipe.hdel(self.ITEM_INDEX_KEY, item_id)
+                    self._touch(pipe, cart_id)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    async def apply_operations(self, db, cart_id, operations):
+        """
+        批量执行加入、修改数量、删除操作（校验规则与 cart_query.apply_cart_operations 相同），
+        校验全部通过后在一个 MULTI 事务中写入 Redis（WATCH 商品项ID哈希，期间购物车被修改时重新校验）
+
+        Returns:
+            dict: 修改后的购物车详情
+        """
+        await self._ensure_loaded(db, cart_id)
+        _, qty_key, item_key, price_key = self._keys(cart_id)
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(item_key)
+                    item_ids = pipe.hgetall(item_key)
+                    items = {int(item_id): product_id for product_id, item_id in item_ids.items()}
+                    products = await load_products(db, affected_product_ids(operations, items))
+                    plan = plan_cart_operations(operations, items, products)
+
+                    new_ids = {}
+                    for product_id, (kind, _) in plan.items():
+                        if kind == "readd" or (kind == "add" and product_id not in item_ids):
+                            new_ids[product_id] = await self._next_item_id(db)
+                    await self._release(db)
+
+                    pipe.multi()
+                    for product_id, (kind, quantity) in plan.items():
+                        if kind in ("remove", "readd"):
+                            for key in (qty_key, item_key, price_key):
+                                pipe.hdel(key, product_id)
+                            pipe.hdel(self.ITEM_INDEX_KEY, item_ids[product_id])
+                        if kind == "set" or product_id in new_ids:
+                            pipe.hset(qty_key, product_id, quantity)
+                        elif kind == "add":
+                            pipe.hincrby(qty_key, product_id, quantity)
+                        if product_id in new_ids:
+                            pipe.hset(item_key, product_id, new_ids[product_id])
+                            pipe.hset(price_key, product_id, str(products[product_id].selling_price or 0))
+                            pipe.hset(self.ITEM_INDEX_KEY, new_ids[product_id], f"{cart_id}:{product_id}")
+                    self._touch(pipe, cart_id)
+                    pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        return await self.read_cart(db, cart_id)
+
+    def _lock(self, cart_ids):
+        """
+        通过一个管道获取多个购物车的写回锁（SET NX，CART_FLUSH_LOCK_SECONDS 秒后自动过期）
+
+        Returns:
+            dict: 成功加锁的 {购物车ID: 锁令牌}
+        """
+        token = uuid.uuid4().hex
+        pipe = self.client.pipeline(transaction=False)
+        for cart_id in cart_ids:
+            pipe.set(self._lock_key(cart_id), token, nx=True, ex=settings.CART_FLUSH_LOCK_SECONDS)
+        return {cart_id: token for cart_id, locked in zip(cart_ids, pipe.execute()) if locked}
+
+    def _unlock(self, tokens):
+        """释放写回锁（只删除仍由自己持有的锁，已过期并被其他写回获取的锁不删除）"""
+        owned = {self._lock_key(cart_id): token for cart_id, token in tokens.items()}
+        while owned:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(*owned)
+                    keys = [key for key, value in zip(owned, pipe.mget(list(owned))) if value == owned[key]]
+                    pipe.multi()
+                    if keys:
+                        pipe.delete(*keys)
+                    pipe.execute()
+                    return
+                except WatchError:
+                    continue
+
+    def _write_back(self, cart_ids):
+        """
+        将购物车写回数据库（一个事务）：删除 Redis 中已不存在的商品行，按商品项ID upsert 其余商品行
+
+        调用方需持有这些购物车的写回锁；Redis 中已过期的购物车跳过，数据库中的数据保持不变。
+        提交后删除已写回商品项在 cart:item_index 中的条目（之后通过数据库查找所属购物车）
+        """
+        pipe = self.client.pipeline(transaction=False)
+        for cart_id in cart_ids:
+            loaded_key, qty_key, item_key, price_key = self._keys(cart_id)
+            pipe.exists(loaded_key)
+            pipe.hgetall(qty_key)
+            pipe.hgetall(item_key)
+            pipe.hgetall(price_key)
+        results = pipe.execute()
+
+        carts = []
+        rows = []
+        for index, cart_id in enumerate(cart_ids):
+            loaded, quantities, item_ids, prices = results[index * 4:index * 4 + 4]
+            if not loaded:
+                continue
+            carts.append(cart_id)
+            rows.extend(
+                {
+                    "id": int(item_ids[product_id]),
+                    "cart_id": cart_id,
+                    "product_id": product_id,
+                    "quantity": int(quantity),
+                    "price": Decimal(prices.get(product_id, "0")),
+                }
+                for product_id, quantity in quantities.items() if product_id in item_ids
+            )
+        if not carts:
+            return
+
+        insert = dialect_insert(self.bind.dialect.name)
+        with self.bind.begin() as conn:
+            conn.execute(delete(CartItem).where(
+                CartItem.cart_id.in_(carts),
+                CartItem.id.not_in([row["id"] for row in rows])
+            ))
+            for start in range(0, len(rows), WRITE_BACK_CHUNK_SIZE):
+                stmt = insert(CartItem).values(rows[start:start + WRITE_BACK_CHUNK_SIZE])
+                if self.bind.dialect.name == "mysql":
+                    stmt = stmt.on_duplicate_key_update(
+                        quantity=stmt.inserted.quantity, price=stmt.inserted.price, updated_at=func.now()
+                    )
+                else:
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[CartItem.id],
+                        set_={"quantity": stmt.excluded.quantity, "price": stmt.excluded.price, "updated_at": func.now()}
+                    )
+                conn.execute(stmt)
+        if rows:
+            self.client.hdel(self.ITEM_INDEX_KEY, *[row["id"] for row in rows])
+
+    def flush_pending(self, limit=None):
+        """
+        取出最多 limit 个待写回的购物车并写回数据库（失败时放回待写回集合）
+
+        正在被其他写回处理的购物车（未能加锁）放回待写回集合，下一轮再写回
+
+        Returns:
+            int: 取出的购物车数
+        """
+        cart_ids = self.client.spop(self.DIRTY_KEY, limit or settings.CART_FLUSH_BATCH_SIZE)
+        if not cart_ids:
+            return 0
+        tokens = self._lock([int(cart_id) for cart_id in cart_ids])
+        try:
+            busy = [cart_id for cart_id in cart_ids if int(cart_id) not in tokens]
+            if busy:
+                self.client.sadd(self.DIRTY_KEY, *busy)
+            if tokens:
+                self._write_back(list(tokens))
+        except Exception:
+            if tokens:
+                self.client.sadd(self.DIRTY_KEY, *tokens)
+            raise
+        finally:
+            self._unlock(tokens)
+        return len(cart_ids)
+
+    def flush_cart(self, cart_id):
+        """
+        同步写回一个购物车（结账时调用，没有未写回的修改时不执行任何 SQL）
+
+        购物车正在被后台任务写回时等待其完成，返回时数据库中已包含调用前的所有修改
+        """
+        deadline = time.monotonic() + settings.CART_FLUSH_LOCK_SECONDS
+        tokens = self._lock([cart_id])
+        while not tokens:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"等待购物车 {cart_id} 写回超时")
+            time.sleep(0.05)
+            tokens = self._lock([cart_id])
+        try:
+            if not self.client.srem(self.DIRTY_KEY, cart_id):
+                return
+            try:
+                self._write_back([cart_id])
+            except Exception:
+                self.client.sadd(self.DIRTY_KEY, cart_id)
+                raise
+        finally:
+            self._unlock(tokens)
+
+    async def _run_writer(self):
+        """后台写回任务：定期写回所有待写回的购物车"""
+        while True:
+            await asyncio.sleep(settings.CART_FLUSH_INTERVAL)
+            try:
+                while await run_in_threadpool(self.flush_pending) >= settings.CART_FLUSH_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                print(f"❌ 购物车写回数据库失败，稍后重试: {str(e)}")
+
+    def start_writer(self):
+        """启动后台写回任务（在 FastAPI lifespan 启动阶段调用，未启用 Redis 购物车时不启动）"""
+        if not redis_cart_enabled() or self._writer is not None:
+            return
+        self._writer = asyncio.create_task(self._run_writer())
+        print("✅ Redis 购物车写回任务已启动")
+
+    async def stop_writer(self):
+        """停止后台写回任务，并写回剩余的购物车（在 FastAPI lifespan 关闭阶段调用）"""
+        if self._writer is None:
+            return
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        try:
+            while await run_in_threadpool(self.flush_pending):
+                pass
+            print("✅ Redis 购物车已全部写回数据库")
+        except Exception as e:
+            print(f"❌ 关闭时写回购物车失败: {str(e)}")
+
+
+# 全局 Redis 购物车存储实例
+cart_store = RedisCartStore()
@@ -0,0 +1,200 @@
+"""
+目录读模型
+在进程内缓存类别、供应商和产品，供只读的目录接口直接使用，不再每次查询数据库：
+- 记录使用 __slots__ 存储，按 ID 和类别建立索引
+- 写操作（如 create_product）调用 invalidate() 递增版本号，
+  下一次读取时只按 updated_at 增量加载变化的行，并按删除记录（墓碑）移除被删除的行
+- updated_at 和删除时间取语句执行时间而不是提交时间，较早时间的行可能较晚提交：
+  水位线不越过数据库当前时间之前 CHANGE_FEED_SETTLE_SECONDS 秒（与变更订阅相同），
+  这段时间内的行和删除记录在下一次加载时重新读取（重复加载是幂等的）
+- 由记录生成的接口数据（视图）按版本缓存，版本不变时直接复用
+"""
+import asyncio
+import time
+from datetime import timedelta
+from sqlalchemy import DateTime, func, literal, select
+from models.category import Category
+from models.supplier import Supplier
+from models.product import Product
+from models.catalog_tombstone import CatalogTombstone
+from utils.config import settings
+from utils.product_query import CursorDateTime
+from utils import invalidation
+
+
+class _Record:
+    """只读记录基类：按 __slots__ 中的字段名从查询行中取值"""
+    __slots__ = ()
+
+    def __init__(self, row):
+        for name in self.__slots__:
+            setattr(self, name, row[name])
+
+
+class CategoryRecord(_Record):
+    """类别记录"""
+    __slots__ = ("id", "name", "description", "icon", "created_at", "updated_at")
+
+
+class SupplierRecord(_Record):
+    """供应商记录"""
+    __slots__ = ("id", "name", "location", "created_at", "updated_at")
+
+
+class ProductRecord(_Record):
+    """产品记录"""
+    __slots__ = (
+        "id", "title", "description", "img", "product_mlb_thumbnail",
+        "category_id", "supplier_id", "shipping_from", "weight", "dimensions",
+        "moq", "tags", "stock_quantity", "reserved_quantity", "low_stock_threshold",
+        "max_order_quantity", "user_limit_quantity", "cost_price", "selling_price",
+        "discount_price", "product_mlb_price", "roi", "variations",
+        "created_at", "updated_at",
+    )
+
+
+def _newest_first(record):
+    """产品列表排序键（created_at、id 倒序）"""
+    return (record.created_at is not None, record.created_at or 0, record.id)
+
+
+class CatalogReadModel:
+    """目录读模型（每个工作进程一份）"""
+
+    # 实体名 -> (模型, 记录类, 存放记录的属性名)
+    ENTITIES = {
+        "category": (Category, CategoryRecord, "categories"),
+        "supplier": (Supplier, SupplierRecord, "suppliers"),
+        "product": (Product, ProductRecord, "products"),
+    }
+
+    def __init__(self):
+        self.categories = {}  # 类别ID -> CategoryRecord
+        self.suppliers = {}  # 供应商ID -> SupplierRecord
+        self.products = {}  # 产品ID -> ProductRecord
+        self.products_by_category = {}  # 类别ID -> [ProductRecord]（按创建时间倒序）
+        self.version = 0  # 写操作递增的版本号
+        self._loaded_version = -1  # 已加载到的版本号
+        self._watermarks = {entity: None for entity in self.ENTITIES}  # 各实体已加载的最大 updated_at
+        self._tombstone_watermark = None  # 删除记录已加载的最大 deleted_at
+        self._last_sync = 0.0
+        self._views = {}
+        self._lock = None
+
+    def invalidate(self):
+        """标记读模型已过期（写操作提交后调用）"""
+        self.version += 1
+
+    def _is_fresh(self):
+        if self._loaded_version != self.version:
+            return False
+        # 定期检查增量，兜底其他进程或脚本直接写库的情况
+        interval = settings.CATALOG_REFRESH_SECONDS
+        return not interval or time.monotonic() - self._last_sync < interval
+
+    async def ensure_fresh(self, db):
+        """版本变化时从数据库增量加载，否则不访问数据库"""
+        if self._is_fresh():
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._is_fresh():
+                return
+            target_version = self.version
+            changed = await self._load_deltas(db)
+            self._loaded_version = target_version
+            self._last_sync = time.monotonic()
+            if changed:
+                self._views.clear()
+
+    async def _load_deltas(self, db):
+        """加载 updated_at 不早于上次水位线的行和水位线之后的删除记录，返回变化的行数"""
+        changed = 0
+        touched_categories = set()
+        # 使用数据库时钟（与 updated_at 的默认值一致）计算已稳定的时间，水位线不越过该时间
+        now = await db.scalar(select(func.now(type_=DateTime())))
+        settled = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+        for entity, (model, record_class, attribute) in self.ENTITIES.items():
+            table = model.__table__
+            stmt = select(table)
+            watermark = self._watermarks[entity]
+            if watermark is not None:
+                # 使用 >= 避免遗漏与水位线同一时刻更新的行（重复加载是幂等的）
+                stmt = stmt.where(table.c.updated_at >= literal(watermark, CursorDateTime()))
+            latest = None
+            records = getattr(self, attribute)
+            for row in (await db.execute(stmt)).mappings():
+                record = record_class(row)
+                if entity == "product":
+                    previous = records.get(record.id)
+                    if previous is not None:
+                        touched_categories.add(previous.category_id)
+                    touched_categories.add(record.category_id)
+                records[record.id] = record
+                if record.updated_at is not None and (latest is None or record.updated_at > latest):
+                    latest = record.updated_at
+                changed += 1
+            if latest is not None:
+                self._watermarks[entity] = min(latest, settled)
+
+        # 移除被删除的行（删除之后又以相同ID重新写入的行保留，重复处理同一删除记录是幂等的）
+        stmt = select(CatalogTombstone).order_by(CatalogTombstone.deleted_at, CatalogTombstone.id)
+        if self._tombstone_watermark is not None:
+            stmt = stmt.where(CatalogTombstone.deleted_at >= literal(self._tombstone_watermark, CursorDateTime()))
+        latest = None
+        for tombstone in (await db.scalars(stmt)).all():
+            if tombstone.deleted_at is not None and (latest is None or tombstone.deleted_at > latest):
+                latest = tombstone.deleted_at
+            if tombstone.entity not in self.ENTITIES:
+                continue
+            records = getattr(self, self.ENTITIES[tombstone.entity][2])
+            record = records.get(tombstone.entity_id)
+            if record is None:
+                continue
+            if record.updated_at is not None and tombstone.deleted_at is not None and record.updated_at > tombstone.deleted_at:
+                continue
+            del records[tombstone.entity_id]
+            if tombstone.entity == "product":
+                touched_categories.add(record.category_id)
+            changed += 1
+
+        if latest is not None:
+            self._tombstone_watermark = min(latest, settled)
+
+        if touched_categories:
+            self._reindex_categories(touched_categories)
+        return changed
+
+    def _reindex_categories(self, category_ids):
+        """重建受影响类别的产品列表"""
+        grouped = {category_id: [] for category_id in category_ids}
+        for record in self.products.values():
+            if record.category_id in grouped:
+                grouped[record.category_id].append(record)
+        for category_id, records in grouped.items():
+            records.sort(key=_newest_first, reverse=True)
+            self.products_by_category[category_id] = records
+
+    def all_products(self):
+        """所有产品（按创建时间倒序）"""
+        return self.view("all_products", lambda: sorted(self.products.values(), key=_newest_first, reverse=True))
+
+    def category_products(self, category_id):
+        """某个类别下的产品（按创建时间倒序）"""
+        return self.products_by_category.get(category_id, [])
+
+    def view(self, key, build):
+        """获取按当前版本缓存的视图，不存在时调用 build 生成"""
+        if key not in self._views:
+            self._views[key] = build()
+        return self._views[key]
+
+
+# 全局目录读模型实例
+catalog = CatalogReadModel()
+
+# 其他工作进程写入目录数据后，使本进程的读模型失效
+for _entity in CatalogReadModel.ENTITIES:
+    invalidation.subscribe(_entity, lambda ids, version: catalog.invalidate())
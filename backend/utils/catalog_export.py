@@ -0,0 +1,91 @@
+"""
+产品目录流式导出
+按 NDJSON 或 CSV 逐批输出所有产品，内存占用与产品数量无关：
+- 通过同步引擎的服务端游标（stream_results + yield_per）分批读取，只查询需要的列，不创建 ORM 对象
+- 每批转换后立即交给 StreamingResponse 发送（同步生成器由 Starlette 在线程池中迭代，不阻塞事件循环）
+"""
+import csv
+import io
+import json
+from sqlalchemy import select
+from models.category import Category
+from models.product import Product
+from utils.config import settings
+from utils.database import engine
+from utils.serializer import compile_serializer, dumps
+
+# 导出格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+# CSV 中以 JSON 文本输出的字段
+_JSON_FIELDS = {"product_mlb_thumbnail", "dimensions", "tags", "variations"}
+
+
+def resolve_format(export_format):
+    """校验导出格式（默认 ndjson）"""
+    export_format = export_format or "ndjson"
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}，可选值: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+
+def build_export_query(fields):
+    """按产品ID顺序查询导出字段（category_name 通过 JOIN 获取）"""
+    columns = [getattr(Product, field) for field in fields if field != "category_name"]
+    stmt = select(*columns)
+    if "category_name" in fields:
+        stmt = stmt.add_columns(Category.name.label("category_name")).outerjoin(
+            Category, Category.id == Product.category_id
+        )
+    return stmt.order_by(Product.id)
+
+
+def _batches(fields):
+    """通过服务端游标分批读取，每批为 yield_per 行转换后的字典列表"""
+    serialize = compile_serializer(Product, tuple(fields))
+    with_category = "category_name" in fields
+    with engine.connect() as conn:
+        result = conn.execution_options(
+            stream_results=True,
+            yield_per=settings.EXPORT_BATCH_SIZE
+        ).execute(build_export_query(fields))
+        for rows in result.partitions():
+            if with_category:
+                yield [serialize(row, category_name=row.category_name) for row in rows]
+            else:
+                yield [serialize(row) for row in rows]
+
+
+def iter_ndjson(fields):
+    """逐批生成 NDJSON（每行一个产品）"""
+    for batch in _batches(fields):
+        yield b"".join(dumps(product) + b"\n" for product in batch)
+
+
+def iter_csv(fields):
+    """逐批生成 CSV（第一行为表头，列表和字典字段输出为 JSON 文本）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue().encode("utf-8")
+
+    json_fields = [field in _JSON_FIELDS for field in fields]
+    for batch in _batches(fields):
+        buffer.seek(0)
+        buffer.truncate()
+        for product in batch:
+            writer.writerow([
+                json.dumps(value, ensure_ascii=False) if is_json and value is not None else value
+                for value, is_json in zip(product.values(), json_fields)
+            ])
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_export(export_format, fields):
+    """按格式返回导出内容的生成器"""
+    if export_format == "csv":
+        return iter_csv(fields)
+    return iter_ndjson(fields)
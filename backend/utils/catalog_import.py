@@ -0,0 +1,321 @@
+"""
+产品批量导入
+供应商一次上架数万个 SKU 时使用，从 NDJSON 或 CSV 逐批写入产品（接口和命令行共用）：
+- 写入前按 products 表的列定义校验每一行（必填字段不能为空、字符串字段的类型和长度）
+- 每批产品的类别和供应商ID各通过一次 IN 查询校验，已校验过的ID在整个导入过程中缓存；
+  接口导入时目录读模型中已有的类别和供应商直接视为存在，不再查询
+- 每批通过 executemany 一次插入产品和标签关联，每批一个事务
+- 单行数据错误（格式错误、缺少字段、类别或供应商不存在、产品ID重复）记录行号后跳过，不影响其他行；
+  某一批写入数据库失败时，该批改为逐行写入，只跳过出错的行
+- 导入中途出错时，已提交的批次同样更新搜索索引和缓存
+
+用法（在 backend 目录下执行）:
+    python -m utils.catalog_import products.ndjson [--format csv] [--chunk-size 1000]
+"""
+import argparse
+import csv
+import json
+import sys
+import uuid
+from itertools import islice
+from sqlalchemy import String, select, insert
+from models.category import Category
+from models.supplier import Supplier
+from models.product import Product
+from utils.catalog import catalog
+from utils.catalog_export import EXPORT_FORMATS
+from utils.config import settings
+from utils.database import engine
+from utils.product_cache import product_cache
+from utils.search_engine import product_search
+from utils.tags import normalize_tag_names, link_product_tags
+from utils import invalidation
+
+# 导入格式与导出格式相同
+IMPORT_FORMATS = tuple(EXPORT_FORMATS)
+
+# 必填字段（与单个产品创建接口一致）
+REQUIRED_FIELDS = ('name', 'description', 'price', 'category_id', 'supplier_id', 'stock')
+
+# 不能为空字符串的必填字段
+NON_EMPTY_FIELDS = ('name', 'category_id', 'supplier_id')
+
+# 导出文件中的列名 -> 导入字段名（导出的文件可以直接导入，其余的列忽略）
+_ALIASES = {
+    "title": "name",
+    "selling_price": "price",
+    "stock_quantity": "stock",
+    "img": "main_image_url",
+    "product_mlb_thumbnail": "thumbnail_urls",
+}
+
+# CSV 中以 JSON 文本保存的字段
+_JSON_FIELDS = {"thumbnail_urls", "tags", "variations"}
+
+
+def new_product_id():
+    """生成产品ID"""
+    return f"MLB{uuid.uuid4().hex[:8].upper()}"
+
+
+def _check_string_columns(row):
+    """按 products 表的列定义校验字符串字段（类型、是否可为空、最大长度），出错时抛出 ValueError"""
+    columns = Product.__table__.c
+    for name, value in row.items():
+        column_type = columns[name].type
+        if not isinstance(column_type, String):
+            continue
+        field = _ALIASES.get(name, name)
+        if value is None:
+            if not columns[name].nullable:
+                raise ValueError(f"{field} 不能为空")
+            continue
+        if not isinstance(value, str):
+            raise ValueError(f"{field} 必须是字符串")
+        if column_type.length and len(value) > column_type.length:
+            raise ValueError(f"{field} 不能超过 {column_type.length} 个字符")
+
+
+def build_product_row(data, product_id):
+    """
+    校验产品数据并转换为 products 表的行，未提供的字段使用默认值
+
+    Args:
+        data (dict): 产品数据（字段与 POST /api/product/create 的请求体相同）
+        product_id (str): 产品ID
+
+    Raises:
+        ValueError: 字段格式错误
+    """
+    try:
+        price = float(data['price'])
+        stock = int(data['stock'])
+    except (TypeError, ValueError):
+        raise ValueError("price 必须是数字，stock 必须是整数")
+    for field in NON_EMPTY_FIELDS:
+        if isinstance(data[field], str) and not data[field].strip():
+            raise ValueError(f"{field} 不能为空")
+
+    row = {
+        "id": product_id,
+        "title": data['name'],
+        "description": data['description'],
+        "selling_price": price,
+        "category_id": data['category_id'],
+        "supplier_id": data['supplier_id'],
+        "stock_quantity": stock,
+        "img": data.get('main_image_url', ''),
+        "product_mlb_thumbnail": data.get('thumbnail_urls', []),
+        "tags": normalize_tag_names(data.get('tags')),
+        "variations": data.get('variations', []),
+        "moq": 1,  # 默认最小订购量
+        "cost_price": price * 0.6,  # 假设成本价为售价的60%
+        "discount_price": None,
+        "product_mlb_price": f"R$ {price:.2f}".replace('.', ','),
+        "roi": "112%",  # 默认ROI
+        "shipping_from": "广东省广州市",  # 默认发货地
+        "weight": 1.0,  # 默认重量
+        "dimensions": {"length": 30, "width": 20, "height": 10},  # 默认尺寸
+        "reserved_quantity": 0,
+        "low_stock_threshold": 10,
+        "max_order_quantity": 1000
+    }
+    _check_string_columns(row)
+    return row
+
+
+def resolve_import_format(import_format=None, content_type=None):
+    """确定导入格式：优先使用 format 参数，其次根据 Content-Type 判断，默认 ndjson"""
+    if not import_format:
+        import_format = "csv" if content_type and content_type.startswith("text/csv") else "ndjson"
+    if import_format not in IMPORT_FORMATS:
+        raise ValueError(f"不支持的导入格式: {import_format}，可选值: {', '.join(IMPORT_FORMATS)}")
+    return import_format
+
+
+def _rename(data):
+    """将导出文件的列名转换为导入字段名"""
+    return {_ALIASES.get(key, key): value for key, value in data.items()}
+
+
+def read_ndjson(stream):
+    """逐行解析 NDJSON，生成 (行号, 产品数据, 错误信息)"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"JSON 格式错误: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, "每行必须是一个 JSON 对象"
+            continue
+        yield line_number, _rename(data), None
+
+
+def read_csv(stream):
+    """逐行解析 CSV（第一行为表头，空值视为未提供，列表字段为 JSON 文本），生成 (行号, 产品数据, 错误信息)"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        data = _rename({key: value for key, value in row.items() if key and value not in (None, "")})
+        invalid = None
+        for field in _JSON_FIELDS & set(data):
+            try:
+                data[field] = json.loads(data[field])
+            except ValueError:
+                invalid = f"{field} 必须是 JSON 文本"
+                break
+        if invalid:
+            yield reader.line_num, None, invalid
+        else:
+            yield reader.line_num, data, None
+
+
+def _prepare(data, error):
+    """校验单行数据并转换为产品行，出错时抛出 ValueError"""
+    if error:
+        raise ValueError(error)
+    for field in REQUIRED_FIELDS:
+        if data.get(field) is None:
+            raise ValueError(f"缺少必填字段: {field}")
+    product_id = data.get('id') or new_product_id()
+    if not isinstance(product_id, str) or len(product_id) > 50:
+        raise ValueError("id 必须是不超过 50 个字符的字符串")
+    return build_product_row(data, product_id)
+
+
+def known_references(read_model):
+    """目录读模型中已有的类别和供应商ID（调用前需 ensure_fresh），作为 import_products 的 known_ids"""
+    return {Category: set(read_model.categories), Supplier: set(read_model.suppliers)}
+
+
+class _ReferenceChecker:
+    """批量校验类别和供应商ID，结果在整个导入过程中缓存"""
+
+    def __init__(self, known=None):
+        known = known or {}
+        self.known = {Category: set(known.get(Category, ())), Supplier: set(known.get(Supplier, ()))}
+        self.missing = {Category: set(), Supplier: set()}
+
+    def check(self, conn, model, ids):
+        """查询还没有校验过的ID（一次 IN 查询），返回其中存在的ID集合"""
+        unchecked = set(ids) - self.known[model] - self.missing[model]
+        if unchecked:
+            found = set(conn.scalars(select(model.id).where(model.id.in_(unchecked))))
+            self.known[model] |= found
+            self.missing[model] |= unchecked - found
+        return self.known[model]
+
+
+def _error_message(error):
+    """写入失败的错误信息（数据库错误取驱动返回的原始信息）"""
+    return str(getattr(error, "orig", None) or error)
+
+
+def _write(rows):
+    """在一个事务中插入产品及其标签关联"""
+    with engine.begin() as conn:
+        conn.execute(insert(Product), rows)
+        link_product_tags(conn, {row["id"]: row["tags"] for row in rows})
+
+
+def import_products(stream, import_format="ndjson", chunk_size=None, known_ids=None):
+    """
+    从文本流批量导入产品
+
+    Args:
+        stream: 文本文件对象（NDJSON 每行一个产品；CSV 第一行为表头）
+        import_format (str): ndjson 或 csv
+        chunk_size (int): 每批写入的行数（可选，默认 IMPORT_CHUNK_SIZE）
+        known_ids (dict): 已知存在的类别和供应商ID（可选，见 known_references），其余ID查询数据库
+
+    Returns:
+        dict: product_ids（成功导入的产品ID，按文件中的顺序）、errors（[{line, id, error}]）
+    """
+    chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+    records = read_csv(stream) if import_format == "csv" else read_ndjson(stream)
+    references = _ReferenceChecker(known_ids)
+    seen_ids = set()
+    product_ids, errors = [], []
+
+    def fail(line_number, product_id, message):
+        errors.append({"line": line_number, "id": product_id, "error": message})
+
+    try:
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            prepared = []
+            for line_number, data, error in chunk:
+                try:
+                    prepared.append((line_number, _prepare(data, error)))
+                except ValueError as e:
+                    fail(line_number, data.get('id') if data else None, str(e))
+                except Exception as e:
+                    fail(line_number, data.get('id') if data else None, f"数据格式错误: {e}")
+            if not prepared:
+                continue
+
+            # 批量校验类别、供应商和产品ID是否已存在
+            with engine.connect() as conn:
+                categories = references.check(conn, Category, {row["category_id"] for _, row in prepared})
+                suppliers = references.check(conn, Supplier, {row["supplier_id"] for _, row in prepared})
+                existing = set(conn.scalars(select(Product.id).where(Product.id.in_([row["id"] for _, row in prepared]))))
+
+            valid = []
+            for line_number, row in prepared:
+                if row["category_id"] not in categories:
+                    fail(line_number, row["id"], f"类别 {row['category_id']} 不存在")
+                elif row["supplier_id"] not in suppliers:
+                    fail(line_number, row["id"], f"供应商 {row['supplier_id']} 不存在")
+                elif row["id"] in existing or row["id"] in seen_ids:
+                    fail(line_number, row["id"], f"产品 {row['id']} 已存在")
+                else:
+                    seen_ids.add(row["id"])
+                    valid.append((line_number, row))
+            if not valid:
+                continue
+
+            try:
+                _write([row for _, row in valid])
+                product_ids.extend(row["id"] for _, row in valid)
+            except Exception as e:
+                # 整批写入失败时逐行写入，只跳过出错的行
+                print(f"⚠️ 批量写入失败，改为逐行写入: {_error_message(e)}")
+                for line_number, row in valid:
+                    try:
+                        _write([row])
+                        product_ids.append(row["id"])
+                    except Exception as row_error:
+                        fail(line_number, row["id"], _error_message(row_error))
+    finally:
+        if product_ids:
+            # 本进程增量更新搜索索引和目录读模型，删除产品详情缓存，并通知其他工作进程
+            # （导入中途出错时也执行，已提交的批次不会留在旧缓存中）
+            product_search.mark_stale(product_ids)
+            catalog.invalidate()
+            product_cache.evict_many(product_ids)
+            invalidation.publish("product", product_ids)
+
+    errors.sort(key=lambda item: item["line"])
+    print(f"✅ 批量导入完成：成功 {len(product_ids)} 个，失败 {len(errors)} 个")
+    return {"product_ids": product_ids, "errors": errors}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从 NDJSON 或 CSV 文件批量导入产品")
+    parser.add_argument("path", help="导入文件路径")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="文件格式（默认根据扩展名判断）")
+    parser.add_argument("--chunk-size", type=int, default=None, help="每批写入的行数")
+    args = parser.parse_args()
+
+    import_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    with open(args.path, encoding="utf-8-sig", newline="") as stream:
+        result = import_products(stream, import_format, args.chunk_size)
+    for item in result["errors"]:
+        product = f" ({item['id']})" if item['id'] else ""
+        print(f"[ERROR] 第 {item['line']} 行{product}: {item['error']}")
+    sys.exit(1 if result["errors"] else 0)
@@ -0,0 +1,209 @@
+"""
+目录变更订阅
+客户端和下游镜像通过 since 游标增量同步类别、供应商和产品，不再每次下载 /api/product/all：
+- 每个实体按 (updated_at, id) 游标读取，使用 (updated_at, id) 复合索引，每次同步的代价只与变化的行数有关
+- 通过 ORM 删除类别、供应商或产品时，在同一事务中写入删除记录（墓碑），
+  类别、供应商被删除时数据库会级联删除其产品，同时为这些产品写入墓碑
+- 返回的 next_since 记录各实体已读到的位置，下一次请求原样传回即可；
+  时间戳精度有限且事务提交有先后，游标不越过数据库当前时间之前 CHANGE_FEED_SETTLE_SECONDS 秒，
+  这段时间内的记录可能在下一次同步中再次返回（客户端按 ID 覆盖写入即可）
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import DateTime, select, and_, or_, func, literal, event
+from sqlalchemy.orm import Session
+from models.category import Category
+from models.supplier import Supplier
+from models.product import Product
+from models.catalog_tombstone import CatalogTombstone
+from utils.config import settings
+from utils.product_query import CursorDateTime
+from utils.serializer import compile_serializer
+
+# 实体名 -> (模型, 返回结果中的键)
+FEED_ENTITIES = {
+    "category": (Category, "categories"),
+    "supplier": (Supplier, "suppliers"),
+    "product": (Product, "products"),
+}
+_ENTITY_BY_MODEL = {model: entity for entity, (model, _) in FEED_ENTITIES.items()}
+
+# 游标中各位置的键：三个实体 + 墓碑
+_POSITIONS = tuple(FEED_ENTITIES) + ("tombstone",)
+
+
+class InvalidSinceError(ValueError):
+    """since 参数无法解析"""
+
+
+def _parse_datetime(value):
+    """解析 ISO 时间；带时区的时间转换为不带时区的 UTC 时间（与数据库中保存的格式一致）"""
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_since(since):
+    """
+    解析 since 参数
+
+    支持上一次返回的 next_since 游标，或 ISO 时间（返回该时间及之后变化的记录）；为空时从头同步
+
+    Returns:
+        dict: 位置名 -> (时间, ID) 或 None（None 表示从头读取，ID 为 None 表示读取该时间及之后的记录）
+    """
+    if not since:
+        return {name: None for name in _POSITIONS}
+    try:
+        positions = json.loads(base64.urlsafe_b64decode(since.encode()).decode())
+        if not isinstance(positions, dict) or set(positions) != set(_POSITIONS):
+            raise ValueError
+        return {
+            name: (_parse_datetime(value[0]) if value[0] else None, value[1]) if value else None
+            for name, value in positions.items()
+        }
+    except Exception:
+        pass
+    try:
+        moment = _parse_datetime(since)
+    except ValueError:
+        raise InvalidSinceError(f"无效的 since 参数: {since}")
+    return {name: (moment, None) for name in _POSITIONS}
+
+
+def encode_since(positions):
+    """将各位置编码为 next_since 游标"""
+    raw = json.dumps({
+        name: [value[0].isoformat() if value[0] else None, value[1]] if value else None
+        for name, value in positions.items()
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _after(time_column, id_column, position):
+    """位置之后的记录的查询条件（NULL 时间排在最前）"""
+    moment, last_id = position
+    if moment is None:
+        return or_(and_(time_column.is_(None), id_column > last_id), time_column.isnot(None))
+    moment = literal(moment, CursorDateTime())
+    if last_id is None:
+        return time_column >= moment
+    return or_(time_column > moment, and_(time_column == moment, id_column > last_id))
+
+
+def build_changes_query(model, position=None, limit=None):
+    """构建某个实体的变更查询（按 updated_at、id 正序）"""
+    stmt = select(model)
+    if position is not None:
+        stmt = stmt.where(_after(model.updated_at, model.id, position))
+    stmt = stmt.order_by(model.updated_at.asc(), model.id.asc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def build_tombstones_query(position=None, limit=None):
+    """构建删除记录查询（按 deleted_at、id 正序）"""
+    stmt = select(CatalogTombstone)
+    if position is not None:
+        stmt = stmt.where(_after(CatalogTombstone.deleted_at, CatalogTombstone.id, position))
+    stmt = stmt.order_by(CatalogTombstone.deleted_at.asc(), CatalogTombstone.id.asc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def normalize_limit(limit):
+    """校验每个实体每次返回的数量，未传入时使用默认值，超过上限时截断"""
+    if limit is None:
+        return settings.CHANGE_FEED_LIMIT
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit 必须大于 0")
+    return min(limit, settings.CHANGE_FEED_LIMIT)
+
+
+async def read_changes(db, since=None, limit=None):
+    """
+    读取 since 之后变化的类别、供应商、产品和删除记录
+
+    Args:
+        db: 数据库会话
+        since (str): 上一次返回的 next_since 或 ISO 时间（可选，为空时从头同步）
+        limit (int): 每个实体最多返回的记录数（可选）
+
+    Returns:
+        dict: changes（按实体分组的记录）、deleted（墓碑列表）、next_since、has_more
+    """
+    positions = parse_since(since)
+    limit = normalize_limit(limit)
+    has_more = False
+
+    # 使用数据库时钟（与 updated_at 的默认值一致）计算已稳定的时间
+    now = await db.scalar(select(func.now(type_=DateTime())))
+    settled = now - timedelta(seconds=settings.CHANGE_FEED_SETTLE_SECONDS)
+
+    def advance(name, rows, time_attribute):
+        """读取到最后一页时，游标不越过未稳定的时间"""
+        nonlocal has_more
+        # 多取一条用于判断是否还有更多变化
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+            last = rows[-1]
+            positions[name] = (getattr(last, time_attribute), last.id)
+        elif rows:
+            last = rows[-1]
+            moment = getattr(last, time_attribute)
+            if moment is not None and moment >= settled:
+                positions[name] = (settled, None)
+            else:
+                positions[name] = (moment, last.id)
+        return rows
+
+    changes = {}
+    for entity, (model, key) in FEED_ENTITIES.items():
+        rows = (await db.scalars(build_changes_query(model, positions[entity], limit + 1))).all()
+        rows = advance(entity, rows, "updated_at")
+        serialize = compile_serializer(model, tuple(model.__table__.columns.keys()))
+        changes[key] = [serialize(row) for row in rows]
+
+    tombstones = (await db.scalars(build_tombstones_query(positions["tombstone"], limit + 1))).all()
+    tombstones = advance("tombstone", tombstones, "deleted_at")
+    deleted = [
+        {
+            "entity": tombstone.entity,
+            "id": tombstone.entity_id,
+            "deleted_at": tombstone.deleted_at.isoformat() if tombstone.deleted_at else None
+        }
+        for tombstone in tombstones
+    ]
+
+    return {
+        "changes": changes,
+        "deleted": deleted,
+        "next_since": encode_since(positions),
+        "has_more": has_more
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletions(session, flush_context, instances):
+    """ORM 删除类别、供应商或产品时写入墓碑（与删除在同一事务中提交）"""
+    keys = set()
+    for instance in session.deleted:
+        entity = _ENTITY_BY_MODEL.get(type(instance))
+        if entity is None:
+            continue
+        keys.add((entity, instance.id))
+        if entity != "product":
+            # 数据库会级联删除该类别或供应商下的产品
+            column = Product.category_id if entity == "category" else Product.supplier_id
+            with session.no_autoflush:
+                product_ids = session.scalars(select(Product.id).where(column == instance.id)).all()
+            keys.update(("product", product_id) for product_id in product_ids)
+    session.add_all([CatalogTombstone(entity=entity, entity_id=entity_id) for entity, entity_id in sorted(keys)])
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
 
 
@@ -17,11 +17,74 @@ class Settings(BaseSettings):
     MYSQL_USER: Optional[str] = "root"
     MYSQL_PASSWORD: Optional[str] = "123456"
 
+    # 数据库引擎模式：async 使用 aiomysql 异步引擎，sync 使用 pymysql 同步引擎（用于两者的性能对比）
+    DB_ENGINE_MODE: str = "async"
+    # 异步数据库连接地址，为空时由 DATABASE_URL 推导（mysql+pymysql -> mysql+aiomysql）
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # 是否在响应头 X-Query-Count 中返回本次请求执行的 SQL 数量（用于排查 N+1 查询）
+    QUERY_COUNTER_ENABLED: bool = False
+    # 应用启动时对已有的数据库执行未完成的迁移（补建购物车唯一索引、修改价格列类型），
+    # 关闭后需要手动执行 python -m utils.migrations，期间依赖唯一索引的写操作返回 503
+    MIGRATE_ON_STARTUP: bool = True
+
+    # 订单列表分页配置
+    ORDER_PAGE_SIZE: int = 50  # 只传入 cursor 时的默认每页数量（都未传入时返回全部订单）
+    ORDER_PAGE_SIZE_MAX: int = 200  # 每页数量上限
+
+    # 类别产品列表分页配置
+    PRODUCT_PAGE_SIZE: int = 50  # 只传入 cursor 时（标签产品列表为未传入 page_size 时）的默认每页数量
+    PRODUCT_PAGE_SIZE_MAX: int = 200  # 每页数量上限
+
+    # 产品搜索返回的最大结果数
+    SEARCH_RESULT_LIMIT: int = 100
+
+    # 目录读模型定期检查增量的间隔（秒，0 表示只在写操作后刷新）
+    CATALOG_REFRESH_SECONDS: int = 60
+
+    # 分面筛选的价格区间边界（BRL，按实际支付价格划分）
+    FACET_PRICE_BUCKETS: List[float] = [25, 50, 100, 200, 500]
+
+    # 目录变更订阅每个实体每次最多返回的记录数
+    CHANGE_FEED_LIMIT: int = 500
+    # 最近多少秒内写入的记录视为未稳定（可能还有更早时间戳的事务未提交），游标不越过这个时间
+    CHANGE_FEED_SETTLE_SECONDS: int = 5
+
+    # 产品目录导出每批从数据库读取的行数
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # 产品批量导入每批写入的行数（每批一个事务）
+    IMPORT_CHUNK_SIZE: int = 1000
+
     # Redis配置
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+
+    # 跨进程缓存失效（Redis 发布/订阅）
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_CHANNEL: str = "brail:cache-invalidation"
+
+    # 产品详情缓存（Redis）
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_TTL: int = 60  # 新鲜数据的有效期（秒）
+    PRODUCT_CACHE_STALE_SECONDS: int = 300  # 过期后仍可返回旧数据并后台刷新的时间（秒）
+    PRODUCT_CACHE_RETRY_SECONDS: int = 30  # Redis 出错后暂停使用缓存的时间（秒）
+    PRODUCT_BATCH_MAX: int = 500  # 批量详情接口一次最多查询的产品数
+
+    # 购物车批量修改
+    CART_BATCH_MAX: int = 200  # 一次最多提交的操作数
+
+    # 购物车存储：mysql 每次修改直接写数据库；redis 存放在 Redis 哈希中，后台批量写回数据库
+    CART_STORE: str = "mysql"
+    CART_REDIS_TTL: int = 604800  # Redis 中购物车数据的过期时间（秒，每次访问后重新计时）
+    CART_FLUSH_INTERVAL: float = 1.0  # 后台写回数据库的间隔（秒）
+    CART_FLUSH_BATCH_SIZE: int = 200  # 每个写回事务最多包含的购物车数
+    CART_FLUSH_LOCK_SECONDS: int = 30  # 单个购物车写回锁的过期时间（秒），同一购物车的写回串行执行
+
+    # 用户购物车ID缓存（Redis）
+    CART_ID_CACHE_ENABLED: bool = True
+    CART_ID_CACHE_RETRY_SECONDS: int = 30  # Redis 出错后暂停使用缓存的时间（秒）
     
     # Session配置
     SESSION_SECRET_KEY: str = "your-secret-key-here-change-in-production"
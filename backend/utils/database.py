@@ -105,464 +105,49 @@ def create_database(database_name="brail_db", charset="utf8mb4", collate="utf8mb
         return False
 
 
-def init_users_data():
-    """初始化 users 表数据（如果 mock-data.json 中有数据）"""
-    try:
-        import json
-        import os
-        from models.user import User
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING] 未找到 fixtures/mock-data.json 文件，跳过用户数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        users_data = data.get('users', [])
-        
-        if not users_data:
-            print("[WARNING]  mock-data.json 中没有 users 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有用户数据
-            existing_count = db.query(User).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 用户数据已存在 ({existing_count} 个用户)，跳过初始化")
-                return
-            
-            # 插入用户数据
-            print(f"[INFO] 正在初始化 {len(users_data)} 个用户...")
-            for user_data in users_data:
-                user = User(
-                    id=user_data['id'],
-                    name=user_data['name'],
-                    email=user_data['email'],
-                    password=user_data['password'],
-                    cnpj=user_data.get('cnpj'),
-                    employee_count=user_data.get('employee_count'),
-                    monthly_revenue=user_data.get('monthly_revenue'),
-                    phone=user_data.get('phone'),
-                    role=user_data.get('role', 'user')
-                )
-                db.add(user)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(users_data)} 个用户")
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化用户数据失败: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"[ERROR] 读取用户数据失败: {str(e)}")
-
-
-def init_categories_data():
-    """初始化 categories 表数据（如果 mock-data.json 中有数据）"""
-    try:
-        import json
-        import os
-        from models.category import Category
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING]  未找到 fixtures/mock-data.json 文件，跳过分类数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        categories_data = data.get('categories', [])
-        
-        if not categories_data:
-            print("[WARNING]  mock-data.json 中没有 categories 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有分类数据
-            existing_count = db.query(Category).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 分类数据已存在 ({existing_count} 个分类)，跳过初始化")
-                return
-            
-            # 插入分类数据
-            print(f"[INFO] 正在初始化 {len(categories_data)} 个分类...")
-            for cat_data in categories_data:
-                category = Category(
-                    id=cat_data['id'],
-                    name=cat_data['name'],
-                    icon=cat_data.get('icon'),
-                    description=cat_data.get('description')
-                )
-                db.add(category)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(categories_data)} 个分类")
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化分类数据失败: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"[ERROR] 读取分类数据失败: {str(e)}")
-
-
-def init_suppliers_data():
-    """初始化 suppliers 表数据（如果 mock-data.json 中有数据）"""
-    try:
-        import json
-        import os
-        from models.supplier import Supplier
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING]  未找到 fixtures/mock-data.json 文件，跳过供应商数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        suppliers_data = data.get('suppliers', [])
-        
-        if not suppliers_data:
-            print("[WARNING]  mock-data.json 中没有 suppliers 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有供应商数据
-            existing_count = db.query(Supplier).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 供应商数据已存在 ({existing_count} 个供应商)，跳过初始化")
-                return
-            
-            # 插入供应商数据
-            print(f"[INFO] 正在初始化 {len(suppliers_data)} 个供应商...")
-            for sup_data in suppliers_data:
-                supplier = Supplier(
-                    id=sup_data['id'],
-                    name=sup_data['company_name'],
-                    location=sup_data['location']
-                )
-                db.add(supplier)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(suppliers_data)} 个供应商")
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化供应商数据失败: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"[ERROR] 读取供应商数据失败: {str(e)}")
-
-
-def init_products_data():
-    """初始化 products 表数据（如果 mock-data.json 中有数据）"""
-    try:
-        import json
-        import os
-        from models.product import Product
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING]  未找到 fixtures/mock-data.json 文件，跳过产品数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        products_data = data.get('products', [])
-        
-        if not products_data:
-            print("[WARNING]  mock-data.json 中没有 products 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有产品数据
-            existing_count = db.query(Product).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 产品数据已存在 ({existing_count} 个产品)，跳过初始化")
-                return
-            
-            # 插入产品数据
-            print(f"[INFO] 正在初始化 {len(products_data)} 个产品...")
-            for prod_data in products_data:
-                product = Product(
-                    id=prod_data['id'],
-                    title=prod_data['title'],
-                    description=prod_data.get('description'),
-                    img=prod_data.get('img'),
-                    product_mlb_thumbnail=prod_data.get('product_mlb_thumbnail'),
-                    category_id=prod_data['category_id'],
-                    supplier_id=prod_data['supplier_id'],
-                    shipping_from=prod_data.get('shipping_from'),
-                    weight=prod_data.get('weight'),
-                    dimensions=prod_data.get('dimensions'),
-                    moq=prod_data.get('moq', 1),
-                    tags=prod_data.get('tags'),
-                    stock_quantity=prod_data.get('stock_quantity', 0),
-                    reserved_quantity=prod_data.get('reserved_quantity', 0),
-                    low_stock_threshold=prod_data.get('low_stock_threshold', 10),
-                    max_order_quantity=prod_data.get('max_order_quantity'),
-                    cost_price=prod_data.get('cost_price'),
-                    selling_price=prod_data['selling_price'],
-                    discount_price=prod_data.get('discount_price'),
-                    product_mlb_price=prod_data.get('product_mlb_price'),
-                    roi=prod_data.get('roi'),
-                    variations=prod_data.get('variations')  # 添加 variations 字段
-                )
-                db.add(product)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(products_data)} 个产品") 
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化产品数据失败: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"[ERROR] 读取产品数据失败: {str(e)}")
-
-
-def init_orders_data():
-    """初始化 orders 表数据（如果 mock-data.json 中有数据）"""
-    try:
-        import json
-        import os
-        from datetime import datetime
-        from models.order import Order, OrderItem
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING]  未找到 fixtures/mock-data.json 文件，跳过订单数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        orders_data = data.get('orders', [])
-        
-        if not orders_data:
-            print("[WARNING]  mock-data.json 中没有 orders 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
-        
-        try:
-            # 检查是否已有订单数据
-            existing_count = db.query(Order).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 订单数据已存在 ({existing_count} 个订单)，跳过初始化")
-                return
-            
-            # 插入订单数据
-            print(f"[INFO] 正在初始化 {len(orders_data)} 个订单...")
-            for order_data in orders_data:
-                # 解析订单日期
-                order_date = None
-                if order_data.get('order_date'):
-                    try:
-                        order_date = datetime.fromisoformat(order_data['order_date'].replace('T', ' '))
-                    except:
-                        pass
-                
-                # 创建订单
-                order = Order(
-                    id=order_data['id'],
-                    user_id=order_data['user_id'],
-                    status=order_data['status'],
-                    status_step=order_data.get('status_step', 1),
-                    status_text=order_data.get('status_text'),
-                    status_detail_text=order_data.get('status_detail_text'),
-                    customer_name=order_data['customer_name'],
-                    total_amount=order_data['total_amount'],
-                    shipping_street=order_data.get('shipping_street'),
-                    shipping_city=order_data.get('shipping_city'),
-                    shipping_zipcode=order_data.get('shipping_zipcode'),
-                    payment_method=order_data.get('payment_method'),
-                    notes=order_data.get('notes'),
-                    order_date=order_date
-                )
-                db.add(order)
-                db.flush()  # 获取订单ID
-                
-                # 创建订单商品
-                items_data = order_data.get('items', [])
-                for item_data in items_data:
-                    order_item = OrderItem(
-                        order_id=order.id,
-                        product_id=item_data['product_id'],
-                        product_name=item_data['product_name'],
-                        product_image=item_data.get('product_image'),
-                        quantity=item_data['quantity'],
-                        price=item_data['price']
-                    )
-                    db.add(order_item)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(orders_data)} 个订单")
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化订单数据失败: {str(e)}")
-            db.rollback()
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"[ERROR] 读取订单数据失败: {str(e)}")
-
-
-def init_sample_purchases_data():
-    """初始化 sample_purchases 表数据（如果 mock-data.json 中有数据）"""
+def init_tags_data():
+    """初始化 tags 表的内置标签，并根据产品的 tags 字段建立 product_tags 关联"""
+    from utils.tags import seed_builtin_tags, backfill_product_tags
+    
+    # 获取数据库会话
+    db = SessionLocal()
+    
     try:
-        import json
-        import os
-        from datetime import datetime
-        from models.sample_purchase import SamplePurchase
-        
-        # 检查 mock-data.json 文件是否存在
-        mock_data_path = 'fixtures/mock-data.json'
-        if not os.path.exists(mock_data_path):
-            print("[WARNING]  未找到 fixtures/mock-data.json 文件，跳过小样购买记录数据初始化")
-            return
-        
-        # 读取 mock 数据
-        with open(mock_data_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        sample_purchases_data = data.get('sample_purchases', [])
-        
-        if not sample_purchases_data:
-            print("[WARNING]  mock-data.json 中没有 sample_purchases 数据，跳过初始化")
-            return
-        
-        # 获取数据库会话
-        db = SessionLocal()
+        builtin_count = seed_builtin_tags(db)
+        link_count = backfill_product_tags(db)
+        db.commit()
+        if builtin_count or link_count:
+            print(f"[OK] 成功初始化 {builtin_count} 个内置标签、{link_count} 个产品标签关联")
+        else:
+            print("[OK] 标签数据已存在，跳过初始化")
         
-        try:
-            # 检查是否已有小样购买记录数据
-            existing_count = db.query(SamplePurchase).count()
-            
-            if existing_count > 0:
-                print(f"[OK] 小样购买记录数据已存在 ({existing_count} 条记录)，跳过初始化")
-                return
-            
-            # 插入小样购买记录数据
-            print(f"[INFO] 正在初始化 {len(sample_purchases_data)} 条小样购买记录...")
-            for sample_data in sample_purchases_data:
-                # 解析购买日期
-                purchase_date = None
-                if sample_data.get('purchase_date'):
-                    try:
-                        purchase_date = datetime.fromisoformat(sample_data['purchase_date'].replace('T', ' '))
-                    except:
-                        pass
-                
-                # 解析创建和更新时间 
-                created_at = None
-                updated_at = None
-                if sample_data.get('created_at'):
-                    try:
-                        created_at = datetime.fromisoformat(sample_data['created_at'].replace('T', ' '))
-                    except:
-                        pass
-                if sample_data.get('updated_at'):
-                    try:
-                        updated_at = datetime.fromisoformat(sample_data['updated_at'].replace('T', ' '))
-                    except:
-                        pass
-                
-                # 创建小样购买记录
-                sample_purchase = SamplePurchase(
-                    id=sample_data['id'],
-                    user_id=sample_data['user_id'],
-                    product_id=sample_data['product_id'],
-                    purchase_date=purchase_date,
-                    status=sample_data.get('status', 'purchased'),
-                    created_at=created_at,
-                    updated_at=updated_at
-                )
-                db.add(sample_purchase)
-            
-            db.commit()
-            print(f"[OK] 成功初始化 {len(sample_purchases_data)} 条小样购买记录")
-            
-        except Exception as e:
-            print(f"[ERROR] 初始化小样购买记录数据失败: {str(e)}") 
-            db.rollback()
-        finally:
-            db.close()
-            
     except Exception as e:
-        print(f"[ERROR] 读取小样购买记录数据失败: {str(e)}")
+        print(f"[ERROR] 初始化标签数据失败: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
 
 
 def create_tables():
     """创建所有数据库表"""  
     try:
         # 导入所有模型以确保它们被注册到 Base.metadata
-        from models import User, Category, Cart, CartItem, Supplier, Product, Order, OrderItem, SamplePurchase  # 导入所有模型
+        from models import User, Category, Cart, CartItem, Supplier, Product, Order, OrderItem, SamplePurchase, Tag, ProductTag, CatalogTombstone, SeedChecksum  # 导入所有模型
         
         # 创建所有表
         Base.metadata.create_all(bind=engine)
         print("[OK] 数据库表创建成功")
         
-        # 初始化 users 数据（如果有）
-        init_users_data()
+        # 已有的表按模型补齐结构变更（create_all 不修改已有的表）
+        from utils.migrations import run_migrations
+        run_migrations()
         
-        # 初始化 categories 数据（如果有）
-        init_categories_data()
+        # 一次读取 fixtures/mock-data.json，按依赖顺序批量初始化各表（数据未变化的表跳过）
+        from utils.seeding import seed_fixture_data
+        seed_fixture_data()
         
-        # 初始化 suppliers 数据（如果有）
-        init_suppliers_data()
-        
-        # 初始化 products 数据（如果有）
-        init_products_data()
-        
-        # 初始化 orders 数据（如果有）
-        init_orders_data()
-        
-        # 初始化 sample_purchases 数据（如果有）
-        init_sample_purchases_data()
+        # 初始化 tags 数据，并建立产品标签关联
+        init_tags_data()
         
         return True
         
@@ -599,4 +184,111 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+
+def get_async_database_url():
+    """获取异步数据库连接地址（未配置时由 DATABASE_URL 推导）"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return settings.DATABASE_URL.replace("+pymysql", "+aiomysql", 1)
+
+
+def is_async_mode():
+    """当前是否使用异步数据库引擎"""
+    return settings.DB_ENGINE_MODE.lower() == "async"
+
+
+# 创建异步数据库引擎（仅在 async 模式下创建，sync 模式不依赖 aiomysql）
+async_engine = create_async_engine(
+    get_async_database_url(),
+    echo=False,
+    pool_pre_ping=True,
+    pool_recycle=300
+) if is_async_mode() else None
+
+# 创建AsyncSessionLocal类（提交后不过期对象，避免在异步上下文中触发隐式加载）
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+class SyncSessionAdapter:
+    """
+    同步会话适配器
+    用与 AsyncSession 相同的 await 接口包装同步 Session，
+    使路由在 DB_ENGINE_MODE=sync 时无需修改即可运行（查询仍会阻塞事件循环，用于基准对比）
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return self.sync_session.scalar(statement, params, **kwargs)
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return self.sync_session.scalars(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def delete(self, instance):
+        self.sync_session.delete(instance)
+
+    async def flush(self, objects=None):
+        self.sync_session.flush(objects)
+
+    async def refresh(self, instance, attribute_names=None):
+        self.sync_session.refresh(instance, attribute_names)
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.sync_session.rollback()
+
+    async def close(self):
+        self.sync_session.close()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+
+@asynccontextmanager
+async def open_session():
+    """
+    打开一个数据库会话（根据 DB_ENGINE_MODE 选择异步或同步引擎）
+    供依赖注入以及后台任务等不经过路由的场景使用
+    """
+    if is_async_mode():
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        session = SessionLocal()
+        try:
+            yield SyncSessionAdapter(session)
+        finally:
+            session.close()
+
+
+# 创建异步数据库会话
+async def get_async_db():
+    """获取异步数据库会话（所有路由统一使用）"""
+    async with open_session() as db:
+        yield db 
\ No newline at end of file
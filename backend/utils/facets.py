@@ -0,0 +1,202 @@
+"""
+分面筛选
+基于目录读模型为每个类别预先计算位图索引：
+- 产品按创建时间倒序编号，每个标签、供应商、发货地和价格区间对应一个位图（Python int），
+  第 i 位为 1 表示第 i 个产品具有该值
+- 组内多选取并集（OR），组间取交集（AND），任意价格范围通过按价格排序的数组二分查找得到
+- 每个分面的计数只应用其他分面的筛选条件（多选时仍能看到同组其他值的数量），
+  计数即位图与筛选结果按位与后的 1 的个数，不需要遍历产品
+- 索引按目录读模型的版本缓存，产品写入使读模型失效后在下一次筛选时重建
+"""
+import bisect
+import math
+from utils.config import settings
+from utils.catalog import catalog
+
+# 分面名称 -> 请求体中对应的筛选字段
+FACETS = {
+    "tags": "tags",
+    "suppliers": "supplier_ids",
+    "shipping_from": "shipping_from",
+    "price": "price_buckets",
+}
+
+
+def popcount(bitmap):
+    # int.bit_count 需要 Python 3.10
+    return bin(bitmap).count("1")
+
+
+def _bitmap(positions, size):
+    """由产品编号列表生成位图（一次性构造，避免对大整数反复按位或）"""
+    buffer = bytearray((size + 7) // 8)
+    for position in positions:
+        buffer[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def effective_price(product):
+    """实际支付价格：有折扣价时使用折扣价"""
+    return product.discount_price if product.discount_price is not None else product.selling_price
+
+
+def _bucket_label(low, high):
+    return f"{low:g}-{high:g}" if high is not None else f"{low:g}+"
+
+
+def price_buckets():
+    """价格区间列表 [(标签, 下限, 上限)]，上限不包含在区间内，最后一个区间没有上限"""
+    bounds = [0] + sorted(settings.FACET_PRICE_BUCKETS)
+    buckets = []
+    for i, low in enumerate(bounds):
+        high = bounds[i + 1] if i + 1 < len(bounds) else None
+        buckets.append((_bucket_label(low, high), low, high))
+    return buckets
+
+
+class FacetIndex:
+    """某个类别（或全部产品）的分面位图索引"""
+
+    def __init__(self, products):
+        self.products = products  # 按创建时间倒序，下标即产品编号
+        self.size = len(products)
+        self.all = (1 << self.size) - 1
+        self.buckets = price_buckets()
+
+        positions = {facet: {} for facet in FACETS}
+        priced = []
+        for position, product in enumerate(products):
+            for tag in set(product.tags or []):
+                positions["tags"].setdefault(str(tag), []).append(position)
+            positions["suppliers"].setdefault(product.supplier_id, []).append(position)
+            if product.shipping_from:
+                positions["shipping_from"].setdefault(product.shipping_from, []).append(position)
+            price = effective_price(product)
+            if price is not None:
+                priced.append((price, position))
+                positions["price"].setdefault(self._bucket_of(price), []).append(position)
+
+        self.bitmaps = {
+            facet: {value: _bitmap(items, self.size) for value, items in values.items()}
+            for facet, values in positions.items()
+        }
+        priced.sort()
+        self._prices = [price for price, _ in priced]
+        self._price_positions = [position for _, position in priced]
+
+    def _bucket_of(self, price):
+        for label, low, high in self.buckets:
+            if high is None or price < high:
+                return label
+
+    def price_range(self, min_price=None, max_price=None):
+        """价格在 [min_price, max_price] 之间的产品位图"""
+        start = bisect.bisect_left(self._prices, min_price) if min_price is not None else 0
+        end = bisect.bisect_right(self._prices, max_price) if max_price is not None else len(self._prices)
+        return _bitmap(self._price_positions[start:end], self.size)
+
+    def _group_mask(self, facet, values):
+        """同一分面内多选取并集"""
+        bitmaps = self.bitmaps[facet]
+        mask = 0
+        for value in values:
+            mask |= bitmaps.get(value, 0)
+        return mask
+
+    def filter(self, selected, min_price=None, max_price=None):
+        """
+        应用筛选条件
+
+        Args:
+            selected (dict): 分面名称 -> 选中的值列表（空列表或不存在表示不筛选）
+            min_price, max_price: 实际支付价格范围（可选）
+
+        Returns:
+            tuple: (筛选结果位图, {分面名称: {值: 数量}})
+        """
+        masks = {facet: self._group_mask(facet, values) for facet, values in selected.items() if values}
+        base = self.all
+        if min_price is not None or max_price is not None:
+            base &= self.price_range(min_price, max_price)
+
+        matched = base
+        for mask in masks.values():
+            matched &= mask
+
+        counts = {}
+        for facet, bitmaps in self.bitmaps.items():
+            # 计数时不应用本分面自己的筛选条件
+            others = base
+            for other, mask in masks.items():
+                if other != facet:
+                    others &= mask
+            counts[facet] = {value: popcount(bitmap & others) for value, bitmap in bitmaps.items()}
+        return matched, counts
+
+    def page(self, matched, start=0, limit=None):
+        """按编号顺序（创建时间倒序）取出从 start 开始的最多 limit 个产品"""
+        remaining = matched >> start << start
+        products = []
+        while remaining and (limit is None or len(products) < limit):
+            lowest = remaining & -remaining
+            products.append(self.products[lowest.bit_length() - 1])
+            remaining ^= lowest
+        return products, remaining != 0
+
+    def position_after(self, created_at, product_id):
+        """(created_at, id) 游标之后第一个产品的编号"""
+        key = (created_at is not None, created_at or 0, product_id)
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            product = self.products[middle]
+            if (product.created_at is not None, product.created_at or 0, product.id) >= key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+def facet_index(category_id=None):
+    """获取类别（为空时为全部产品）的分面索引，按目录读模型版本缓存"""
+    def build():
+        products = catalog.category_products(category_id) if category_id else catalog.all_products()
+        return FacetIndex(products)
+    return catalog.view(("facets", category_id), build)
+
+
+def format_facets(counts, selected, suppliers, buckets):
+    """
+    将计数整理为接口返回格式：价格区间按区间顺序全部返回；
+    标签、供应商和发货地按数量倒序，数量为 0 的值只在被选中时返回
+    """
+    result = {}
+    for facet, values in counts.items():
+        chosen = set(selected.get(facet) or [])
+        if facet == "price":
+            items = [{"value": label, "count": values.get(label, 0)} for label, _, _ in buckets]
+        else:
+            items = [{"value": value, "count": count} for value, count in values.items() if count]
+            items.extend({"value": value, "count": 0} for value in chosen if not values.get(value))
+            items.sort(key=lambda item: (-item["count"], str(item["value"])))
+        if facet == "suppliers":
+            for item in items:
+                supplier = suppliers.get(item["value"])
+                item["name"] = supplier.name if supplier else None
+        for item in items:
+            item["selected"] = item["value"] in chosen
+        result[facet] = items
+    return result
+
+
+def parse_price(value, name):
+    """校验价格参数"""
+    if value is None:
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 必须是数字")
+    if math.isnan(value) or value < 0:
+        raise ValueError(f"{name} 不能小于 0")
+    return value
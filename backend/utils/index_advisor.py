@@ -0,0 +1,176 @@
+"""
+索引顾问
+对注册的热点查询执行 EXPLAIN，标记出全表扫描；同时检查模型中声明的索引是否已在数据库中创建
+
+用法（在 backend 目录下执行）:
+    python -m utils.index_advisor                  # 分析热点查询并列出缺失的索引
+    python -m utils.index_advisor --create-missing # 同时创建缺失的索引（先执行数据库迁移，唯一索引由迁移在合并重复数据后创建）
+"""
+import argparse
+import sys
+from datetime import datetime
+from sqlalchemy import select, inspect
+from utils.database import engine, Base
+
+# 热点查询注册表（名称 -> 返回查询语句的函数）
+HOT_QUERIES = {}
+
+
+def register_hot_query(name, builder):
+    """注册一个需要 EXPLAIN 检查的热点查询"""
+    HOT_QUERIES[name] = builder
+
+
+def _register_builtin_queries():
+    """注册订单、购物车、产品列表的热点查询"""
+    from models import Cart, CartItem, OrderItem
+    from utils.order_query import ORDER_FILTERS, build_order_query
+    from utils.cart_query import build_cart_items_query
+    from utils.product_query import PRODUCT_SORTS, build_category_products_query, build_tag_products_query
+    from utils.change_feed import FEED_ENTITIES, build_changes_query, build_tombstones_query
+    from utils.config import settings
+
+    for filter_name in ORDER_FILTERS:
+        register_hot_query(
+            f"orders.{filter_name}",
+            lambda filter_name=filter_name: build_order_query(status_filter=filter_name, limit=settings.ORDER_PAGE_SIZE + 1)
+        )
+    register_hot_query(
+        "orders.by_user",
+        lambda: build_order_query(user_id=1, limit=settings.ORDER_PAGE_SIZE + 1)
+    )
+    register_hot_query(
+        "order_items.by_orders",
+        lambda: select(OrderItem).where(OrderItem.order_id.in_(["ORD-001", "ORD-002"]))
+    )
+    register_hot_query(
+        "carts.by_user",
+        lambda: select(Cart).where(Cart.user_id == 1).limit(1)
+    )
+    register_hot_query(
+        "cart_items.by_cart",
+        lambda: build_cart_items_query(1)
+    )
+    register_hot_query(
+        "cart_items.by_cart_product",
+        lambda: select(CartItem).where(CartItem.cart_id == 1, CartItem.product_id == "MLB000000")
+    )
+    for sort, (_, descending) in PRODUCT_SORTS.items():
+        register_hot_query(
+            f"products.by_category.{sort}",
+            lambda sort=sort, descending=descending: build_category_products_query(
+                "MLB5672", sort=sort, descending=descending, limit=settings.PRODUCT_PAGE_SIZE + 1
+            )
+        )
+    for entity, (model, _) in FEED_ENTITIES.items():
+        register_hot_query(
+            f"changes.{entity}",
+            lambda model=model: build_changes_query(
+                model, (datetime(2024, 1, 1), "MLB000000"), limit=settings.CHANGE_FEED_LIMIT + 1
+            )
+        )
+    register_hot_query(
+        "changes.tombstones",
+        lambda: build_tombstones_query((datetime(2024, 1, 1), 0), limit=settings.CHANGE_FEED_LIMIT + 1)
+    )
+    register_hot_query(
+        "products.by_tag",
+        lambda: build_tag_products_query("tag-001", limit=settings.PRODUCT_PAGE_SIZE + 1)
+    )
+
+
+def explain(conn, stmt):
+    """
+    对查询语句执行 EXPLAIN
+
+    Returns:
+        tuple: (执行计划明细列表, 全表扫描的表名列表, 提示信息列表)
+    """
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    plan, full_scans, notes = [], [], []
+
+    if conn.dialect.name == "sqlite":
+        for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql):
+            detail = row[3]
+            plan.append(detail)
+            # "SCAN orders" 为全表扫描，"SCAN orders USING INDEX ..." 为按索引顺序扫描
+            if detail.startswith("SCAN") and "USING" not in detail:
+                full_scans.append(detail.split()[1])
+    else:
+        for row in conn.exec_driver_sql("EXPLAIN " + sql).mappings():
+            plan.append(
+                f"table={row['table']} type={row['type']} key={row['key']} "
+                f"rows={row['rows']} extra={row['Extra']}"
+            )
+            if row["type"] == "ALL":
+                full_scans.append(row["table"])
+            if row["Extra"] and "filesort" in row["Extra"]:
+                notes.append(f"{row['table']}: Using filesort")
+
+    return plan, full_scans, notes
+
+
+def find_missing_indexes(conn):
+    """找出模型中已声明、但数据库中尚未创建的索引"""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                missing.append(index)
+    return missing
+
+
+def run(create_missing=False):
+    """运行索引顾问，存在全表扫描时返回 False"""
+    # 导入所有模型以确保它们被注册到 Base.metadata
+    import models  # noqa: F401
+
+    if not HOT_QUERIES:
+        _register_builtin_queries()
+
+    if create_missing:
+        # 唯一索引需要先合并已有的重复数据，由对应的迁移创建
+        from utils.migrations import run_migrations
+        run_migrations()
+
+    ok = True
+    with engine.connect() as conn:
+        missing = find_missing_indexes(conn)
+        if missing:
+            print(f"[WARNING] 数据库中缺少 {len(missing)} 个模型已声明的索引:")
+            for index in missing:
+                columns = ", ".join(column.name for column in index.columns)
+                print(f"    {index.table.name}.{index.name} ({columns})")
+            if create_missing:
+                for index in missing:
+                    index.create(bind=conn)
+                conn.commit()
+                print(f"[OK] 已创建 {len(missing)} 个缺失的索引")
+        else:
+            print("[OK] 模型声明的索引均已创建")
+
+        for name, builder in HOT_QUERIES.items():
+            plan, full_scans, notes = explain(conn, builder())
+            if full_scans:
+                ok = False
+                print(f"[WARNING] {name}: 全表扫描 {', '.join(full_scans)}")
+            else:
+                print(f"[OK] {name}")
+            for line in plan:
+                print(f"    {line}")
+            for note in notes:
+                print(f"    [INFO] {note}")
+
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="对热点查询执行 EXPLAIN 并标记全表扫描")
+    parser.add_argument("--create-missing", action="store_true", help="创建模型中已声明但数据库中缺失的索引")
+    args = parser.parse_args()
+    sys.exit(0 if run(create_missing=args.create_missing) else 1)
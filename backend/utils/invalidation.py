@@ -0,0 +1,108 @@
+"""
+跨进程缓存失效总线
+多个 uvicorn 工作进程各自持有进程内缓存（目录读模型、搜索索引等），
+写操作在本进程内更新缓存后，通过 Redis 发布/订阅通知其他工作进程淘汰对应条目：
+- 写操作调用 publish(实体, ids) 发布失效消息，消息带有该实体在 Redis 中递增的版本号
+- 缓存模块调用 subscribe(实体, 处理函数) 注册淘汰逻辑
+- 每个工作进程在 FastAPI lifespan 中调用 start_listener() 启动订阅线程
+"""
+import json
+import time
+import uuid
+from utils.config import settings
+from utils.session import redis_client
+
+# 当前工作进程的标识（忽略自己发布的消息，本进程的缓存已由写操作直接更新）
+WORKER_ID = uuid.uuid4().hex
+
+# 实体名 -> [处理函数(ids, version)]，ids 为 None 表示淘汰该实体的全部缓存
+_handlers = {}
+
+_pubsub = None
+_listener = None
+
+
+def subscribe(entity, handler):
+    """注册某个实体的失效处理函数"""
+    _handlers.setdefault(entity, []).append(handler)
+
+
+def dispatch(entity, ids=None, version=None):
+    """在当前进程内调用某个实体的所有失效处理函数"""
+    for handler in _handlers.get(entity, []):
+        try:
+            handler(ids, version)
+        except Exception as e:
+            print(f"❌ 处理缓存失效消息失败 ({entity}): {str(e)}")
+
+
+def publish(entity, ids=None):
+    """
+    通知其他工作进程淘汰某个实体的缓存
+
+    Redis 不可用时只打印警告，不影响写操作本身（其他进程依赖缓存的定期刷新兜底）
+
+    Returns:
+        int: 该实体的新版本号，未启用或发布失败时返回 None
+    """
+    if not settings.CACHE_INVALIDATION_ENABLED:
+        return None
+    try:
+        version = redis_client.incr(f"cache_version:{entity}")
+        message = {
+            "entity": entity,
+            "ids": list(ids) if ids is not None else None,
+            "version": version,
+            "origin": WORKER_ID,
+        }
+        redis_client.publish(settings.CACHE_INVALIDATION_CHANNEL, json.dumps(message))
+        return version
+    except Exception as e:
+        print(f"⚠️ 发布缓存失效消息失败 ({entity}): {str(e)}")
+        return None
+
+
+def _on_message(message):
+    """订阅线程收到消息时调用"""
+    try:
+        payload = json.loads(message["data"])
+    except (TypeError, ValueError):
+        print(f"⚠️ 忽略无法解析的缓存失效消息: {message.get('data')!r}")
+        return
+    if payload.get("origin") == WORKER_ID:
+        return
+    dispatch(payload.get("entity"), payload.get("ids"), payload.get("version"))
+
+
+def _on_error(error, pubsub, thread):
+    """订阅连接异常：期间的消息可能已丢失，淘汰全部缓存后等待自动重连"""
+    print(f"⚠️ 缓存失效订阅连接异常: {str(error)}")
+    for entity in list(_handlers):
+        dispatch(entity)
+    time.sleep(1)
+
+
+def start_listener():
+    """启动订阅线程（在 FastAPI lifespan 启动阶段调用）"""
+    global _pubsub, _listener
+    if _listener is not None or not settings.CACHE_INVALIDATION_ENABLED:
+        return
+    try:
+        _pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        _pubsub.subscribe(**{settings.CACHE_INVALIDATION_CHANNEL: _on_message})
+        _listener = _pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=_on_error)
+        print(f"✅ 已订阅缓存失效频道 {settings.CACHE_INVALIDATION_CHANNEL}")
+    except Exception as e:
+        _pubsub = None
+        print(f"⚠️ 订阅缓存失效频道失败，跨进程缓存失效不可用: {str(e)}")
+
+
+def stop_listener():
+    """停止订阅线程（在 FastAPI lifespan 关闭阶段调用）"""
+    global _pubsub, _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _pubsub is not None:
+        _pubsub.close()
+        _pubsub = None
@@ -0,0 +1,334 @@
+"""
+数据库结构迁移
+create_all 只创建不存在的表，不会修改已有表的列类型，也不会为已有表补建索引；
+这里注册的迁移按顺序执行，每个迁移先检查是否已经完成，可以重复执行
+
+写路径依赖的唯一索引（如加入购物车的 upsert）登记为必需索引：应用启动时检查，
+缺失时记录错误日志，依赖它的写操作抛出 MissingIndexError，而不是静默写入重复数据；
+缺失的索引在每次使用时重新检查，迁移完成后无需重启即可恢复写操作
+
+用法（在 backend 目录下执行）:
+    python -m utils.migrations          # 执行所有未完成的迁移
+    python -m utils.migrations --check  # 只列出未完成的迁移
+"""
+import argparse
+import sys
+from sqlalchemy import Float, bindparam, delete, func, inspect, select, update
+from utils.database import engine
+
+# 迁移注册表（按执行顺序排列的 (名称, 是否需要执行, 执行迁移)）
+MIGRATIONS = []
+
+# 必需的唯一索引（索引名称 -> (表名, 创建该索引的迁移名称)）
+REQUIRED_INDEXES = {}
+
+# 检查出的缺失索引名称（None 表示尚未检查）
+_missing_indexes = None
+
+
+class MissingIndexError(RuntimeError):
+    """写操作依赖的唯一索引尚未创建"""
+
+
+def register_migration(name, is_pending, apply):
+    """
+    注册一个迁移
+
+    Args:
+        name: 迁移名称
+        is_pending: is_pending(conn) -> bool，迁移是否尚未完成
+        apply: apply(conn)，执行迁移（在调用方的事务中执行）
+    """
+    MIGRATIONS.append((name, is_pending, apply))
+
+
+def register_required_index(table_name, index_name, migration_name):
+    """登记一个写路径依赖的唯一索引（由 migration_name 迁移创建）"""
+    REQUIRED_INDEXES[index_name] = (table_name, migration_name)
+
+
+def _table_exists(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+
+def _index_exists(conn, table_name, index_name):
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return False
+    names = {index["name"] for index in inspector.get_indexes(table_name)}
+    names.update(constraint["name"] for constraint in inspector.get_unique_constraints(table_name))
+    return index_name in names
+
+
+def _create_index(conn, table, index_name):
+    """创建模型中声明的索引"""
+    next(index for index in table.indexes if index.name == index_name).create(bind=conn)
+
+
+# ---------------------------------------------------------------------------
+# products 价格列: FLOAT -> DECIMAL(10, 2)
+# 单精度 FLOAT 无法精确保存两位小数，游标分页的 price = ? 很少相等、范围比较顺序错乱；
+# SQLite 不支持修改列类型，其 REAL 值按双精度比较，游标中的值可以精确匹配，无需迁移
+# ---------------------------------------------------------------------------
+
+PRICE_COLUMNS = ("selling_price", "discount_price")
+
+
+def _float_price_columns(conn):
+    """products 表中仍为浮点类型的价格列"""
+    columns = {column["name"]: column for column in inspect(conn).get_columns("products")}
+    return [name for name in PRICE_COLUMNS if name in columns and isinstance(columns[name]["type"], Float)]
+
+
+def _price_columns_pending(conn):
+    if conn.dialect.name != "mysql" or not _table_exists(conn, "products"):
+        return False
+    return bool(_float_price_columns(conn))
+
+
+def _migrate_price_columns(conn):
+    from models.product import Product
+
+    clauses = []
+    for name in _float_price_columns(conn):
+        column = Product.__table__.c[name]
+        clauses.append(
+            f"MODIFY {name} {column.type.compile(dialect=conn.dialect)} "
+            f"{'NULL' if column.nullable else 'NOT NULL'} COMMENT '{column.comment}'"
+        )
+    conn.exec_driver_sql("ALTER TABLE products " + ", ".join(clauses))
+
+
+register_migration("products.price_columns_decimal", _price_columns_pending, _migrate_price_columns)
+
+
+# ---------------------------------------------------------------------------
+# cart_items (cart_id, product_id) 唯一索引
+# 加入购物车的 upsert 依赖该索引把并发加入转为数量累加；已有的重复行先合并
+# （数量相加，保留 ID 最小的一行），再创建索引
+# ---------------------------------------------------------------------------
+
+CART_ITEM_INDEX = "uq_cart_items_cart_product"
+
+
+def _cart_item_index_pending(conn):
+    return _table_exists(conn, "cart_items") and not _index_exists(conn, "cart_items", CART_ITEM_INDEX)
+
+
+def _merge_duplicate_cart_items(conn):
+    """合并同一购物车中同一商品的多行，返回删除的行数"""
+    from models.cart_item import CartItem
+
+    duplicates = conn.execute(
+        select(
+            CartItem.cart_id,
+            CartItem.product_id,
+            func.min(CartItem.id).label("keep_id"),
+            func.sum(CartItem.quantity).label("total_quantity"),
+        )
+        .group_by(CartItem.cart_id, CartItem.product_id)
+        .having(func.count() > 1)
+    ).all()
+    if not duplicates:
+        return 0
+
+    table = CartItem.__table__
+    conn.execute(
+        update(table).where(table.c.id == bindparam("keep_id")).values(quantity=bindparam("total_quantity")),
+        [{"keep_id": row.keep_id, "total_quantity": row.total_quantity} for row in duplicates]
+    )
+    result = conn.execute(
+        delete(table).where(
+            table.c.cart_id == bindparam("dup_cart_id"),
+            table.c.product_id == bindparam("dup_product_id"),
+            table.c.id != bindparam("keep_id"),
+        ),
+        [
+            {"dup_cart_id": row.cart_id, "dup_product_id": row.product_id, "keep_id": row.keep_id}
+            for row in duplicates
+        ]
+    )
+    return result.rowcount
+
+
+def _migrate_cart_item_index(conn):
+    from models.cart_item import CartItem
+
+    removed = _merge_duplicate_cart_items(conn)
+    if removed:
+        print(f"[INFO] 已合并 {removed} 个重复的购物车商品行")
+    _create_index(conn, CartItem.__table__, CART_ITEM_INDEX)
+
+
+register_migration("cart_items.unique_cart_product", _cart_item_index_pending, _migrate_cart_item_index)
+register_required_index("cart_items", CART_ITEM_INDEX, "cart_items.unique_cart_product")
+
+
+# ---------------------------------------------------------------------------
+# carts.user_id 唯一索引
+# 获取购物车ID的 insert-or-get 语句依赖该索引；没有索引时每次缓存未命中都会新建购物车。
+# 同一用户的多个购物车合并到 ID 最小的购物车：商品行移到该购物车（同一商品数量相加），
+# 删除其余购物车后创建索引，并替换原来的普通索引 ix_carts_user_id
+# ---------------------------------------------------------------------------
+
+CART_USER_INDEX = "uq_carts_user_id"
+LEGACY_CART_USER_INDEX = "ix_carts_user_id"
+
+
+def _cart_user_index_pending(conn):
+    return _table_exists(conn, "carts") and not _index_exists(conn, "carts", CART_USER_INDEX)
+
+
+def _merge_duplicate_carts(conn):
+    """合并同一用户的多个购物车，返回删除的购物车数量"""
+    from models.cart import Cart
+    from models.cart_item import CartItem
+
+    duplicates = conn.execute(
+        select(Cart.user_id, func.min(Cart.id).label("keep_id"))
+        .group_by(Cart.user_id)
+        .having(func.count() > 1)
+    ).all()
+    removed = 0
+    for user_id, keep_id in duplicates:
+        cart_ids = conn.execute(select(Cart.id).where(Cart.user_id == user_id)).scalars().all()
+        items = conn.execute(
+            select(CartItem.id, CartItem.cart_id, CartItem.product_id, CartItem.quantity)
+            .where(CartItem.cart_id.in_(cart_ids))
+            .order_by(CartItem.id)
+        ).all()
+
+        # 每个商品保留一行（优先保留目标购物车中的行），数量为各购物车中的数量之和
+        kept = {}
+        for item in items:
+            current = kept.get(item.product_id)
+            if current is None:
+                kept[item.product_id] = [item.id, item.cart_id == keep_id, item.quantity]
+                continue
+            if item.cart_id == keep_id and not current[1]:
+                current[0], current[1] = item.id, True
+            current[2] += item.quantity
+
+        # 先删除多余的行，再把保留的行移到目标购物车，避免与 (cart_id, product_id) 唯一索引冲突
+        kept_ids = {item_id for item_id, _, _ in kept.values()}
+        extra_ids = [item.id for item in items if item.id not in kept_ids]
+        if extra_ids:
+            conn.execute(delete(CartItem).where(CartItem.id.in_(extra_ids)))
+        table = CartItem.__table__
+        if kept:
+            conn.execute(
+                update(table).where(table.c.id == bindparam("item_id")).values(
+                    cart_id=keep_id, quantity=bindparam("total_quantity")
+                ),
+                [{"item_id": item_id, "total_quantity": quantity} for item_id, _, quantity in kept.values()]
+            )
+        removed += conn.execute(delete(Cart).where(Cart.user_id == user_id, Cart.id != keep_id)).rowcount
+    return removed
+
+
+def _migrate_cart_user_index(conn):
+    from models.cart import Cart
+
+    removed = _merge_duplicate_carts(conn)
+    if removed:
+        print(f"[INFO] 已合并 {removed} 个重复的用户购物车")
+    _create_index(conn, Cart.__table__, CART_USER_INDEX)
+    if _index_exists(conn, "carts", LEGACY_CART_USER_INDEX):
+        conn.exec_driver_sql(f"DROP INDEX {LEGACY_CART_USER_INDEX} ON carts" if conn.dialect.name == "mysql"
+                             else f"DROP INDEX {LEGACY_CART_USER_INDEX}")
+    if removed:
+        # 缓存中可能保存了被删除的购物车ID
+        from utils.cart_cache import user_cart_cache
+        user_cart_cache.clear()
+
+
+register_migration("carts.unique_user", _cart_user_index_pending, _migrate_cart_user_index)
+register_required_index("carts", CART_USER_INDEX, "carts.unique_user")
+
+
+def check_required_indexes(report=True):
+    """
+    检查必需的唯一索引是否存在（应用启动时调用），缺失时记录错误日志（report 为 False 时不记录）
+
+    Returns:
+        list: 缺失的索引名称；无法连接数据库时返回 None，下次使用时重新检查
+    """
+    global _missing_indexes
+    # 导入所有模型以确保它们被注册到 Base.metadata
+    import models  # noqa: F401
+
+    try:
+        with engine.connect() as conn:
+            missing = [
+                index_name for index_name, (table_name, _) in REQUIRED_INDEXES.items()
+                if not _index_exists(conn, table_name, index_name)
+            ]
+    except Exception as e:
+        print(f"[ERROR] 检查必需的唯一索引失败: {str(e)}")
+        return None
+
+    if report:
+        for index_name in missing:
+            table_name, migration_name = REQUIRED_INDEXES[index_name]
+            print(
+                f"[ERROR] 缺少唯一索引 {table_name}.{index_name}，依赖它的写操作已停用；"
+                f"请执行 python -m utils.migrations（迁移 {migration_name}）"
+            )
+    for index_name in sorted((_missing_indexes or set()) - set(missing)):
+        print(f"[OK] 唯一索引 {REQUIRED_INDEXES[index_name][0]}.{index_name} 已创建，恢复依赖它的写操作")
+    _missing_indexes = set(missing)
+    return missing
+
+
+def require_index(index_name):
+    """
+    确认写操作依赖的唯一索引存在（启动时未检查过则在首次使用时检查，上次检查为缺失时重新检查）
+
+    Raises:
+        MissingIndexError: 索引不存在
+    """
+    if _missing_indexes is None:
+        check_required_indexes()
+    elif index_name in _missing_indexes:
+        check_required_indexes(report=False)
+    if _missing_indexes and index_name in _missing_indexes:
+        table_name, migration_name = REQUIRED_INDEXES[index_name]
+        raise MissingIndexError(
+            f"缺少唯一索引 {table_name}.{index_name}，请先执行数据库迁移 {migration_name}"
+        )
+
+
+def run_migrations(check_only=False):
+    """
+    执行所有未完成的迁移（每个迁移单独提交）
+
+    Returns:
+        list: 执行（check_only 时为未完成）的迁移名称
+    """
+    # 导入所有模型以确保它们被注册到 Base.metadata
+    import models  # noqa: F401
+
+    done = []
+    for name, is_pending, apply in MIGRATIONS:
+        with engine.begin() as conn:
+            if not is_pending(conn):
+                continue
+            if check_only:
+                print(f"[WARNING] 未完成的迁移: {name}")
+            else:
+                apply(conn)
+                print(f"[OK] 已完成迁移: {name}")
+            done.append(name)
+    if not done:
+        print("[OK] 数据库结构已是最新")
+    elif not check_only and _missing_indexes is not None:
+        check_required_indexes()
+    return done
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="执行数据库结构迁移")
+    parser.add_argument("--check", action="store_true", help="只列出未完成的迁移，不执行")
+    args = parser.parse_args()
+    pending = run_migrations(check_only=args.check)
+    sys.exit(1 if args.check and pending else 0)
@@ -0,0 +1,174 @@
+"""
+订单查询服务
+统一处理按状态筛选的订单列表查询，基于 (order_date, id) 的游标分页（keyset pagination），
+订单数量增长到百万级时每页查询的代价仍保持稳定；
+未传入 page_size 和 cursor 时返回全部订单（与分页前的接口行为一致，前端订单页依赖这一点）
+"""
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import select, and_, or_, not_
+from sqlalchemy.orm import selectinload
+from models.order import Order
+from utils.config import settings
+
+# 订单筛选条件（名称 -> 查询条件）
+ORDER_FILTERS = {
+    # 待审核：Pending 且状态步骤为 1
+    "pending": lambda: and_(Order.status == "Pending", Order.status_step == 1),
+    # 已处理：除待审核以外的所有订单
+    "processed": lambda: not_(and_(Order.status == "Pending", Order.status_step == 1)),
+    "processing": lambda: Order.status == "Processing",
+    "shipped": lambda: Order.status == "Shipped",
+    "customs": lambda: Order.status == "Customs",
+    "cleared": lambda: Order.status == "Cleared",
+    "delivered": lambda: Order.status == "Delivered",
+    # 小样已处理：Customs 或 Delivered
+    "customs_delivered": lambda: Order.status.in_(["Customs", "Delivered"]),
+}
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析"""
+
+
+def encode_cursor(order):
+    """将订单的 (order_date, id) 编码为分页游标"""
+    raw = json.dumps([order.order_date.isoformat() if order.order_date else None, order.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """解析分页游标，返回 (order_date, id)"""
+    try:
+        order_date, order_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return (datetime.fromisoformat(order_date) if order_date else None), str(order_id)
+    except Exception:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}")
+
+
+def normalize_page_size(page_size):
+    """校验每页数量，未传入时（只传入了 cursor）使用默认值，超过上限时截断"""
+    if page_size is None:
+        return settings.ORDER_PAGE_SIZE
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError("page_size 必须大于 0")
+    return min(page_size, settings.ORDER_PAGE_SIZE_MAX)
+
+
+def serialize_order(order):
+    """将订单（含已加载的订单商品）转换为接口返回的字典"""
+    return {
+        "id": order.id,
+        "status": order.status,
+        "status_step": order.status_step,
+        "status_text": order.status_text,
+        "status_detail_text": order.status_detail_text,
+        "customer_name": order.customer_name,
+        "total_amount": float(order.total_amount),
+        "shipping": {
+            "street": order.shipping_street,
+            "city": order.shipping_city,
+            "zipcode": order.shipping_zipcode
+        },
+        "payment_method": order.payment_method,
+        "notes": order.notes,
+        "orderDate": order.order_date.isoformat() if order.order_date else None,
+        "statusStep": order.status_step,
+        "statusText": order.status_text,
+        "statusDetailText": order.status_detail_text,
+        "statusClass": f"status-{order.status.lower()}",
+        "items": [
+            {
+                "id": item.id,
+                "product_id": item.product_id,
+                "productName": item.product_name,
+                "image": item.product_image,
+                "quantity": item.quantity,
+                "price": float(item.price)
+            }
+            for item in order.items
+        ]
+    }
+
+
+def _after_cursor(cursor_date, cursor_id):
+    """
+    游标之后的记录的查询条件（按 order_date、id 倒序）
+
+    order_date 可能为 NULL（导入时无法解析的日期），MySQL 与 SQLite 倒序时把 NULL 排在最后：
+    游标日期为 NULL 时只剩同为 NULL 且 id 更小的订单，否则 NULL 日期的订单都在游标之后
+    """
+    if cursor_date is None:
+        return and_(Order.order_date.is_(None), Order.id < cursor_id)
+    return or_(
+        Order.order_date < cursor_date,
+        and_(Order.order_date == cursor_date, Order.id < cursor_id),
+        Order.order_date.is_(None)
+    )
+
+
+def build_order_query(status_filter=None, user_id=None, cursor=None, limit=None):
+    """
+    构建订单列表查询语句（按 order_date、id 倒序）
+
+    cursor 为 decode_cursor 解析后的 (order_date, id)，只返回游标之后的记录
+    """
+    if status_filter is not None and status_filter not in ORDER_FILTERS:
+        raise ValueError(f"未知的订单筛选条件: {status_filter}")
+
+    stmt = select(Order).options(selectinload(Order.items))
+    if status_filter is not None:
+        stmt = stmt.where(ORDER_FILTERS[status_filter]())
+    if user_id is not None:
+        stmt = stmt.where(Order.user_id == user_id)
+    if cursor is not None:
+        stmt = stmt.where(_after_cursor(*cursor))
+    stmt = stmt.order_by(Order.order_date.desc(), Order.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+async def query_orders(db, status_filter=None, user_id=None, cursor=None, page_size=None):
+    """
+    查询一页订单
+
+    参数:
+        db: 数据库会话
+        status_filter (str): ORDER_FILTERS 中的筛选名称（可选）
+        user_id (int): 只查询该用户的订单（可选）
+        cursor (str): 上一页返回的 next_cursor（可选，为空时从第一页开始）
+        page_size (int): 每页数量（可选，与 cursor 都未传入时返回全部订单）
+
+    Returns:
+        dict: orders（订单列表）、next_cursor（下一页游标，没有更多数据时为 None）、has_more
+    """
+    if page_size is None and not cursor:
+        stmt = build_order_query(status_filter=status_filter, user_id=user_id)
+        orders = (await db.scalars(stmt)).all()
+        return {
+            "orders": [serialize_order(order) for order in orders],
+            "next_cursor": None,
+            "has_more": False
+        }
+
+    page_size = normalize_page_size(page_size)
+    # 多取一条用于判断是否还有下一页
+    stmt = build_order_query(
+        status_filter=status_filter,
+        user_id=user_id,
+        cursor=decode_cursor(cursor) if cursor else None,
+        limit=page_size + 1
+    )
+
+    orders = (await db.scalars(stmt)).all()
+    has_more = len(orders) > page_size
+    orders = orders[:page_size]
+
+    return {
+        "orders": [serialize_order(order) for order in orders],
+        "next_cursor": encode_cursor(orders[-1]) if has_more else None,
+        "has_more": has_more
+    }
@@ -0,0 +1,238 @@
+"""
+产品详情缓存
+所有工作进程共享的 Redis 缓存，用于 /api/product/get_product 和批量接口 /api/product/get_products：
+- 缓存条目在 PRODUCT_CACHE_TTL 秒内为新鲜数据，之后的 PRODUCT_CACHE_STALE_SECONDS 秒内
+  仍直接返回旧数据，同时在后台刷新（stale-while-revalidate）
+- 同一工作进程内同一产品的并发未命中合并为一次数据库查询（single-flight）
+- 批量读取使用一次 MGET，未命中的产品通过一次 IN 查询加载，再通过一次管道写回
+- Redis 不可用时直接查询数据库，并在 PRODUCT_CACHE_RETRY_SECONDS 秒内不再尝试 Redis
+- 写入产品后调用 evict_many 删除对应条目；其他进程（如命令行导入）发布的 "product" 失效消息同样触发删除
+"""
+import asyncio
+import json
+import time
+from utils import invalidation
+from utils.config import settings
+from utils.database import open_session
+from utils.session import redis_client
+
+
+class ProductDetailCache:
+    """产品详情缓存（每个工作进程一份，数据存放在 Redis 中）"""
+
+    KEY_PREFIX = "product_detail:"
+
+    def __init__(self, client=None):
+        self.client = client if client is not None else redis_client
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "refreshes": 0, "errors": 0}
+        self._inflight = {}  # 产品ID -> 正在进行的数据库加载
+        self._refresh_tasks = set()
+        self._redis_down_until = 0.0
+
+    def _redis_available(self):
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action, error):
+        self.stats["errors"] += 1
+        self._redis_down_until = time.monotonic() + settings.PRODUCT_CACHE_RETRY_SECONDS
+        print(f"⚠️ 产品详情缓存{action}失败，暂时直接查询数据库: {str(error)}")
+
+    def _read(self, product_id):
+        """读取缓存条目，返回 (产品数据, 是否新鲜)，不存在时返回 (None, False)"""
+        if not self._redis_available():
+            return None, False
+        try:
+            payload = self.client.get(self.KEY_PREFIX + product_id)
+        except Exception as e:
+            self._redis_failed("读取", e)
+            return None, False
+        if payload is None:
+            return None, False
+        entry = json.loads(payload)
+        return entry["product"], time.time() < entry["fresh_until"]
+
+    def _write(self, product_id, product):
+        """写入缓存条目（Redis 过期时间包含旧数据可用的时间）"""
+        if product is None or not self._redis_available():
+            return
+        payload = json.dumps({"product": product, "fresh_until": time.time() + settings.PRODUCT_CACHE_TTL})
+        try:
+            self.client.set(
+                self.KEY_PREFIX + product_id,
+                payload,
+                ex=settings.PRODUCT_CACHE_TTL + settings.PRODUCT_CACHE_STALE_SECONDS
+            )
+        except Exception as e:
+            self._redis_failed("写入", e)
+
+    def _read_many(self, product_ids):
+        """批量读取缓存条目，返回 {产品ID: (产品数据, 是否新鲜)}（只包含存在的条目）"""
+        if not product_ids or not self._redis_available():
+            return {}
+        try:
+            payloads = self.client.mget([self.KEY_PREFIX + product_id for product_id in product_ids])
+        except Exception as e:
+            self._redis_failed("读取", e)
+            return {}
+        now = time.time()
+        entries = {}
+        for product_id, payload in zip(product_ids, payloads):
+            if payload is not None:
+                entry = json.loads(payload)
+                entries[product_id] = (entry["product"], now < entry["fresh_until"])
+        return entries
+
+    def _write_many(self, products):
+        """通过一次管道批量写入缓存条目"""
+        if not products or not self._redis_available():
+            return
+        fresh_until = time.time() + settings.PRODUCT_CACHE_TTL
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for product_id, product in products.items():
+                pipe.set(
+                    self.KEY_PREFIX + product_id,
+                    json.dumps({"product": product, "fresh_until": fresh_until}),
+                    ex=settings.PRODUCT_CACHE_TTL + settings.PRODUCT_CACHE_STALE_SECONDS
+                )
+            pipe.execute()
+        except Exception as e:
+            self._redis_failed("写入", e)
+
+    def evict(self, product_id):
+        """删除某个产品的缓存（产品数据变更后调用）"""
+        self.evict_many([product_id])
+
+    def evict_many(self, product_ids):
+        """通过一次 DEL 删除多个产品的缓存（产品数据变更后调用）"""
+        if not product_ids or not self._redis_available():
+            return
+        try:
+            self.client.delete(*[self.KEY_PREFIX + product_id for product_id in product_ids])
+        except Exception as e:
+            self._redis_failed("删除", e)
+
+    async def _load_once(self, product_id, load):
+        """同一产品同时只执行一次加载，其他请求等待同一个结果"""
+        future = self._inflight.get(product_id)
+        if future is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[product_id] = future
+        try:
+            product = await load()
+            self._write(product_id, product)
+            future.set_result(product)
+            return product
+        except Exception as e:
+            future.set_exception(e)
+            # 标记异常已被读取，避免没有等待者时出现未处理异常的警告
+            future.exception()
+            raise
+        finally:
+            del self._inflight[product_id]
+
+    async def _refresh(self, product_id, loader):
+        """后台刷新过期的缓存条目（使用独立的数据库会话）"""
+        self.stats["refreshes"] += 1
+
+        async def load():
+            async with open_session() as db:
+                return await loader(db, product_id)
+
+        try:
+            await self._load_once(product_id, load)
+        except Exception as e:
+            print(f"❌ 后台刷新产品 {product_id} 缓存失败: {str(e)}")
+
+    async def get(self, db, product_id, loader):
+        """
+        获取产品详情
+
+        Args:
+            db: 当前请求的数据库会话（未命中时用于加载）
+            product_id: 产品ID
+            loader: 加载函数 loader(db, product_id)，返回产品详情字典，不存在时返回 None
+
+        Returns:
+            dict: 产品详情，不存在时返回 None
+        """
+        if not settings.PRODUCT_CACHE_ENABLED:
+            return await loader(db, product_id)
+
+        product, fresh = self._read(product_id)
+        if product is not None:
+            if fresh:
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                if product_id not in self._inflight:
+                    task = asyncio.create_task(self._refresh(product_id, loader))
+                    self._refresh_tasks.add(task)
+                    task.add_done_callback(self._refresh_tasks.discard)
+            return product
+
+        self.stats["misses"] += 1
+        return await self._load_once(product_id, lambda: loader(db, product_id))
+
+    async def _refresh_many(self, product_ids, loader_many):
+        """后台批量刷新过期的缓存条目（使用独立的数据库会话）"""
+        self.stats["refreshes"] += len(product_ids)
+        try:
+            async with open_session() as db:
+                self._write_many(await loader_many(db, product_ids))
+        except Exception as e:
+            print(f"❌ 后台刷新 {len(product_ids)} 个产品缓存失败: {str(e)}")
+
+    async def get_many(self, db, product_ids, loader_many):
+        """
+        批量获取产品详情
+
+        先用一次 MGET 读取缓存，未命中的产品通过 loader_many 一次查询加载并写回缓存，
+        过期的条目先返回旧数据，再在后台统一刷新
+
+        Args:
+            db: 当前请求的数据库会话（未命中时用于加载）
+            product_ids: 产品ID列表（不含重复）
+            loader_many: 批量加载函数 loader_many(db, product_ids)，返回 {产品ID: 产品详情字典}
+
+        Returns:
+            dict: {产品ID: 产品详情}，不存在的产品不包含在内
+        """
+        if not settings.PRODUCT_CACHE_ENABLED:
+            return await loader_many(db, product_ids)
+
+        products = {}
+        stale_ids = []
+        for product_id, (product, fresh) in self._read_many(product_ids).items():
+            products[product_id] = product
+            if fresh:
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                if product_id not in self._inflight:
+                    stale_ids.append(product_id)
+
+        if stale_ids:
+            task = asyncio.create_task(self._refresh_many(stale_ids, loader_many))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+
+        missing_ids = [product_id for product_id in product_ids if product_id not in products]
+        if missing_ids:
+            self.stats["misses"] += len(missing_ids)
+            loaded = await loader_many(db, missing_ids)
+            self._write_many(loaded)
+            products.update(loaded)
+
+        return products
+
+
+# 全局产品详情缓存实例
+product_cache = ProductDetailCache()
+
+# 其他进程写入产品后，删除对应产品的缓存
+# （ids 为 None 表示订阅连接中断；条目存放在共享的 Redis 中，写入方已直接删除，无需清空）
+invalidation.subscribe("product", lambda ids, version: product_cache.evict_many(ids) if ids else None)
@@ -0,0 +1,277 @@
+"""
+产品列表查询服务
+- 类别产品列表（含"先试后用"列表）基于 (排序字段, id) 的游标分页（keyset pagination），
+  每种排序都有对应的 products(category_id, 排序字段, id) 复合索引，类别中的产品再多，每页查询的代价也保持稳定
+- 标签产品列表通过 product_tags(tag_id, product_id) 主键索引查找产品，分页方式与类别产品列表相同
+- 列表接口支持 fields= 只返回指定字段，查询时通过 load_only 只加载对应的列
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Float, Numeric, String, select, and_, or_, literal
+from sqlalchemy.orm import load_only
+from sqlalchemy.types import TypeDecorator
+from models.product import Product
+from models.tag import ProductTag
+from utils.config import settings
+
+# 各列表接口返回的字段（按返回顺序）
+CATEGORY_PRODUCT_FIELDS = (
+    "id", "title", "description", "img", "product_mlb_thumbnail", "category_id", "supplier_id",
+    "shipping_from", "weight", "dimensions", "moq", "tags", "stock_quantity", "reserved_quantity",
+    "low_stock_threshold", "max_order_quantity", "cost_price", "selling_price", "discount_price",
+    "product_mlb_price", "roi", "created_at", "updated_at",
+)
+# 先试后用列表：不包含 moq，只包含 user_limit_quantity
+SAMPLE_PRODUCT_FIELDS = tuple(
+    "user_limit_quantity" if field == "moq" else field for field in CATEGORY_PRODUCT_FIELDS
+)
+# 搜索结果：类别产品字段 + 类别名称
+SEARCH_PRODUCT_FIELDS = CATEGORY_PRODUCT_FIELDS[:6] + ("category_name",) + CATEGORY_PRODUCT_FIELDS[6:]
+# 所有产品列表：先试后用字段 + 类别名称
+ALL_PRODUCT_FIELDS = SAMPLE_PRODUCT_FIELDS[:6] + ("category_name",) + SAMPLE_PRODUCT_FIELDS[6:]
+# 产品详情（单个和批量详情接口）：类别产品字段 + 变体
+DETAIL_PRODUCT_FIELDS = CATEGORY_PRODUCT_FIELDS[:-2] + ("variations",) + CATEGORY_PRODUCT_FIELDS[-2:]
+
+# 可用的排序字段（名称 -> (排序列, 默认是否倒序)）
+PRODUCT_SORTS = {
+    "created_at": (Product.created_at, True),
+    "selling_price": (Product.selling_price, False),
+    "discount_price": (Product.discount_price, False),
+    "stock_quantity": (Product.stock_quantity, False),
+}
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析"""
+
+
+class CursorDateTime(TypeDecorator):
+    """
+    游标中的时间值
+
+    SQLite 以文本保存并比较时间，server_default 的 CURRENT_TIMESTAMP 写入的值不带微秒，
+    需要按相同格式传参，否则同一时刻的记录无法相等匹配；其他数据库直接传 datetime。
+    内联渲染（如索引顾问的 EXPLAIN）时所有数据库都按该格式渲染为时间文本
+    """
+    impl = String
+    cache_ok = True
+
+    @staticmethod
+    def _format(value):
+        return value.isoformat(sep=" ", timespec="microseconds" if value.microsecond else "seconds")
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return self._format(value)
+
+    def process_literal_param(self, value, dialect):
+        return None if value is None else self._format(value)
+
+
+def resolve_sort(sort=None, order=None):
+    """
+    校验排序参数
+
+    Returns:
+        tuple: (排序字段名称, 是否倒序)
+    """
+    sort = sort or "created_at"
+    if sort not in PRODUCT_SORTS:
+        raise ValueError(f"不支持的排序字段: {sort}，可选值: {', '.join(PRODUCT_SORTS)}")
+    if order is None:
+        return sort, PRODUCT_SORTS[sort][1]
+    if order not in ("asc", "desc"):
+        raise ValueError(f"不支持的排序方向: {order}，可选值: asc, desc")
+    return sort, order == "desc"
+
+
+def encode_cursor(product, sort):
+    """将产品的 (排序字段值, id) 编码为分页游标"""
+    value = getattr(product, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, product.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _is_decimal_sort(sort):
+    column_type = PRODUCT_SORTS[sort][0].type
+    return isinstance(column_type, Numeric) and not isinstance(column_type, Float)
+
+
+def decode_cursor(cursor, sort):
+    """解析分页游标，返回 (排序字段值, id)；游标必须由同一排序字段生成"""
+    try:
+        cursor_sort, value, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if cursor_sort != sort:
+            raise ValueError
+        if sort == "created_at" and value is not None:
+            value = datetime.fromisoformat(value)
+        elif _is_decimal_sort(sort) and value is not None:
+            # 价格列为 DECIMAL，按十进制字面量传参，与列中的值精确比较
+            value = Decimal(str(value))
+        return value, str(product_id)
+    except Exception:
+        raise InvalidCursorError(f"无效的分页游标: {cursor}")
+
+
+def normalize_page_size(page_size):
+    """校验每页数量，未传入时（类别产品列表为只传入了 cursor 时）使用默认值，超过上限时截断"""
+    if page_size is None:
+        return settings.PRODUCT_PAGE_SIZE
+    page_size = int(page_size)
+    if page_size < 1:
+        raise ValueError("page_size 必须大于 0")
+    return min(page_size, settings.PRODUCT_PAGE_SIZE_MAX)
+
+
+def parse_fields(fields, available):
+    """
+    解析 fields 参数（逗号分隔的字符串或列表），返回要返回的字段（按 available 中的顺序）
+
+    未传入时返回全部字段；id 总是返回；包含不支持的字段时抛出 ValueError
+    """
+    if not fields:
+        return available
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    requested = {str(field).strip() for field in fields if str(field).strip()}
+    unknown = sorted(requested - set(available))
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+    requested.add("id")
+    return tuple(field for field in available if field in requested)
+
+
+def load_only_fields(fields, *required):
+    """
+    只加载所需列的查询选项
+
+    fields 中不是 Product 列的字段（如 category_name）会被忽略，required 为分页等需要额外加载的列；
+    访问未加载的列会直接报错，而不是再发起一次查询
+    """
+    names = set(fields) | set(required) | {"id"}
+    columns = [getattr(Product, name) for name in Product.__table__.columns.keys() if name in names]
+    return load_only(*columns, raiseload=True)
+
+
+def _after_cursor(column, descending, value, product_id):
+    """
+    游标之后的记录的查询条件
+
+    MySQL 与 SQLite 都把 NULL 视为最小值（正序排在最前，倒序排在最后），
+    discount_price 可能为 NULL，需要单独处理
+    """
+    if isinstance(value, datetime):
+        value = literal(value, CursorDateTime())
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Product.id < product_id)
+        return or_(
+            column < value,
+            and_(column == value, Product.id < product_id),
+            column.is_(None)
+        )
+    if value is None:
+        return or_(and_(column.is_(None), Product.id > product_id), column.isnot(None))
+    return or_(column > value, and_(column == value, Product.id > product_id))
+
+
+def _paginate(stmt, sort="created_at", descending=True, cursor=None, limit=None, fields=None):
+    """
+    为产品查询加上排序、游标条件和数量限制（按排序字段、id 排序）
+
+    cursor 为 decode_cursor 解析后的 (排序字段值, id)，只返回游标之后的记录；
+    fields 不为空时只加载这些列（以及排序列）
+    """
+    column = PRODUCT_SORTS[sort][0]
+    if fields is not None:
+        stmt = stmt.options(load_only_fields(fields, sort))
+    if cursor is not None:
+        stmt = stmt.where(_after_cursor(column, descending, *cursor))
+    if descending:
+        stmt = stmt.order_by(column.desc(), Product.id.desc())
+    else:
+        stmt = stmt.order_by(column.asc(), Product.id.asc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def build_category_products_query(category_id, sort="created_at", descending=True, cursor=None, limit=None, fields=None):
+    """构建类别产品列表查询语句（参数见 _paginate）"""
+    stmt = select(Product).where(Product.category_id == category_id)
+    return _paginate(stmt, sort, descending, cursor, limit, fields)
+
+
+def build_tag_products_query(tag_id, sort="created_at", descending=True, cursor=None, limit=None, fields=None):
+    """构建标签产品列表查询语句，通过 product_tags 主键索引查找产品（参数见 _paginate）"""
+    stmt = (
+        select(Product)
+        .join(ProductTag, ProductTag.product_id == Product.id)
+        .where(ProductTag.tag_id == tag_id)
+    )
+    return _paginate(stmt, sort, descending, cursor, limit, fields)
+
+
+async def _query_page(db, build, sort, order, cursor, page_size, fields, full_list=False):
+    """
+    按游标查询一页产品，build(sort, descending, cursor, limit, fields) 返回查询语句
+
+    full_list 为 True 时，cursor 和 page_size 都未传入则不分页，返回全部产品
+    """
+    sort, descending = resolve_sort(sort, order)
+    if full_list and page_size is None and not cursor:
+        stmt = build(sort=sort, descending=descending, cursor=None, limit=None, fields=fields)
+        return {"products": (await db.scalars(stmt)).all(), "next_cursor": None, "has_more": False}
+
+    page_size = normalize_page_size(page_size)
+    # 多取一条用于判断是否还有下一页
+    stmt = build(
+        sort=sort,
+        descending=descending,
+        cursor=decode_cursor(cursor, sort) if cursor else None,
+        limit=page_size + 1,
+        fields=fields
+    )
+
+    products = (await db.scalars(stmt)).all()
+    has_more = len(products) > page_size
+    products = products[:page_size]
+
+    return {
+        "products": products,
+        "next_cursor": encode_cursor(products[-1], sort) if has_more else None,
+        "has_more": has_more
+    }
+
+
+async def query_category_products(db, category_id, sort=None, order=None, cursor=None, page_size=None, fields=None):
+    """
+    查询一页类别产品
+
+    参数:
+        db: 数据库会话
+        category_id (str): 类别ID
+        sort (str): PRODUCT_SORTS 中的排序字段（可选，默认 created_at）
+        order (str): asc 或 desc（可选，created_at 默认倒序，其他字段默认正序）
+        cursor (str): 上一页返回的 next_cursor（可选，为空时从第一页开始）
+        page_size (int): 每页数量（可选，与 cursor 都未传入时返回全部产品）
+        fields (tuple): 只加载这些列（可选，为空时加载全部列）
+
+    Returns:
+        dict: products（Product 对象列表）、next_cursor（下一页游标，没有更多数据时为 None）、has_more
+    """
+    def build(**kwargs):
+        return build_category_products_query(category_id, **kwargs)
+    return await _query_page(db, build, sort, order, cursor, page_size, fields, full_list=True)
+
+
+async def query_tag_products(db, tag_id, sort=None, order=None, cursor=None, page_size=None, fields=None):
+    """查询一页带有某个标签的产品（参数和返回值同 query_category_products，page_size 未传入时总是使用默认值）"""
+    def build(**kwargs):
+        return build_tag_products_query(tag_id, **kwargs)
+    return await _query_page(db, build, sort, order, cursor, page_size, fields)
@@ -0,0 +1,39 @@
+"""
+SQL 查询计数器
+按请求统计实际发送到数据库的 SQL 语句数量，用于证明接口的查询次数为常数（排查 N+1 查询）
+"""
+from contextvars import ContextVar
+from sqlalchemy import event
+
+# 当前请求的计数器（使用可变列表，使 call_next 派生出的子任务也能累加到同一个计数器）
+_query_counter: ContextVar = ContextVar("query_counter", default=None)
+
+
+def start_query_count():
+    """开始统计当前上下文的查询次数，返回用于结束统计的 token"""
+    return _query_counter.set([0])
+
+
+def stop_query_count(token):
+    """结束统计"""
+    _query_counter.reset(token)
+
+
+def get_query_count():
+    """获取当前上下文已执行的查询次数（未开启统计时返回 None）"""
+    counter = _query_counter.get()
+    return counter[0] if counter is not None else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """每条 SQL 发送到数据库前计数"""
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_query_counter(engine):
+    """在引擎上注册计数监听器（异步引擎注册在其内部的同步引擎上）"""
+    target = getattr(engine, "sync_engine", engine)
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
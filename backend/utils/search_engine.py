@@ -0,0 +1,232 @@
+"""
+产品搜索引擎
+进程内的倒排索引，覆盖产品的标题、描述和标签：
+- 分词时统一大小写并去除葡萄牙语重音（ação -> acao），中文按单字和双字切分
+- 使用 BM25 对结果排序，最后一个关键词支持前缀匹配（边输入边搜索）
+- 首次搜索时从数据库构建，之后随产品创建增量更新
+"""
+import asyncio
+import bisect
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from sqlalchemy import select
+from models.product import Product
+from utils import invalidation
+
+# 连续的字母数字（去除重音并转小写之后）
+_WORD_RE = re.compile(r"[^\W_]+")
+# 中日韩统一表意文字
+_CJK_RE = re.compile(r"[\u3400-\u9fff]+")
+
+# 各字段的词频权重（标题、标签比描述更重要）
+FIELD_WEIGHTS = {"title": 3, "tags": 2, "description": 1}
+
+# 前缀匹配最多展开的词数
+MAX_PREFIX_EXPANSIONS = 20
+
+
+def normalize(text):
+    """统一大小写并去除重音符号"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def _cjk_terms(run, for_query):
+    """中文分词：索引时同时生成单字和双字；查询时两个字以上只用双字"""
+    if len(run) == 1:
+        return [run]
+    bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+    return bigrams if for_query else list(run) + bigrams
+
+
+def tokenize(text, for_query=False):
+    """将文本切分为索引词列表"""
+    if not text:
+        return []
+    terms = []
+    for word in _WORD_RE.findall(normalize(text)):
+        last = 0
+        for match in _CJK_RE.finditer(word):
+            if match.start() > last:
+                terms.append(word[last:match.start()])
+            terms.extend(_cjk_terms(match.group(), for_query))
+            last = match.end()
+        if last < len(word):
+            terms.append(word[last:])
+    return terms
+
+
+class ProductSearchEngine:
+    """基于倒排索引和 BM25 的产品搜索引擎"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._build_lock = None
+        self._reset()
+
+    def _reset(self):
+        """清空索引"""
+        self.ready = False
+        self._postings = {}  # 词 -> {产品ID: 加权词频}
+        self._doc_terms = {}  # 产品ID -> 该产品包含的词（用于更新和删除）
+        self._doc_len = {}  # 产品ID -> 文档长度
+        self._total_len = 0
+        self._sorted_terms = []  # 有序词表（前缀匹配用）
+        self._terms_dirty = False
+        self._stale_ids = set()  # 需要从数据库重新加载的产品ID
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add_document(self, doc_id, title=None, description=None, tags=None):
+        """添加或更新一个产品"""
+        if doc_id in self._doc_terms:
+            self.remove_document(doc_id)
+
+        frequencies = Counter()
+        fields = {"title": title, "description": description, "tags": " ".join(tags or [])}
+        for field, text in fields.items():
+            for term in tokenize(text):
+                frequencies[term] += FIELD_WEIGHTS[field]
+
+        for term, frequency in frequencies.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._terms_dirty = True
+            postings[doc_id] = frequency
+
+        length = sum(frequencies.values())
+        self._doc_terms[doc_id] = list(frequencies)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+    def remove_document(self, doc_id):
+        """从索引中删除一个产品"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+        self._total_len -= self._doc_len.pop(doc_id)
+
+    def _expand_prefix(self, prefix):
+        """返回以 prefix 开头的索引词"""
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        expansions = []
+        for term in self._sorted_terms[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def _idf(self, postings):
+        count = len(self._doc_len)
+        return math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+
+    def search(self, query, limit=None):
+        """
+        搜索产品
+
+        所有关键词都必须命中（最后一个关键词可以是前缀），按 BM25 得分从高到低排序
+
+        Returns:
+            list: [(产品ID, 得分), ...]
+        """
+        terms = list(dict.fromkeys(tokenize(query, for_query=True)))
+        if not terms or not self._doc_len:
+            return []
+
+        # 每个关键词对应一组候选词：精确匹配，最后一个关键词额外展开前缀
+        groups = []
+        for index, term in enumerate(terms):
+            candidates = [term] if term in self._postings else []
+            if index == len(terms) - 1 and not query.endswith(" "):
+                candidates += [t for t in self._expand_prefix(term) if t != term]
+            if not candidates:
+                return []
+            groups.append(candidates)
+
+        average_len = self._total_len / len(self._doc_len)
+        scores = None
+        # 从命中文档最少的关键词开始求交集
+        for group in sorted(groups, key=lambda g: sum(len(self._postings[t]) for t in g)):
+            group_scores = {}
+            for term in group:
+                postings = self._postings[term]
+                idf = self._idf(postings)
+                for doc_id, frequency in postings.items():
+                    if scores is not None and doc_id not in scores:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / average_len)
+                    score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    if score > group_scores.get(doc_id, 0.0):
+                        group_scores[doc_id] = score
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {doc_id: scores[doc_id] + score for doc_id, score in group_scores.items()}
+            if not scores:
+                return []
+
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def build(self, rows):
+        """从 (id, title, description, tags) 行重建整个索引"""
+        self._reset()
+        for doc_id, title, description, tags in rows:
+            self.add_document(doc_id, title, description, tags)
+        self.ready = True
+
+    def mark_stale(self, doc_ids=None):
+        """标记产品需要重新加载（其他工作进程写入后调用），doc_ids 为 None 时整体重建"""
+        if doc_ids is None:
+            self.ready = False
+        else:
+            self._stale_ids.update(doc_ids)
+
+    async def ensure_built(self, db):
+        """首次使用时从数据库加载所有产品构建索引，之后只重新加载被标记的产品"""
+        if self.ready and not self._stale_ids:
+            return
+        if self._build_lock is None:
+            self._build_lock = asyncio.Lock()
+        async with self._build_lock:
+            if not self.ready:
+                result = await db.execute(
+                    select(Product.id, Product.title, Product.description, Product.tags)
+                )
+                self.build(result.all())
+                print(f"✅ 产品搜索索引构建完成，共 {len(self)} 个产品")
+            elif self._stale_ids:
+                stale_ids, self._stale_ids = self._stale_ids, set()
+                result = await db.execute(
+                    select(Product.id, Product.title, Product.description, Product.tags)
+                    .where(Product.id.in_(stale_ids))
+                )
+                for doc_id, title, description, tags in result.all():
+                    self.add_document(doc_id, title, description, tags)
+                    stale_ids.discard(doc_id)
+                # 数据库中已不存在的产品从索引中删除
+                for doc_id in stale_ids:
+                    self.remove_document(doc_id)
+
+
+# 全局搜索引擎实例（每个工作进程一份）
+product_search = ProductSearchEngine()
+
+# 其他工作进程写入产品后，标记对应产品需要重新加载
+invalidation.subscribe("product", lambda ids, version: product_search.mark_stale(ids))
@@ -0,0 +1,286 @@
+"""
+测试数据初始化
+一次读取 fixtures/mock-data.json，按依赖顺序（用户、类别、供应商、产品、订单、小样购买记录）批量写入各表：
+- 每张表的 fixture 数据计算 SHA-256 校验和并保存在 seed_checksums 表中，
+  校验和未变化且表中已有数据时直接跳过该表，不再查询和写入；
+  整个文件的校验和与上一次相同时不解析文件，所有表直接跳过
+- 需要写入时，只插入主键在表中还不存在的行（通过 IN 查询批量判断），已有的行保持不变，
+  每张表通过 executemany 分批插入，每张表一个事务
+"""
+import hashlib
+import os
+from datetime import datetime
+import orjson
+from sqlalchemy import select, insert, update
+from utils.database import engine
+
+# fixture 文件路径（相对于 backend 目录）
+FIXTURE_PATH = 'fixtures/mock-data.json'
+
+_BATCH_SIZE = 1000
+
+
+def _parse_datetime(value):
+    """解析 fixture 中的时间，格式错误时返回 None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('T', ' '))
+    except ValueError:
+        return None
+
+
+def _user_row(data):
+    """users 表的行"""
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "email": data['email'],
+        "password": data['password'],
+        "cnpj": data.get('cnpj'),
+        "employee_count": data.get('employee_count'),
+        "monthly_revenue": data.get('monthly_revenue'),
+        "phone": data.get('phone'),
+        "role": data.get('role', 'user'),
+    }
+
+
+def _category_row(data):
+    """categories 表的行"""
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "icon": data.get('icon'),
+        "description": data.get('description'),
+    }
+
+
+def _supplier_row(data):
+    """suppliers 表的行"""
+    return {
+        "id": data['id'],
+        "name": data['company_name'],
+        "location": data['location'],
+    }
+
+
+def _product_row(data):
+    """products 表的行"""
+    return {
+        "id": data['id'],
+        "title": data['title'],
+        "description": data.get('description'),
+        "img": data.get('img'),
+        "product_mlb_thumbnail": data.get('product_mlb_thumbnail'),
+        "category_id": data['category_id'],
+        "supplier_id": data['supplier_id'],
+        "shipping_from": data.get('shipping_from'),
+        "weight": data.get('weight'),
+        "dimensions": data.get('dimensions'),
+        "moq": data.get('moq', 1),
+        "tags": data.get('tags'),
+        "stock_quantity": data.get('stock_quantity', 0),
+        "reserved_quantity": data.get('reserved_quantity', 0),
+        "low_stock_threshold": data.get('low_stock_threshold', 10),
+        "max_order_quantity": data.get('max_order_quantity'),
+        "cost_price": data.get('cost_price'),
+        "selling_price": data['selling_price'],
+        "discount_price": data.get('discount_price'),
+        "product_mlb_price": data.get('product_mlb_price'),
+        "roi": data.get('roi'),
+        "variations": data.get('variations'),
+    }
+
+
+def _order_row(data):
+    """orders 表的行（订单日期格式错误时为空）"""
+    return {
+        "id": data['id'],
+        "user_id": data['user_id'],
+        "status": data['status'],
+        "status_step": data.get('status_step', 1),
+        "status_text": data.get('status_text'),
+        "status_detail_text": data.get('status_detail_text'),
+        "customer_name": data['customer_name'],
+        "total_amount": data['total_amount'],
+        "shipping_street": data.get('shipping_street'),
+        "shipping_city": data.get('shipping_city'),
+        "shipping_zipcode": data.get('shipping_zipcode'),
+        "payment_method": data.get('payment_method'),
+        "notes": data.get('notes'),
+        "order_date": _parse_datetime(data.get('order_date')),
+    }
+
+
+def _order_item_rows(data):
+    """订单中的 order_items 行"""
+    return [
+        {
+            "order_id": data['id'],
+            "product_id": item['product_id'],
+            "product_name": item['product_name'],
+            "product_image": item.get('product_image'),
+            "quantity": item['quantity'],
+            "price": item['price'],
+        }
+        for item in data.get('items', [])
+    ]
+
+
+def _sample_purchase_row(data):
+    """sample_purchases 表的行"""
+    return {
+        "id": data.get('id'),
+        "user_id": data['user_id'],
+        "product_id": data['product_id'],
+        "purchase_date": _parse_datetime(data.get('purchase_date')),
+        "status": data.get('status', 'purchased'),
+        "created_at": _parse_datetime(data.get('created_at')),
+        "updated_at": _parse_datetime(data.get('updated_at')),
+    }
+
+
+def seed_plan():
+    """
+    按依赖顺序返回要初始化的表：[(fixture 中的键, 显示名称, 模型, 行转换函数, 子表)]
+    子表为 (模型, 生成子表行的函数) 或 None，只为新插入的父表行写入子表行
+    """
+    from models.user import User
+    from models.category import Category
+    from models.supplier import Supplier
+    from models.product import Product
+    from models.order import Order, OrderItem
+    from models.sample_purchase import SamplePurchase
+
+    return [
+        ('users', '用户', User, _user_row, None),
+        ('categories', '分类', Category, _category_row, None),
+        ('suppliers', '供应商', Supplier, _supplier_row, None),
+        ('products', '产品', Product, _product_row, None),
+        ('orders', '订单', Order, _order_row, (OrderItem, _order_item_rows)),
+        ('sample_purchases', '小样购买记录', SamplePurchase, _sample_purchase_row, None),
+    ]
+
+
+def checksum(records):
+    """fixture 中一张表数据的校验和（键排序后的 JSON）"""
+    return hashlib.sha256(orjson.dumps(records, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _insert_batches(conn, model, rows):
+    """分批 executemany 插入"""
+    for start in range(0, len(rows), _BATCH_SIZE):
+        conn.execute(insert(model), rows[start:start + _BATCH_SIZE])
+
+
+def _new_rows(conn, model, rows):
+    """过滤掉主键在表中已存在的行（没有主键的行只在表为空时插入）"""
+    ids = [row['id'] for row in rows if row.get('id') is not None]
+    existing = set()
+    for start in range(0, len(ids), _BATCH_SIZE):
+        existing.update(conn.scalars(select(model.id).where(model.id.in_(ids[start:start + _BATCH_SIZE]))))
+    table_empty = conn.execute(select(model.id).limit(1)).first() is None
+    return [
+        row for row in rows
+        if (row.get('id') is None and table_empty) or (row.get('id') is not None and row['id'] not in existing)
+    ]
+
+
+def _seed_table(conn, model, convert, children, records):
+    """写入一张表中还不存在的 fixture 行，返回插入的行数"""
+    rows = _new_rows(conn, model, [convert(record) for record in records])
+    # 主键由数据库生成的行不传 id
+    with_id = [row for row in rows if row.get('id') is not None]
+    without_id = [{key: value for key, value in row.items() if key != 'id'} for row in rows if row.get('id') is None]
+    _insert_batches(conn, model, with_id)
+    _insert_batches(conn, model, without_id)
+
+    if children:
+        child_model, child_rows = children
+        inserted = {row['id'] for row in with_id}
+        _insert_batches(conn, child_model, [
+            child for record in records if record['id'] in inserted for child in child_rows(record)
+        ])
+    return len(rows)
+
+
+def _is_seeded(conn, state, model):
+    """上一次写入后表中仍有数据（fixture 中该表没有数据时视为已写入）"""
+    return state.row_count == 0 or conn.execute(select(model.id).limit(1)).first() is not None
+
+
+def seed_fixture_data(path=FIXTURE_PATH):
+    """
+    初始化 fixture 数据（只读取和解析一次文件）
+
+    Args:
+        path (str): fixture 文件路径
+
+    Returns:
+        dict: 表名 -> 插入的行数（跳过的表不包含在内）
+    """
+    from models.seed_checksum import SeedChecksum
+
+    if not os.path.exists(path):
+        print(f"[WARNING] 未找到 {path} 文件，跳过数据初始化")
+        return {}
+    with open(path, 'rb') as f:
+        raw = f.read()
+    fixture_digest = hashlib.sha256(raw).hexdigest()
+    plan = seed_plan()
+
+    with engine.connect() as conn:
+        stored = {
+            row.table_name: row
+            for row in conn.execute(select(
+                SeedChecksum.table_name, SeedChecksum.checksum, SeedChecksum.fixture_checksum, SeedChecksum.row_count
+            ))
+        }
+        # 整个文件未变化时不解析文件
+        unchanged = all(
+            model.__tablename__ in stored
+            and stored[model.__tablename__].fixture_checksum == fixture_digest
+            and _is_seeded(conn, stored[model.__tablename__], model)
+            for _, _, model, _, _ in plan
+        )
+    if unchanged:
+        print(f"[OK] {path} 未变化，跳过数据初始化")
+        return {}
+
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError as e:
+        print(f"[ERROR] 读取 {path} 失败: {str(e)}")
+        return {}
+
+    seeded = {}
+    for key, label, model, convert, children in plan:
+        records = data.get(key) or []
+        digest = checksum(records)
+        table = model.__tablename__
+        state = stored.get(table)
+        try:
+            with engine.begin() as conn:
+                if state and state.checksum == digest and _is_seeded(conn, state, model):
+                    count = None
+                else:
+                    count = _seed_table(conn, model, convert, children, records)
+                # 记录本次检查的文件校验和，下次文件未变化时可以整体跳过
+                values = {"checksum": digest, "fixture_checksum": fixture_digest, "row_count": len(records)}
+                if state:
+                    conn.execute(update(SeedChecksum).where(SeedChecksum.table_name == table).values(**values))
+                else:
+                    conn.execute(insert(SeedChecksum).values(table_name=table, **values))
+        except Exception as e:
+            print(f"[ERROR] 初始化{label}数据失败: {str(e)}")
+            continue
+
+        if count is None:
+            print(f"[OK] {label}数据未变化，跳过初始化")
+        elif not records:
+            print(f"[WARNING] {path} 中没有 {key} 数据，跳过初始化")
+        else:
+            seeded[table] = count
+            print(f"[OK] 成功初始化 {count} 个{label}（fixture 共 {len(records)} 个）")
+
+    return seeded
@@ -0,0 +1,73 @@
+"""
+统一的序列化层
+- compile_serializer(model, fields): 按 (模型, 字段组合) 预编译的对象 -> 字典函数，
+  生成一次后缓存复用；DateTime 列转换为 ISO 字符串，Numeric（Decimal）列转换为 float
+- ORJSONResponse: 使用 orjson 编码的响应类（main.py 中设为应用默认响应类）；
+  接口直接返回 ORJSONResponse 时跳过 FastAPI 的 jsonable_encoder 逐层遍历
+"""
+from decimal import Decimal
+from functools import lru_cache
+import orjson
+from sqlalchemy import DateTime, Float, Numeric
+from starlette.responses import JSONResponse
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _number(value):
+    return float(value) if value is not None else None
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(model, fields):
+    """
+    生成将 model 对象（或具有相同属性的只读记录）转换为字典的函数
+
+    Args:
+        model: SQLAlchemy 模型类
+        fields (tuple): 按返回顺序排列的字段；不是 model 列的字段（如 category_name）从关键字参数中读取
+
+    Returns:
+        function: serialize(obj, **extra) -> dict
+    """
+    columns = model.__table__.columns
+    items = []
+    for field in fields:
+        if field not in columns:
+            items.append(f"{field!r}: extra.get({field!r})")
+            continue
+        column_type = columns[field].type
+        if isinstance(column_type, DateTime):
+            items.append(f"{field!r}: _iso(obj.{field})")
+        elif isinstance(column_type, Numeric) and not isinstance(column_type, Float):
+            items.append(f"{field!r}: _number(obj.{field})")
+        else:
+            items.append(f"{field!r}: obj.{field}")
+
+    source = "def serialize(obj, **extra):\n    return {" + ", ".join(items) + "}\n"
+    namespace = {"_iso": _iso, "_number": _number}
+    exec(compile(source, f"<serializer {model.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def _default(value):
+    """orjson 不支持的类型"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"无法序列化 {type(value).__name__} 类型的值")
+
+
+def dumps(content):
+    """编码为 JSON 字节串（datetime/date 输出 ISO 格式，Decimal 输出为数字）"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 编码的 JSON 响应"""
+
+    def render(self, content):
+        return dumps(content)
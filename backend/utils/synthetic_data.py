@@ -0,0 +1,432 @@
+"""
+合成数据生成器
+按 fixtures/mock-data.json 的数据结构，生成任意规模的用户、类别、供应商、产品（含变体和标签）、
+购物车、订单和小样购买记录，直接批量写入当前配置的数据库，作为基准测试和压力测试的数据基础：
+- 结果是确定的：相同的随机种子和数量总是生成相同的数据；每张表使用独立的随机数序列，
+  只增加某张表的数量时，该表已生成的行保持不变
+- 逐批生成、逐批写入（executemany，每批一个事务），内存占用与数据规模无关，可以生成数百万个订单
+- 订单商品引用的产品名称、图片和价格由产品序号直接计算，不需要在内存中保存所有产品
+- 合成数据的字符串ID以 SYN- 开头，整数ID从 SYNTHETIC_ID_BASE 开始，与 fixture 数据互不冲突，可以通过 --delete 整体删除
+
+用法（在 backend 目录下执行）:
+    python -m utils.synthetic_data --scale small
+    python -m utils.synthetic_data --scale large --orders 2000000 --seed 7
+    python -m utils.synthetic_data --scale medium --reset    # 先删除已有的合成数据
+    python -m utils.synthetic_data --delete                  # 只删除合成数据
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, or_
+from utils.database import engine, Base
+from utils.tags import BUILTIN_TAGS, seed_builtin_tags, link_product_tags
+
+# 预设规模
+SCALES = {
+    "small": {
+        "users": 1_000, "categories": 32, "suppliers": 50, "products": 10_000,
+        "carts": 500, "orders": 20_000, "sample_purchases": 2_000,
+    },
+    "medium": {
+        "users": 20_000, "categories": 100, "suppliers": 500, "products": 100_000,
+        "carts": 10_000, "orders": 500_000, "sample_purchases": 20_000,
+    },
+    "large": {
+        "users": 200_000, "categories": 300, "suppliers": 2_000, "products": 1_000_000,
+        "carts": 100_000, "orders": 5_000_000, "sample_purchases": 200_000,
+    },
+}
+
+# 写入顺序（按外键依赖）
+TABLES = ("users", "categories", "suppliers", "products", "carts", "orders", "sample_purchases")
+
+# 合成数据的ID前缀（字符串主键）和起始ID（整数主键）
+ID_PREFIX = "SYN-"
+SYNTHETIC_ID_BASE = 10_000_000
+
+# 所有时间从该时间开始，分布在之后的两年内
+_EPOCH = datetime(2024, 1, 1)
+_SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+_PASSWORD_HASH = "ef92b778bafe771e89245b89ecbc08a44a4e166c06659911881f383d4473e94f"  # password123
+
+_COMPANY_PREFIXES = ["广州市", "深圳市", "义乌市", "东莞市", "上海", "杭州", "宁波", "厦门", "佛山市", "苏州"]
+_COMPANY_NAMES = ["鑫达", "星辉", "宏图", "瑞丰", "华美", "金源", "恒通", "博远", "佳诚", "天成"]
+_COMPANY_SUFFIXES = ["电子商行", "贸易有限公司", "科技有限公司", "进出口有限公司", "实业有限公司"]
+_LOCATIONS = ["广东省广州市", "广东省深圳市", "浙江省义乌市", "广东省东莞市", "上海市", "浙江省杭州市", "福建省厦门市"]
+_CITIES = [("São Paulo", "01000"), ("Rio de Janeiro", "20000"), ("Belo Horizonte", "30000"), ("Curitiba", "80000"),
+           ("Porto Alegre", "90000"), ("Salvador", "40000"), ("Recife", "50000"), ("Brasília", "70000")]
+_STREETS = ["Rua das Flores", "Avenida Paulista", "Rua Augusta", "Avenida Brasil", "Rua XV de Novembro", "Rua da Consolação"]
+_PAYMENT_METHODS = ["Credit Card", "Boleto", "Pix", "Bank Transfer"]
+_CUSTOMER_FIRST = ["João", "Maria", "Pedro", "Ana", "Lucas", "Juliana", "Carlos", "Fernanda", "Rafael", "Beatriz"]
+_CUSTOMER_LAST = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Almeida", "Ferreira", "Rodrigues"]
+
+_PRODUCT_NOUNS = ["Suporte Veicular", "Alto Falante", "Fone Bluetooth", "Carregador Turbo", "Capa Protetora",
+                  "Lâmpada LED", "Câmera de Ré", "Antena Digital", "Cabo USB-C", "Organizador", "Mochila",
+                  "Garrafa Térmica", "Relógio Smart", "Teclado Mecânico", "Mouse Sem Fio", "Luminária"]
+_PRODUCT_ADJECTIVES = ["Premium", "Universal", "Magnético", "Portátil", "Reforçado", "Ultra Slim", "Profissional",
+                       "Compacto", "Resistente", "Ajustável", "Dobrável", "Inteligente"]
+_PRODUCT_COLORS = ["Preto", "Branco", "Azul", "Vermelho", "Prata", "Cinza", "Verde", "Rosa"]
+_VARIATION_NAMES = ["标准版本", "升级版本", "黑色版本", "白色版本", "套装版本", "加长版本"]
+_FREE_TAGS = ["进口", "优质", "热卖", "新款", "包邮", "爆款"]
+_TAGS = [tag["display_name"] for tag in BUILTIN_TAGS] + _FREE_TAGS
+
+# 订单状态 -> (状态步骤, 状态文本, 状态详情)，与 fixture 中的订单一致
+_ORDER_STATUSES = [
+    ("Pending", 1, "订单审批", "订单已接收，等待审批"),
+    ("Processing", 2, "准备发货", "订单处理中，准备发货"),
+    ("Shipped", 3, "运输中", "包裹已发出，正在运输"),
+    ("Customs", 4, "到达巴西清关", "包裹已到达巴西，正在清关"),
+    ("Cleared", 5, "清关完成-运输", "清关完成，正在派送"),
+    ("Delivered", 6, "已交付", "订单已送达"),
+]
+# 各状态的权重（大部分历史订单已交付）
+_ORDER_STATUS_WEIGHTS = [5, 5, 10, 5, 5, 70]
+
+
+def _hash(n):
+    """序号的确定性散列（Knuth 乘法散列），用于不需要随机数序列就能由序号计算的属性"""
+    return (n * 2654435761) & 0xFFFFFFFF
+
+
+# 第 n 行的主键
+def user_id(n):
+    return SYNTHETIC_ID_BASE + n
+
+
+def category_id(n):
+    return f"{ID_PREFIX}C{n:05d}"
+
+
+def supplier_id(n):
+    return f"{ID_PREFIX}S{n:06d}"
+
+
+def product_id(n):
+    return f"{ID_PREFIX}P{n:08d}"
+
+
+def cart_id(n):
+    return SYNTHETIC_ID_BASE + n
+
+
+def order_id(n):
+    return f"{ID_PREFIX}O{n:09d}"
+
+
+def company_name(n):
+    """第 n 个用户或供应商的公司名称"""
+    h = _hash(n)
+    return (f"{_COMPANY_PREFIXES[h % len(_COMPANY_PREFIXES)]}{_COMPANY_NAMES[(h >> 8) % len(_COMPANY_NAMES)]}"
+            f"{_COMPANY_SUFFIXES[(h >> 16) % len(_COMPANY_SUFFIXES)]} {n}")
+
+
+def product_basics(n):
+    """第 n 个产品的标题、主图和售价（订单商品和购物车商品引用产品时直接计算）"""
+    h = _hash(n)
+    title = (f"{_PRODUCT_NOUNS[h % len(_PRODUCT_NOUNS)]} {_PRODUCT_ADJECTIVES[(h >> 8) % len(_PRODUCT_ADJECTIVES)]} "
+             f"{_PRODUCT_COLORS[(h >> 16) % len(_PRODUCT_COLORS)]} {n}")
+    img = f"http://http2.mlstatic.com/D_SYN{n:08d}-O.webp"
+    # 售价 5.00 ~ 504.99，偏向低价
+    price = round(5 + ((h >> 4) % 10000) ** 2 / 200000, 2)
+    return title, img, price
+
+
+def _moment(rng):
+    """随机时间（两年范围内）"""
+    return _EPOCH + timedelta(seconds=rng.randrange(_SPAN_SECONDS))
+
+
+def _brl(price):
+    """巴西雷亚尔价格文本"""
+    return f"R$ {price:.2f}".replace('.', ',')
+
+
+def generate_users(count, seed):
+    """生成用户（第一个用户为管理员，密码均为 password123）"""
+    rng = random.Random(f"{seed}:users")
+    for n in range(count):
+        yield {
+            "id": user_id(n),
+            "name": company_name(n),
+            "email": f"synthetic-user-{n}@example.com",
+            "password": _PASSWORD_HASH,
+            "cnpj": f"9{n:013d}",
+            "employee_count": rng.choice(["10", "50", "100", "500", "1000"]),
+            "monthly_revenue": rng.choice(["50000", "100000", "500000", "1000000"]),
+            "phone": f"119{rng.randrange(10 ** 8):08d}",
+            "role": "admin" if n == 0 else "user",
+        }
+
+
+def generate_categories(count, seed):
+    """生成类别"""
+    for n in range(count):
+        yield {
+            "id": category_id(n),
+            "name": f"合成类别 {n}",
+            "description": f"合成数据类别 {n}",
+            "icon": None,
+        }
+
+
+def generate_suppliers(count, seed):
+    """生成供应商"""
+    rng = random.Random(f"{seed}:suppliers")
+    for n in range(count):
+        yield {
+            "id": supplier_id(n),
+            "name": company_name(n),
+            "location": rng.choice(_LOCATIONS),
+        }
+
+
+def generate_products(count, seed, categories, suppliers):
+    """生成产品（含缩略图、变体和标签）"""
+    rng = random.Random(f"{seed}:products")
+    for n in range(count):
+        title, img, price = product_basics(n)
+        stock = rng.randrange(0, 1000)
+        variations = [
+            {
+                "id": f"var-{index + 1:03d}",
+                "name": name,
+                "image": img,
+                "price": round(price * rng.uniform(0.9, 1.2), 2),
+                "specification": f"{name} - {title}",
+                "stock_quantity": rng.randrange(0, stock + 1),
+            }
+            for index, name in enumerate(rng.sample(_VARIATION_NAMES, rng.randrange(0, 4)))
+        ]
+        discount_price = round(price * rng.uniform(0.7, 0.95), 2) if rng.random() < 0.2 else None
+        cost_price = round(price * rng.uniform(0.4, 0.8), 2)
+        created_at = _moment(rng)
+        yield {
+            "id": product_id(n),
+            "title": title,
+            "description": f"{title} - 高质量产品",
+            "img": img,
+            "product_mlb_thumbnail": [img] + [f"http://http2.mlstatic.com/D_SYN{n:08d}-{i}.webp" for i in range(rng.randrange(0, 4))],
+            # 类别和供应商的产品数量不均匀（少数类别和供应商拥有大部分产品）
+            "category_id": category_id(int(categories * rng.random() ** 2)),
+            "supplier_id": supplier_id(int(suppliers * rng.random() ** 2)),
+            "shipping_from": rng.choice(_LOCATIONS),
+            "weight": round(rng.uniform(0.1, 10), 2),
+            "dimensions": {"length": rng.randrange(5, 80), "width": rng.randrange(5, 60), "height": rng.randrange(2, 40)},
+            "moq": rng.choice([1, 1, 1, 2, 5, 10]),
+            "tags": rng.sample(_TAGS, rng.randrange(0, 4)),
+            "stock_quantity": stock,
+            "reserved_quantity": 0,
+            "low_stock_threshold": rng.choice([10, 20, 50]),
+            "max_order_quantity": 1000,
+            "cost_price": cost_price,
+            "selling_price": price,
+            "discount_price": discount_price,
+            "product_mlb_price": _brl(price),
+            "roi": f"{round((price - cost_price) / cost_price * 100)}%",
+            "variations": variations,
+            "created_at": created_at,
+        }
+
+
+def generate_carts(count, seed, products):
+    """生成购物车，每项为 (购物车, 购物车商品列表)；第 n 个购物车属于第 n 个用户，同一购物车中的商品不重复"""
+    rng = random.Random(f"{seed}:carts")
+    for n in range(count):
+        items = []
+        for index in rng.sample(range(products), min(rng.randrange(1, 7), products)):
+            items.append({
+                "cart_id": cart_id(n),
+                "product_id": product_id(index),
+                "quantity": rng.randrange(1, 10),
+                "price": product_basics(index)[2],
+            })
+        yield {"id": cart_id(n), "user_id": user_id(n), "created_at": _moment(rng)}, items
+
+
+def generate_orders(count, seed, users, products):
+    """生成订单，每项为 (订单, 订单商品列表)"""
+    rng = random.Random(f"{seed}:orders")
+    for n in range(count):
+        status, step, text, detail = rng.choices(_ORDER_STATUSES, _ORDER_STATUS_WEIGHTS)[0]
+        items = []
+        for index in rng.sample(range(products), min(rng.randrange(1, 6), products)):
+            title, img, price = product_basics(index)
+            items.append({
+                "order_id": order_id(n),
+                "product_id": product_id(index),
+                "product_name": title,
+                "product_image": img,
+                "quantity": rng.randrange(1, 5),
+                "price": price,
+            })
+        city, zipcode = rng.choice(_CITIES)
+        yield {
+            "id": order_id(n),
+            "user_id": user_id(rng.randrange(users)),
+            "status": status,
+            "status_step": step,
+            "status_text": text,
+            "status_detail_text": detail,
+            "customer_name": f"{rng.choice(_CUSTOMER_FIRST)} {rng.choice(_CUSTOMER_LAST)}",
+            "total_amount": round(sum(item["price"] * item["quantity"] for item in items), 2),
+            "shipping_street": f"{rng.choice(_STREETS)}, {rng.randrange(1, 3000)}",
+            "shipping_city": city,
+            "shipping_zipcode": f"{zipcode}-{rng.randrange(1000):03d}",
+            "payment_method": rng.choice(_PAYMENT_METHODS),
+            "notes": None,
+            "order_date": _moment(rng),
+        }, items
+
+
+def generate_sample_purchases(count, seed, users, products):
+    """生成小样购买记录：第 i 条记录属于第 i % users 个用户，同一用户购买的小样不重复（满足唯一约束）"""
+    rng = random.Random(f"{seed}:sample_purchases")
+    for i in range(count):
+        n, k = i % users, i // users
+        purchased_at = _moment(rng)
+        yield {
+            "user_id": user_id(n),
+            "product_id": product_id((n * 31 + k) % products),
+            "purchase_date": purchased_at,
+            "status": "purchased",
+            "created_at": purchased_at,
+            "updated_at": purchased_at,
+        }
+
+
+def validate_counts(counts):
+    """校验各表数量之间的约束"""
+    for table in ("users", "categories", "suppliers", "products"):
+        if counts[table] < 1 and any(counts[name] for name in TABLES[TABLES.index(table) + 1:]):
+            raise ValueError(f"{table} 数量必须大于 0")
+    if counts["carts"] > counts["users"]:
+        raise ValueError("每个用户最多一个购物车，carts 不能大于 users")
+    if counts["sample_purchases"] > counts["users"] * counts["products"]:
+        raise ValueError("每个用户每个产品最多一条小样购买记录，sample_purchases 不能大于 users × products")
+
+
+def _write(model, rows, batch_size, children=None):
+    """
+    逐批写入，返回写入的行数
+
+    Args:
+        model: 模型
+        rows: 行的生成器；children 不为空时每项为 (行, 子表行列表)
+        batch_size (int): 每批的行数
+        children: 子表模型（可选）
+    """
+    from models.product import Product
+
+    written = 0
+    batch = []
+
+    def flush():
+        with engine.begin() as conn:
+            if children is None:
+                conn.execute(insert(model), batch)
+            else:
+                conn.execute(insert(model), [row for row, _ in batch])
+                child_rows = [child for _, items in batch for child in items]
+                if child_rows:
+                    conn.execute(insert(children), child_rows)
+            if model is Product:
+                link_product_tags(conn, {row["id"]: row["tags"] for row in batch})
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            written += len(batch)
+            batch = []
+    if batch:
+        flush()
+        written += len(batch)
+    return written
+
+
+def generate(counts, seed=42, batch_size=5000):
+    """
+    生成合成数据并写入当前配置的数据库
+
+    Args:
+        counts (dict): 各表的数量（键见 TABLES）
+        seed (int): 随机种子
+        batch_size (int): 每批写入的行数
+
+    Returns:
+        dict: 表名 -> 写入的行数
+    """
+    from models import User, Category, Supplier, Product, Cart, CartItem, Order, OrderItem, SamplePurchase
+
+    validate_counts(counts)
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        if conn.execute(select(User.id).where(User.id == user_id(0))).first() is not None:
+            raise ValueError("数据库中已有合成数据，请先执行 --reset")
+    with engine.begin() as conn:
+        seed_builtin_tags(conn)
+
+    plan = [
+        ("users", User, generate_users(counts["users"], seed), None),
+        ("categories", Category, generate_categories(counts["categories"], seed), None),
+        ("suppliers", Supplier, generate_suppliers(counts["suppliers"], seed), None),
+        ("products", Product, generate_products(counts["products"], seed, counts["categories"], counts["suppliers"]), None),
+        ("carts", Cart, generate_carts(counts["carts"], seed, counts["products"]), CartItem),
+        ("orders", Order, generate_orders(counts["orders"], seed, counts["users"], counts["products"]), OrderItem),
+        ("sample_purchases", SamplePurchase,
+         generate_sample_purchases(counts["sample_purchases"], seed, counts["users"], counts["products"]), None),
+    ]
+    written = {}
+    for table, model, rows, children in plan:
+        if not counts[table]:
+            continue
+        start = time.perf_counter()
+        written[table] = _write(model, rows, batch_size, children)
+        elapsed = time.perf_counter() - start
+        print(f"[OK] {table}: {written[table]} 行，{elapsed:.1f} 秒（{written[table] / max(elapsed, 1e-9):.0f} 行/秒）")
+    return written
+
+
+def reset():
+    """删除所有合成数据（按外键依赖的逆序）"""
+    from models import User, Category, Supplier, Product, Cart, CartItem, Order, OrderItem, SamplePurchase
+    from models.tag import ProductTag
+
+    with engine.begin() as conn:
+        conn.execute(delete(OrderItem).where(OrderItem.order_id.like(f"{ID_PREFIX}%")))
+        conn.execute(delete(Order).where(or_(Order.id.like(f"{ID_PREFIX}%"), Order.user_id >= SYNTHETIC_ID_BASE)))
+        conn.execute(delete(SamplePurchase).where(SamplePurchase.user_id >= SYNTHETIC_ID_BASE))
+        conn.execute(delete(CartItem).where(CartItem.cart_id >= SYNTHETIC_ID_BASE))
+        conn.execute(delete(Cart).where(Cart.id >= SYNTHETIC_ID_BASE))
+        conn.execute(delete(ProductTag).where(ProductTag.product_id.like(f"{ID_PREFIX}%")))
+        conn.execute(delete(Product).where(Product.id.like(f"{ID_PREFIX}%")))
+        conn.execute(delete(Supplier).where(Supplier.id.like(f"{ID_PREFIX}%")))
+        conn.execute(delete(Category).where(Category.id.like(f"{ID_PREFIX}%")))
+        conn.execute(delete(User).where(User.id >= SYNTHETIC_ID_BASE))
+
+    # 被删除的购物车可能仍在用户购物车ID缓存中
+    from utils.cart_cache import user_cart_cache
+    user_cart_cache.clear()
+    print("[OK] 已删除所有合成数据")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成指定规模的合成数据并批量写入当前配置的数据库")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="预设规模（默认 small）")
+    for table in TABLES:
+        parser.add_argument(f"--{table.replace('_', '-')}", type=int, default=None, help=f"{table} 数量（覆盖预设规模）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子（默认 42）")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批写入的行数（默认 5000）")
+    parser.add_argument("--reset", action="store_true", help="生成前先删除已有的合成数据")
+    parser.add_argument("--delete", action="store_true", help="只删除已有的合成数据，不生成")
+    args = parser.parse_args()
+
+    if args.reset or args.delete:
+        reset()
+    if not args.delete:
+        counts = dict(SCALES[args.scale])
+        counts.update({table: getattr(args, table) for table in TABLES if getattr(args, table) is not None})
+        print(f"[INFO] 生成合成数据（种子 {args.seed}）: {counts}")
+        generate(counts, seed=args.seed, batch_size=args.batch_size)
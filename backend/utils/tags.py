@@ -0,0 +1,123 @@
+"""
+标签注册表
+标签保存在 tags 表中，产品与标签的关联保存在 product_tags 表中（按标签查找产品走主键索引）；
+产品的 tags 字段仍保存标签显示名称列表，作为列表、搜索和分面筛选使用的冗余副本
+"""
+import uuid
+from sqlalchemy import select, insert, delete
+from models.product import Product
+from models.tag import Tag, ProductTag
+
+# 内置标签（数据库初始化时写入）
+BUILTIN_TAGS = [
+    {"id": "tag-001", "name": "New Arrival", "display_name": "新品上市", "color": "#10b981", "description": "最新上架的产品"},
+    {"id": "tag-002", "name": "On Sale", "display_name": "特价促销", "color": "#ef4444", "description": "正在促销的产品"},
+    {"id": "tag-003", "name": "Best Seller", "display_name": "热销商品", "color": "#f59e0b", "description": "销量最好的产品"},
+    {"id": "tag-004", "name": "Featured", "display_name": "精选推荐", "color": "#8b5cf6", "description": "精选推荐的产品"},
+    {"id": "tag-005", "name": "Limited Edition", "display_name": "限量版", "color": "#ec4899", "description": "限量版产品"},
+    {"id": "tag-006", "name": "Premium", "display_name": "高端产品", "color": "#6366f1", "description": "高端品质产品"},
+    {"id": "tag-007", "name": "Eco Friendly", "display_name": "环保产品", "color": "#22c55e", "description": "环保友好产品"},
+    {"id": "tag-008", "name": "Fast Shipping", "display_name": "快速发货", "color": "#06b6d4", "description": "支持快速发货"},
+]
+
+# 自定义标签的默认颜色（与前端自定义标签一致）
+CUSTOM_TAG_COLOR = "#6b7280"
+
+_BATCH_SIZE = 1000
+
+
+def normalize_tag_names(names):
+    """校验并整理标签名称：去除首尾空白、空值和重复项（保持顺序）"""
+    if names is None:
+        return []
+    if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+        raise ValueError("tags 必须是字符串列表")
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def _custom_tag(display_name):
+    """新标签的行数据（产品中首次出现的标签自动注册）"""
+    return {
+        "id": f"tag-{uuid.uuid4().hex[:12]}",
+        "name": display_name,
+        "display_name": display_name,
+        "color": CUSTOM_TAG_COLOR,
+        "description": "自定义标签",
+    }
+
+
+async def set_product_tags(db, product_id, names):
+    """
+    替换产品的标签关联（在调用方的事务中执行，由调用方提交）
+
+    Args:
+        db: 数据库会话
+        product_id (str): 产品ID
+        names (list): 已通过 normalize_tag_names 整理的标签显示名称
+    """
+    tag_ids = {}
+    if names:
+        existing = await db.execute(select(Tag.display_name, Tag.id).where(Tag.display_name.in_(names)))
+        tag_ids = dict(existing.all())
+    for name in names:
+        if name not in tag_ids:
+            tag = _custom_tag(name)
+            db.add(Tag(**tag))
+            tag_ids[name] = tag["id"]
+
+    await db.execute(delete(ProductTag).where(ProductTag.product_id == product_id))
+    db.add_all([ProductTag(tag_id=tag_ids[name], product_id=product_id) for name in names])
+
+
+def seed_builtin_tags(session):
+    """写入数据库中还不存在的内置标签，返回写入的数量"""
+    existing = set(session.scalars(select(Tag.display_name)))
+    rows = [tag for tag in BUILTIN_TAGS if tag["display_name"] not in existing]
+    if rows:
+        session.execute(insert(Tag), rows)
+    return len(rows)
+
+
+def link_product_tags(session, tags_by_product):
+    """
+    为新写入的产品批量建立标签关联（session 可以是会话或连接，由调用方提交），
+    未注册的标签自动注册为自定义标签；返回新增的关联数量
+
+    Args:
+        session: 数据库会话或连接
+        tags_by_product (dict): 产品ID -> 已通过 normalize_tag_names 整理的标签显示名称
+    """
+    names = {name for tag_names in tags_by_product.values() for name in tag_names}
+    tag_ids = {}
+    if names:
+        tag_ids = dict(session.execute(select(Tag.display_name, Tag.id).where(Tag.display_name.in_(names))).all())
+
+    new_tags, links = [], []
+    for product_id, tag_names in tags_by_product.items():
+        for name in tag_names:
+            if name not in tag_ids:
+                tag = _custom_tag(name)
+                tag_ids[name] = tag["id"]
+                new_tags.append(tag)
+            links.append({"tag_id": tag_ids[name], "product_id": product_id})
+
+    for start in range(0, len(new_tags), _BATCH_SIZE):
+        session.execute(insert(Tag), new_tags[start:start + _BATCH_SIZE])
+    for start in range(0, len(links), _BATCH_SIZE):
+        session.execute(insert(ProductTag), links[start:start + _BATCH_SIZE])
+    return len(links)
+
+
+def backfill_product_tags(session):
+    """
+    根据产品的 tags 字段建立标签关联（只处理还没有任何关联的产品），
+    未注册的标签自动注册为自定义标签；返回新增的关联数量
+    """
+    tagged = set(session.scalars(select(ProductTag.product_id).distinct()))
+    tags_by_product = {}
+    for product_id, names in session.execute(select(Product.id, Product.tags)):
+        if product_id in tagged:
+            continue
+        names = [name for name in names if isinstance(name, str)] if isinstance(names, list) else []
+        tags_by_product[product_id] = normalize_tag_names(names)
+    return link_product_tags(session, tags_by_product)
@@ -910,6 +910,39 @@ export const addToCart = async (cartId, productId, quantity) => {
   }
 }
 
+// 批量修改购物车（加入/修改数量/删除在一个事务中执行），返回修改后的购物车数据
+// operations: [{ op: 'add', product_id, quantity }, { op: 'update', item_id, quantity }, { op: 'remove', item_id }]
+export const batchUpdateCart = async (cartId, operations) => {
+  try {
+    // 开发环境：直接返回成功
+    if (isDevelopment()) {
+      await new Promise(resolve => setTimeout(resolve, 300))
+      return {
+        success: true,
+        message: '购物车已更新',
+        applied: operations.length,
+        items: [],
+        summary: {
+          totalAmount: 0
+        }
+      }
+    }
+    
+    // 生产环境：调用真实API
+    const response = await request('/cart/batch', {
+      method: 'POST',
+      body: JSON.stringify({
+        cart_id: cartId,
+        operations
+      })
+    })
+    return response
+  } catch (error) {
+    console.error('Failed to batch update cart:', error)
+    throw error
+  }
+}
+
 // 订单相关API
 
 // 获取订单ID列表
@@ -1502,6 +1535,7 @@ export default {
   getCartId,
   getCartData,
   addToCart,
+  batchUpdateCart,
   updateCartItem,
   removeCartItem,
   getOrderId,